@@ -0,0 +1,146 @@
+"""
+Cache de respostas do AI-ISEL para perguntas repetidas ("propinas", "licenciaturas
+do ISEL", "calendário escolar", ...), em dois níveis:
+ 1) correspondência exata do texto normalizado da pergunta;
+ 2) correspondência semântica: similaridade de cosseno entre o embedding da
+    pergunta e os das perguntas já respondidas, acima de um limiar configurável
+    (ANSWER_CACHE_THRESHOLD).
+Cada entrada guarda resposta + fontes, expira após ANSWER_CACHE_TTL segundos e
+a cache inteira é invalidada quando o índice é reconstruído (o build_chroma_index
+escreve um ficheiro de versão que aqui é vigiado). lookup e store aceitam o
+embedding da pergunta já calculado (query_vec), para não o repetir.
+"""
+
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from prepare_rag_documents import fold_accents
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))
+ANSWER_CACHE_MAX = int(os.getenv("ANSWER_CACHE_MAX", "2000"))
+INDEX_VERSION_FILE = "index_version.txt"
+
+
+def normalize_question(question: str) -> str:
+    """Minúsculas, sem acentos, sem pontuação e com espaços simples."""
+    return " ".join(re.sub(r"[^\w\s]", " ", fold_accents(question)).split())
+
+
+def write_index_version(chroma_path: Path, version: str) -> None:
+    """Chamado no fim do build_chroma_index: muda sempre que o conteúdo indexado muda."""
+    Path(chroma_path).mkdir(parents=True, exist_ok=True)
+    (Path(chroma_path) / INDEX_VERSION_FILE).write_text(version, encoding="utf-8")
+
+
+def read_index_version(chroma_path: Path) -> str:
+    p = Path(chroma_path) / INDEX_VERSION_FILE
+    return p.read_text(encoding="utf-8").strip() if p.exists() else ""
+
+
+class AnswerCache:
+    """Cache (em memória, LRU) de respostas com correspondência exata e semântica."""
+
+    def __init__(self, embedding_fn=None, chroma_path: Path = Path("db"),
+                 threshold: float = ANSWER_CACHE_THRESHOLD, ttl: float = ANSWER_CACHE_TTL,
+                 max_entries: int = ANSWER_CACHE_MAX):
+        self.embedding_fn = embedding_fn
+        self.chroma_path = Path(chroma_path)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()  # (scope, pergunta normalizada)
+        self._version = read_index_version(self.chroma_path)
+        self.counters = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0,
+                         "stores": 0, "invalidations": 0}
+
+    # ---------- invalidação ----------
+    def _check_version(self) -> None:
+        version = read_index_version(self.chroma_path)
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+            self.counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # ---------- consulta ----------
+    def _embed(self, question: str, query_vec=None) -> Optional[np.ndarray]:
+        if query_vec is None:
+            if self.embedding_fn is None:
+                return None
+            query_vec = self.embedding_fn.embed_query(question)
+        vec = np.asarray(query_vec, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, question: str, scope: str = "", query_vec=None) -> Optional[dict]:
+        """Devolve {"answer", "sources", "match", "similarity"} ou None.
+        `scope` separa perguntas parecidas mas sobre coisas diferentes (ex.: o curso);
+        `query_vec` é o embedding da pergunta, se quem chama já o tiver."""
+        key = (scope, normalize_question(question))
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            self.counters["lookups"] += 1
+            for k in [k for k, e in self._entries.items() if now - e["created"] > self.ttl]:
+                del self._entries[k]
+
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                self.counters["exact_hits"] += 1
+                return {"answer": entry["answer"], "sources": entry["sources"], "match": "exact", "similarity": 1.0}
+            candidates = [(k, e) for k, e in self._entries.items() if e["scope"] == scope and e["vector"] is not None]
+
+        if candidates and (self.embedding_fn is not None or query_vec is not None):
+            vec = self._embed(question, query_vec)
+            matrix = np.stack([e["vector"] for _, e in candidates])
+            sims = matrix @ vec
+            best = int(np.argmax(sims))
+            if sims[best] >= self.threshold:
+                k, e = candidates[best]
+                with self._lock:
+                    if k in self._entries:
+                        self._entries.move_to_end(k)
+                    self.counters["semantic_hits"] += 1
+                return {"answer": e["answer"], "sources": e["sources"], "match": "semantic",
+                        "similarity": round(float(sims[best]), 4)}
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def store(self, question: str, answer: str, sources: List[Dict[str, str]], scope: str = "",
+              query_vec=None) -> None:
+        vector = self._embed(question, query_vec)
+        key = (scope, normalize_question(question))
+        with self._lock:
+            self._check_version()
+            self._entries[key] = {
+                "answer": answer, "sources": sources, "scope": scope,
+                "vector": vector, "created": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.counters["stores"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            c["entries"] = len(self._entries)
+        hits = c["exact_hits"] + c["semantic_hits"]
+        c["hit_rate"] = round(hits / c["lookups"], 4) if c["lookups"] else 0.0
+        c["threshold"] = self.threshold
+        return c
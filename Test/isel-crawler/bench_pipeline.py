@@ -0,0 +1,308 @@
+"""
+Benchmark ponta-a-ponta do pipeline AI-ISEL sobre um site ISEL sintético.
+
+Tudo corre localmente: o site vem do fake_isel_site.py (cursos, planos com
+tabelas e FUCs em PDF, notícias e serviços, à escala pedida) e os embeddings e
+a geração vêm do fake_ollama.py. Numa pasta de trabalho temporária mede:
+ - crawl:      Crawler (run.py) com extração de conteúdo → páginas/s
+ - extração:   extract_content_from_html, extract_links_from_html e
+               build_plano_record (tabelas + FUCs) sobre o HTML → páginas/s
+ - normalização e preparação: normalize_data.py e prepare_rag_documents.py → segundos
+ - indexação:  build_chroma_index.py (Chroma + BM25 + metadados) → chunks/s
+ - perguntas:  retrieve / build_context / answer → percentis de latência,
+               e as respostas estruturadas dos planos (planos_store.py)
+Os resultados vão para JSON; com --compare, compara com uma execução anterior e
+termina com código 1 se alguma métrica piorar mais do que --tolerance.
+
+Os scripts de normalização, preparação e indexação correm como no pipeline
+(processo próprio, na pasta de trabalho), por isso o tempo inclui o arranque.
+
+Uso:
+    python bench_pipeline.py --cursos 12 --noticias 60 --out bench_pipeline.json
+    python bench_pipeline.py --compare bench_pipeline.json --tolerance 0.25
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+
+import requests
+
+import rag_query
+from bench_streaming import QUESTIONS
+from crawler import Crawler, CrawlerConfig
+from extract_content_from_json import extract_content_from_html
+from extract_hyperlinks import classify_page_type, extract_links_from_html
+from extract_planos_estudo import build_plano_record
+from fake_isel_site import start_fake_site
+from fake_ollama import start_fake_ollama
+from metrics import latency_summary
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# métricas comparadas com --compare: (secção, chave, maior é melhor?)
+HEADLINE = [
+    ("crawl", "pages_per_s", True),
+    ("extraction", "content_pages_per_s", True),
+    ("extraction", "planos_pages_per_s", True),
+    ("normalize", "seconds", False),
+    ("prepare", "seconds", False),
+    ("index", "chunks_per_s", True),
+    ("query", "retrieve.p95_ms", False),
+    ("query", "total.p50_ms", False),
+    ("query", "total.p95_ms", False),
+    ("query", "structured.p95_ms", False),
+]
+
+
+def run_script(script: str, workdir: Path, env: dict = None) -> float:
+    """Corre um script do pipeline na pasta de trabalho; devolve os segundos (falha se o script falhar)."""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, str(BASE_DIR / script)], cwd=workdir, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})})
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script} falhou (código {proc.returncode}):\n{proc.stdout[-2000:]}{proc.stderr[-2000:]}")
+    return time.perf_counter() - t0
+
+
+def bench_crawl(site_url: str, workdir: Path, depth: int) -> dict:
+    cfg = CrawlerConfig(depth_limit=depth, same_domain=False, confine_prefix=site_url, extract_content=True)
+    cr = Crawler(site_url, cfg)
+    t0 = time.perf_counter()
+    cr.crawl()
+    dt = time.perf_counter() - t0
+    cr.to_json(str(workdir / "links.json"))
+    cr.to_jsonl_content(str(workdir / "pages_content.jsonl"))
+    pages = len(cr.page_content)
+    return {"pages": pages, "errors": len(cr.errors), "seconds": round(dt, 3), "pages_per_s": round(pages / dt, 1)}
+
+
+def bench_extraction(workdir: Path) -> dict:
+    """Extração sobre o HTML já descarregado (o download é medido à parte)."""
+    with open(workdir / "pages_content.jsonl", "r", encoding="utf-8") as f:
+        urls = [json.loads(line)["url"] for line in f if line.strip()]
+    session = requests.Session()
+    t0 = time.perf_counter()
+    pages = {u: session.get(u, timeout=10).text for u in urls}
+    fetch_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for url, html in pages.items():
+        extract_content_from_html(html, url)
+    content_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hyperlinks = []
+    for url, html in pages.items():
+        links = extract_links_from_html(html, url)
+        hyperlinks.append({"page": url, "type": classify_page_type(url), "domain": url.split("/")[2],
+                           "total_links": len(links), "links": links})
+    links_s = time.perf_counter() - t0
+    with open(workdir / "hyperlinks.json", "w", encoding="utf-8") as f:
+        json.dump(hyperlinks, f, ensure_ascii=False, indent=2)
+
+    # planos: tabelas + FUCs (download e texto dos PDFs) + comissão, como o extract_planos_estudo.py
+    planos_urls = [u for u in pages if classify_page_type(u) == "plano_estudos"]
+    # (o PDF temporário de cada FUC fica na pasta de trabalho)
+    cwd, stdout, sys.stdout = os.getcwd(), sys.stdout, open(os.devnull, "w")
+    os.chdir(workdir)
+    t0 = time.perf_counter()
+    try:
+        planos = [build_plano_record(pages[u], u) for u in planos_urls]
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        os.chdir(cwd)
+    planos_s = time.perf_counter() - t0
+    with open(workdir / "planos_estudo_fuc_completo.json", "w", encoding="utf-8") as f:
+        json.dump(planos, f, ensure_ascii=False, indent=2)
+    fucs = sum(1 for p in planos for t in p["tabelas"] for r in t["rows"] if "FUC_PDF" in r)
+    fuc_errors = sum(1 for p in planos for t in p["tabelas"] for r in t["rows"]
+                     if r.get("FUC_TEXT", "").startswith("[ERRO"))
+    return {
+        "pages": len(pages),
+        "fetch_seconds": round(fetch_s, 3),
+        "content_pages_per_s": round(len(pages) / max(content_s, 1e-9), 1),
+        "links_pages_per_s": round(len(pages) / max(links_s, 1e-9), 1),
+        "planos": len(planos),
+        "fucs": fucs,
+        "fuc_errors": fuc_errors,  # PDFs sem texto (p.ex. sem PyMuPDF instalado)
+        "planos_seconds": round(planos_s, 3),
+        "planos_pages_per_s": round(len(planos) / max(planos_s, 1e-9), 2),
+    }
+
+
+def bench_index(workdir: Path, ollama_url: str, ollama) -> dict:
+    env = {"OLLAMA_HOST": ollama_url, "EMBEDDING_CACHE_PATH": str(workdir / "embeddings_cache.sqlite")}
+    texts_before = ollama.state.texts
+    seconds = run_script("build_chroma_index.py", workdir, env)
+    from langchain_chroma import Chroma
+    chunks = Chroma(persist_directory=str(workdir / rag_query.CHROMA_PATH))._collection.count()
+    return {"chunks": chunks, "embedded_texts": ollama.state.texts - texts_before, "seconds": round(seconds, 3),
+            "chunks_per_s": round(chunks / seconds, 1)}
+
+
+def bench_queries(workdir: Path, ollama_url: str, site, n: int) -> dict:
+    from langchain_chroma import Chroma
+    from langchain_ollama import OllamaEmbeddings, OllamaLLM
+    from bm25_index import BM25Index
+    from intent_classifier import IntentClassifier
+    from metadata_index import MetadataIndex
+    from planos_store import PlanosStore
+
+    db = Chroma(persist_directory=str(workdir / rag_query.CHROMA_PATH),
+                embedding_function=OllamaEmbeddings(model=rag_query.EMBEDDING_MODEL, base_url=ollama_url))
+    meta_index = MetadataIndex.load(workdir / rag_query.META_INDEX_PATH)
+    bm25 = BM25Index.load(workdir / rag_query.BM25_INDEX_PATH)
+    intents = IntentClassifier.load(workdir / rag_query.INTENTS_PATH)
+    llm = OllamaLLM(model="fake", base_url=ollama_url)
+
+    cursos = site.cursos
+    questions = QUESTIONS + [f"O que se aprende na {c['nome']}?" for c in cursos]
+    structured_q = [f"Quantos ECTS tem o {1 + i % 2}.º ano da {c['sigla'].upper()}?" for i, c in enumerate(cursos)]
+    structured_q += [f"Quais as disciplinas do 1.º ano da {c['sigla'].upper()}?" for c in cursos]
+
+    runs = []
+    for i in range(n):
+        q = questions[i % len(questions)]
+        t0 = time.perf_counter()
+        docs = rag_query.retrieve(db, q, k=rag_query.RETRIEVE_K, meta_index=meta_index, bm25=bm25, intents=intents)
+        t1 = time.perf_counter()
+        pack = rag_query.build_context(docs, q)
+        t2 = time.perf_counter()
+        rag_query.answer(llm, q, pack["context"] or "(sem contexto)")
+        t3 = time.perf_counter()
+        runs.append((t1 - t0, t2 - t1, t3 - t2, t3 - t0))
+
+    store = PlanosStore.from_json(workdir / "planos_estudo_fuc_completo.json", workdir / rag_query.PLANOS_DB_PATH)
+    structured, answered = [], 0
+    for i in range(n):
+        t0 = time.perf_counter()
+        answered += rag_query.structured_answer(structured_q[i % len(structured_q)], store) is not None
+        structured.append(time.perf_counter() - t0)
+    store.close()
+    return {
+        "questions": n,
+        "retrieve": latency_summary(r[0] for r in runs),
+        "context": latency_summary(r[1] for r in runs),
+        "answer": latency_summary(r[2] for r in runs),
+        "total": latency_summary(r[3] for r in runs),
+        "structured": latency_summary(structured),
+        "structured_answered": answered,
+    }
+
+
+def metric(results: dict, section: str, key: str):
+    value = results.get(section, {})
+    for part in key.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> int:
+    """Imprime a comparação com a execução de referência; devolve o nº de regressões."""
+    print(f"\n{'métrica':<34} {'referência':>12} {'atual':>12} {'variação':>10}")
+    regressions = 0
+    for section, key, higher_better in HEADLINE:
+        old, new = metric(baseline, section, key), metric(current, section, key)
+        if not old or new is None:
+            continue
+        delta = (new - old) / old
+        worse = -delta if higher_better else delta
+        flag = "❌" if worse > tolerance else ("✅" if worse < -tolerance else "  ")
+        regressions += worse > tolerance
+        print(f"{section + '.' + key:<34} {old:>12.2f} {new:>12.2f} {100 * delta:>+9.1f}% {flag}")
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark ponta-a-ponta do pipeline AI-ISEL (site e Ollama falsos)")
+    p.add_argument("--cursos", type=int, default=8, help="Cursos no site sintético (página + plano cada)")
+    p.add_argument("--noticias", type=int, default=30)
+    p.add_argument("--servicos", type=int, default=8)
+    p.add_argument("--ucs", type=int, default=5, help="UCs por semestre em cada plano")
+    p.add_argument("--site-latency", type=float, default=0.0, help="Latência por pedido ao site (s)")
+    p.add_argument("--depth", type=int, default=4, help="Profundidade do crawl")
+    p.add_argument("--queries", type=int, default=30, help="Perguntas no teste de latência")
+    p.add_argument("--embed-latency", type=float, default=0.0, help="Latência simulada por texto embebido (s)")
+    p.add_argument("--first-token-latency", type=float, default=0.05)
+    p.add_argument("--token-latency", type=float, default=0.002)
+    p.add_argument("--workdir", default=None, help="Pasta de trabalho (por omissão, temporária e apagada no fim)")
+    p.add_argument("--out", default="bench_pipeline.json", help="Ficheiro JSON de resultados")
+    p.add_argument("--compare", default=None, help="JSON de uma execução anterior para comparar")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Piora relativa tolerada no --compare")
+    args = p.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    logging.getLogger("tldextract").setLevel(logging.CRITICAL)  # sem rede: usa a lista de sufixos embutida
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="bench_pipeline_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    site_server, site_url = start_fake_site(latency=args.site_latency, cursos=args.cursos, noticias=args.noticias,
+                                            servicos=args.servicos, ucs_por_semestre=args.ucs)
+    ollama, ollama_url = start_fake_ollama(latency=args.embed_latency, first_token_latency=args.first_token_latency,
+                                           token_latency=args.token_latency)
+    print(f"🧪 Site sintético em {site_url} {site_server.site.counts()} | Ollama falso em {ollama_url}")
+    print(f"📂 Pasta de trabalho: {workdir}\n")
+
+    results = {}
+    try:
+        print("🕷️ crawl...")
+        results["crawl"] = bench_crawl(site_url, workdir, args.depth)
+        print("🔎 extração...")
+        results["extraction"] = bench_extraction(workdir)
+        print("🧹 normalização...")
+        results["normalize"] = {"seconds": round(run_script("normalize_data.py", workdir), 3)}
+        print("🧾 preparação...")
+        results["prepare"] = {"seconds": round(run_script("prepare_rag_documents.py", workdir), 3)}
+        print("📚 indexação...")
+        results["index"] = bench_index(workdir, ollama_url, ollama)
+        print("❓ perguntas...")
+        results["query"] = bench_queries(workdir, ollama_url, site_server.site, args.queries)
+    finally:
+        site_server.shutdown()
+        ollama.shutdown()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    c, e, ix, q = results["crawl"], results["extraction"], results["index"], results["query"]
+    print(f"\n🕷️ crawl: {c['pages']} páginas em {c['seconds']:.2f} s ({c['pages_per_s']} páginas/s)")
+    print(f"🔎 extração: conteúdo {e['content_pages_per_s']} páginas/s | links {e['links_pages_per_s']} páginas/s "
+          f"| planos {e['planos_pages_per_s']} páginas/s ({e['fucs']} FUCs, {e['fuc_errors']} sem texto)")
+    print(f"🧹 normalização: {results['normalize']['seconds']:.2f} s | 🧾 preparação: {results['prepare']['seconds']:.2f} s")
+    print(f"📚 indexação: {ix['chunks']} chunks em {ix['seconds']:.2f} s ({ix['chunks_per_s']} chunks/s)")
+    print(f"{'etapa':<12} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for stage in ("retrieve", "context", "answer", "total", "structured"):
+        s = q[stage]
+        print(f"{stage:<12} {s['p50_ms']:>8.1f}ms {s['p95_ms']:>8.1f}ms {s['p99_ms']:>8.1f}ms")
+
+    payload = {
+        "params": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Resultados guardados em {args.out}")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        print("✅ Sem regressões." if not regressions else f"❌ {regressions} métricas pioraram mais de "
+                                                         f"{100 * args.tolerance:.0f}%.")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
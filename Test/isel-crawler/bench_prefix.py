@@ -0,0 +1,100 @@
+"""
+Benchmark do custo de avaliação do prompt no AI-ISEL (Ollama em CPU):
+quanto tempo de prompt-eval se poupa por pergunta com as instruções fixas como
+prefixo, o modelo mantido carregado (keep_alive) e o pré-aquecimento no arranque.
+
+Usa o Ollama falso (fake_ollama.py), que simula o custo por token de prompt, a
+reutilização da cache KV do prefixo comum com o pedido anterior e a carga do
+modelo, através do OllamaLLM real; o contexto vem dos backends stub do rag_server.
+
+Cenários:
+ - sem_keep_alive:    keep_alive=0 (modelo descarregado a cada pergunta)
+ - instrucoes_no_fim: modelo carregado, mas o contexto/pergunta vêm antes das instruções
+ - prefixo_fixo:      instruções primeiro + keep_alive
+ - prefixo_prewarm:   o anterior + pré-aquecimento (rag_query.prewarm) antes da 1.ª pergunta
+
+Uso:
+    python bench_prefix.py --questions 8 --prompt-token-cost 0.004 --load-latency 2
+"""
+
+import json
+import time
+import argparse
+
+from langchain_core.prompts import PromptTemplate
+from langchain_ollama import OllamaLLM
+
+import rag_query
+from bench_streaming import QUESTIONS
+from fake_ollama import start_fake_ollama
+from metrics import latency_summary
+from rag_server import load_stub_backends
+
+SCENARIOS = {
+    "sem_keep_alive": {"keep_alive": 0, "prefix_first": True, "prewarm": False},
+    "instrucoes_no_fim": {"keep_alive": "30m", "prefix_first": False, "prewarm": False},
+    "prefixo_fixo": {"keep_alive": "30m", "prefix_first": True, "prewarm": False},
+    "prefixo_prewarm": {"keep_alive": "30m", "prefix_first": True, "prewarm": True},
+}
+
+
+def run_scenario(contexts, args, keep_alive, prefix_first: bool, prewarm: bool) -> dict:
+    server, url = start_fake_ollama(prompt_token_cost=args.prompt_token_cost, load_latency=args.load_latency,
+                                    first_token_latency=0.0, token_latency=0.0)
+    llm = OllamaLLM(model="fake", base_url=url, keep_alive=keep_alive, num_predict=8)
+    template = rag_query.PROMPT_TEMPLATE if prefix_first else rag_query.QUESTION_TEMPLATE + rag_query.SYSTEM_PROMPT
+    prompt = PromptTemplate.from_template(template)
+
+    warm_s = rag_query.prewarm(llm, "ollama:fake") if prewarm else 0.0
+    rows = []
+    for question, ctx in contexts:
+        t0 = time.perf_counter()
+        result = llm.generate([prompt.format(context=ctx, question=question)])
+        info = result.generations[0][0].generation_info or {}
+        rows.append({
+            "total": time.perf_counter() - t0,
+            "prompt_eval": info.get("prompt_eval_duration", 0) / 1e9,
+            "load": info.get("load_duration", 0) / 1e9,
+            "prompt_tokens": info.get("prompt_eval_count", 0),
+        })
+    server.shutdown()
+    return {
+        "prewarm_s": round(warm_s, 3),
+        "prompt_tokens_mean": round(sum(r["prompt_tokens"] for r in rows) / len(rows), 1),
+        "prompt_eval": latency_summary(r["prompt_eval"] for r in rows),
+        "load": latency_summary(r["load"] for r in rows),
+        "total": latency_summary(r["total"] for r in rows),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de prompt-eval: prefixo fixo, keep_alive e pré-aquecimento")
+    p.add_argument("--questions", type=int, default=8, help="Número de perguntas por cenário")
+    p.add_argument("--prompt-token-cost", type=float, default=0.004, help="Custo simulado por token de prompt (s)")
+    p.add_argument("--load-latency", type=float, default=2.0, help="Tempo simulado de carga do modelo (s)")
+    p.add_argument("--out", default=None, help="Guardar resultados em JSON")
+    args = p.parse_args()
+
+    db, _, _, _ = load_stub_backends()
+    contexts = []
+    for i in range(args.questions):
+        q = QUESTIONS[i % len(QUESTIONS)]
+        contexts.append((q, rag_query.build_context(rag_query.retrieve(db, q, k=8), q)["context"]))
+
+    results = {name: run_scenario(contexts, args, **cfg) for name, cfg in SCENARIOS.items()}
+    base = results["sem_keep_alive"]["total"]["mean_ms"]
+
+    print(f"\n{'cenário':<18} {'tokens aval.':>12} {'prompt-eval':>12} {'carga':>9} {'total':>10} {'poupado':>9}")
+    for name, r in results.items():
+        saved = base - r["total"]["mean_ms"]
+        print(f"{name:<18} {r['prompt_tokens_mean']:>12.0f} {r['prompt_eval']['mean_ms']:>10.0f}ms "
+              f"{r['load']['mean_ms']:>7.0f}ms {r['total']['mean_ms']:>8.0f}ms {saved:>7.0f}ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Resultados guardados em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark de recuperação do AI-ISEL (perguntas/segundo):
+retrieve antigo (várias chamadas similarity_search, cada uma com novo embedding)
+vs retrieve atual (um embedding, uma consulta vetorial, MMR local com NumPy).
+
+Por defeito usa a coleção em memória dos backends stub do rag_server; com --db
+usa o índice Chroma local (e os embeddings Ollama configurados em rag_query).
+
+Uso:
+    python bench_retrieve.py --rounds 5
+    python bench_retrieve.py --db db --rounds 3
+"""
+
+import json
+import time
+import argparse
+
+import rag_query
+from bench_streaming import QUESTIONS
+from metrics import latency_summary
+
+
+class CountingEmbeddings:
+    """Conta quantas vezes o embedding da pergunta é calculado (e simula o seu custo)."""
+
+    def __init__(self, base, latency: float = 0.0):
+        self.base = base
+        self.latency = latency
+        self.queries = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.base.embed_query(text)
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+
+def legacy_retrieve(db, query: str, k: int = 8, meta_index=None):
+    """O retrieve anterior, mantido aqui só para comparação."""
+    filter_meta = rag_query.query_filter(query, meta_index)
+    try:
+        docs = db.similarity_search(query, k=k, filter=filter_meta, search_type="mmr",
+                                    search_kwargs={"k": k, "fetch_k": max(20, 5 * k), "lambda_mult": 0.3})
+    except TypeError:
+        docs = db.similarity_search(query, k=k, filter=filter_meta)
+    if not docs:
+        try:
+            docs = db.similarity_search(query, k=k, search_type="mmr",
+                                        search_kwargs={"k": k, "fetch_k": max(20, 5 * k), "lambda_mult": 0.3})
+        except TypeError:
+            docs = db.similarity_search(query, k=k)
+    return docs
+
+
+def run(fn, db, meta_index, rounds: int, k: int) -> dict:
+    counter = db._embedding_function
+    counter.queries = 0
+    latencies = []
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for q in QUESTIONS:
+            t = time.perf_counter()
+            fn(db, q, k=k, meta_index=meta_index)
+            latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - t0
+    return {
+        "queries": len(latencies),
+        "queries_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "embeddings_per_query": round(counter.queries / len(latencies), 2),
+        "latency": latency_summary(latencies),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de recuperação: retrieve antigo vs MMR numa só pesquisa")
+    p.add_argument("--db", default=None, help="Diretório Chroma local (omissão: coleção stub em memória)")
+    p.add_argument("--rounds", type=int, default=5, help="Voltas ao conjunto de perguntas")
+    p.add_argument("-k", type=int, default=8, help="Chunks por pergunta")
+    p.add_argument("--embed-latency", type=float, default=0.02,
+                   help="Custo simulado de cada embedding da pergunta no modo stub (s)")
+    p.add_argument("--out", default=None, help="Guardar resultados em JSON")
+    args = p.parse_args()
+
+    if args.db:
+        rag_query.CHROMA_PATH = args.db
+        db = rag_query.load_db()
+        meta_index = rag_query.load_metadata_index()
+    else:
+        from rag_server import load_stub_backends
+        db, meta_index, _, _ = load_stub_backends()
+    db._embedding_function = CountingEmbeddings(db._embedding_function, 0.0 if args.db else args.embed_latency)
+
+    # aquecimento (cache de embeddings, HNSW em memória)
+    rag_query.retrieve(db, QUESTIONS[0], k=args.k, meta_index=meta_index)
+
+    results = {
+        "antigo": run(legacy_retrieve, db, meta_index, args.rounds, args.k),
+        "mmr_unico": run(rag_query.retrieve, db, meta_index, args.rounds, args.k),
+    }
+
+    print(f"\n{'modo':<10} {'q/s':>8} {'emb/q':>6} {'p50':>9} {'p95':>9}")
+    for mode, r in results.items():
+        print(f"{mode:<10} {r['queries_per_s']:>8.1f} {r['embeddings_per_query']:>6.2f} "
+              f"{r['latency']['p50_ms']:>7.1f}ms {r['latency']['p95_ms']:>7.1f}ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Resultados guardados em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
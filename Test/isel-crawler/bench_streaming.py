@@ -0,0 +1,86 @@
+"""
+Benchmark de TTFT (tempo até ao 1.º token) e latência total do AI-ISEL:
+resposta bloqueante (answer / chain.invoke) vs streaming (answer_stream / chain.stream).
+
+Usa o Ollama falso (fake_ollama.py) com latências configuráveis, através do
+OllamaLLM real, e os backends stub do rag_server para a recuperação.
+
+Uso:
+    python bench_streaming.py --questions 20 --first-token-latency 0.8 --token-latency 0.03
+"""
+
+import json
+import time
+import argparse
+
+from langchain_ollama import OllamaLLM
+
+import rag_query
+from fake_ollama import start_fake_ollama
+from metrics import latency_summary
+from rag_server import load_stub_backends
+
+QUESTIONS = [
+    "Quais são as licenciaturas do ISEL?",
+    "Quanto custam as propinas?",
+    "Como funciona o concurso para maiores de 23?",
+    "Onde fica o ISEL?",
+    "Que mestrados existem em engenharia informática?",
+    "Quando é o calendário escolar?",
+    "Como me candidato ao Erasmus?",
+    "Quem coordena a LEIC?",
+]
+
+
+def run_once(db, llm, question: str, streaming: bool) -> dict:
+    t0 = time.perf_counter()
+    docs = rag_query.retrieve(db, question, k=8)
+    pack = rag_query.build_context(docs, question)
+    t_ctx = time.perf_counter() - t0
+    ctx = pack["context"] or "(sem contexto)"
+    if streaming:
+        ttft = None
+        for _ in rag_query.answer_stream(llm, question, ctx):
+            if ttft is None:
+                ttft = time.perf_counter() - t0
+    else:
+        rag_query.answer(llm, question, ctx)
+        ttft = time.perf_counter() - t0  # o utilizador só vê algo no fim
+    return {"context": t_ctx, "ttft": ttft, "total": time.perf_counter() - t0}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark TTFT: resposta bloqueante vs streaming (AI-ISEL)")
+    p.add_argument("--questions", type=int, default=16, help="Número de perguntas por modo")
+    p.add_argument("--first-token-latency", type=float, default=0.8, help="Latência simulada até ao 1.º token (s)")
+    p.add_argument("--token-latency", type=float, default=0.03, help="Latência simulada entre tokens (s)")
+    p.add_argument("--out", default=None, help="Guardar resultados em JSON")
+    args = p.parse_args()
+
+    server, url = start_fake_ollama(first_token_latency=args.first_token_latency, token_latency=args.token_latency)
+    db, _, _, _ = load_stub_backends()
+    llm = OllamaLLM(model="fake", base_url=url)
+
+    results = {}
+    for mode, streaming in (("bloqueante", False), ("streaming", True)):
+        runs = [run_once(db, llm, QUESTIONS[i % len(QUESTIONS)], streaming) for i in range(args.questions)]
+        results[mode] = {
+            "context": latency_summary(r["context"] for r in runs),
+            "ttft": latency_summary(r["ttft"] for r in runs),
+            "total": latency_summary(r["total"] for r in runs),
+        }
+    server.shutdown()
+
+    print(f"\n{'modo':<12} {'ctx p50':>10} {'TTFT p50':>10} {'TTFT p95':>10} {'total p50':>10} {'total p95':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<12} {r['context']['p50_ms']:>8.1f}ms {r['ttft']['p50_ms']:>8.1f}ms "
+              f"{r['ttft']['p95_ms']:>8.1f}ms {r['total']['p50_ms']:>8.1f}ms {r['total']['p95_ms']:>8.1f}ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Resultados guardados em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
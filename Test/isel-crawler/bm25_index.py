@@ -0,0 +1,181 @@
+"""
+Índice lexical BM25 sobre os mesmos chunks do índice Chroma (AI-ISEL).
+
+A pesquisa por embeddings falha termos exatos: siglas de cursos (LEIC, LEIRT, MEIC),
+nomes de UCs, emails da comissão coordenadora. Este índice complementa-a:
+ - tokenização com acentos "dobrados" (fold_accents), por isso "avaliação" = "avaliacao";
+   emails/termos compostos ficam inteiros e também partidos ("ana.silva@isel.pt",
+   "ana", "silva", "isel", "pt");
+ - guardado de forma compacta num .npz: vocabulário + índice direto em CSR
+   (termo, frequência por chunk, em uint32/uint16); o índice invertido é
+   reconstruído com NumPy ao carregar;
+ - atualização incremental: só os chunks novos são tokenizados, os removidos
+   saem por máscara;
+ - pesquisa vetorizada (acumula scores por termo num array), em milissegundos
+   para dezenas de milhares de chunks.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from metadata_index import acronym
+from prepare_rag_documents import fold_accents
+
+INDEX_PATH = Path("bm25_index.npz")
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.@_-][a-z0-9]+)*")
+STOPWORDS = {
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "na", "no", "nas", "nos",
+    "um", "uma", "para", "por", "com", "que", "se", "ao", "aos", "ou", "the", "of", "and",
+    "qual", "quais", "como", "onde", "quando", "quem", "sao", "ha", "isel",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for tok in _TOKEN_RE.findall(fold_accents(text or "")):
+        if tok not in STOPWORDS:
+            tokens.append(tok)
+        if not tok.isalnum():
+            tokens.extend(p for p in re.split(r"[.@_-]", tok) if p and p not in STOPWORDS)
+    return tokens
+
+
+def document_text(doc) -> str:
+    """Texto lexical de um chunk: conteúdo + título + aliases + sigla do curso."""
+    meta = doc.metadata
+    curso = meta.get("curso_nome", "")
+    extra = [meta.get("title", ""), meta.get("aliases", ""), acronym(curso) if curso else ""]
+    return "\n".join([doc.page_content, *[e for e in extra if e]])
+
+
+class BM25Index:
+    """BM25 com índice direto (CSR) persistido e índice invertido em memória."""
+
+    def __init__(self, ids: List[str] = None, vocab: List[str] = None, offsets=None, terms=None, tfs=None,
+                 k1: float = BM25_K1, b: float = BM25_B):
+        self.k1, self.b = k1, b
+        self.ids = list(ids or [])
+        self.vocab = list(vocab or [])
+        self.term_ids = {t: i for i, t in enumerate(self.vocab)}
+        self.offsets = np.asarray(offsets if offsets is not None else [0], dtype=np.int64)
+        self.terms = np.asarray(terms if terms is not None else [], dtype=np.uint32)
+        self.tfs = np.asarray(tfs if tfs is not None else [], dtype=np.uint16)
+        self._build_inverted()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---------- construção ----------
+    @classmethod
+    def build(cls, texts: Dict[str, str]) -> "BM25Index":
+        index = cls()
+        index.update(added=texts)
+        return index
+
+    def _encode(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        counts: Dict[int, int] = {}
+        for tok in tokenize(text):
+            tid = self.term_ids.get(tok)
+            if tid is None:
+                tid = self.term_ids[tok] = len(self.vocab)
+                self.vocab.append(tok)
+            counts[tid] = counts.get(tid, 0) + 1
+        terms = np.fromiter(counts.keys(), dtype=np.uint32, count=len(counts))
+        tfs = np.fromiter((min(c, 65535) for c in counts.values()), dtype=np.uint16, count=len(counts))
+        return terms, tfs
+
+    def update(self, added: Dict[str, str] = None, removed: Iterable[str] = ()) -> None:
+        """Retira `removed` e (re)indexa `added` ({chunk_id: texto}); só os novos são tokenizados."""
+        added = added or {}
+        drop = set(removed) | (set(added) & set(self.ids))
+        if drop:
+            keep = np.array([cid not in drop for cid in self.ids], dtype=bool)
+            lengths = np.diff(self.offsets)
+            row_mask = np.repeat(keep, lengths)
+            self.terms, self.tfs = self.terms[row_mask], self.tfs[row_mask]
+            self.offsets = np.concatenate([[0], np.cumsum(lengths[keep])])
+            self.ids = [cid for cid, k in zip(self.ids, keep) if k]
+
+        if added:
+            enc = [self._encode(text) for text in added.values()]
+            self.ids.extend(added.keys())
+            lengths = np.array([len(t) for t, _ in enc], dtype=np.int64)
+            self.offsets = np.concatenate([self.offsets, self.offsets[-1] + np.cumsum(lengths)])
+            self.terms = np.concatenate([self.terms, *[t for t, _ in enc]])
+            self.tfs = np.concatenate([self.tfs, *[f for _, f in enc]])
+        self._build_inverted()
+
+    def _build_inverted(self) -> None:
+        n_docs = len(self.ids)
+        lengths = np.diff(self.offsets)
+        doc_of_row = np.repeat(np.arange(n_docs, dtype=np.uint32), lengths)
+        order = np.argsort(self.terms, kind="stable")
+        self._post_docs = doc_of_row[order]
+        self._post_tfs = self.tfs[order].astype(np.float32)
+        self._post_start = np.searchsorted(self.terms[order], np.arange(len(self.vocab) + 1))
+        df = np.diff(self._post_start).astype(np.float32)
+        self._idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)) if n_docs else df
+
+        doc_len = np.zeros(n_docs, dtype=np.float32)
+        if n_docs:
+            np.add.at(doc_len, doc_of_row, self.tfs.astype(np.float32))
+        avgdl = float(doc_len.mean()) if n_docs else 1.0
+        self._len_norm = self.k1 * (1 - self.b + self.b * doc_len / (avgdl or 1.0))
+        self._row_of = {cid: i for i, cid in enumerate(self.ids)}
+
+    # ---------- persistência ----------
+    def save(self, path: Path = INDEX_PATH) -> None:
+        # termos que deixaram de aparecer em qualquer chunk saem do vocabulário
+        used = np.unique(self.terms)
+        remap = np.zeros(len(self.vocab), dtype=np.uint32)
+        remap[used] = np.arange(len(used), dtype=np.uint32)
+        vocab = "\n".join(self.vocab[i] for i in used).encode("utf-8")
+        ids = "\n".join(self.ids).encode("utf-8")
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                ids=np.frombuffer(ids, dtype=np.uint8),
+                vocab=np.frombuffer(vocab, dtype=np.uint8),
+                offsets=self.offsets, terms=remap[self.terms], tfs=self.tfs,
+            )
+
+    @classmethod
+    def load(cls, path: Path = INDEX_PATH) -> Optional["BM25Index"]:
+        if not Path(path).exists():
+            return None
+        with np.load(path) as z:
+            ids = z["ids"].tobytes().decode("utf-8")
+            vocab = z["vocab"].tobytes().decode("utf-8")
+            return cls(ids.split("\n") if ids else [], vocab.split("\n") if vocab else [],
+                       z["offsets"], z["terms"], z["tfs"])
+
+    # ---------- consulta ----------
+    def search(self, query: str, k: int = 20, allowed: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """[(chunk_id, score)] por score decrescente; `allowed` restringe aos IDs dados."""
+        tids = {self.term_ids[t] for t in tokenize(query) if t in self.term_ids}
+        if not tids or not self.ids:
+            return []
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for tid in tids:
+            lo, hi = self._post_start[tid], self._post_start[tid + 1]
+            if lo == hi:
+                continue
+            docs, tf = self._post_docs[lo:hi], self._post_tfs[lo:hi]
+            scores[docs] += self._idf[tid] * tf * (self.k1 + 1) / (tf + self._len_norm[docs])
+        if allowed is not None:
+            mask = np.zeros(len(self.ids), dtype=bool)
+            rows = [self._row_of[c] for c in allowed if c in self._row_of]
+            mask[rows] = True
+            scores[~mask] = 0.0
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self.ids[i], float(scores[i])) for i in hits]
@@ -1,24 +1,45 @@
 """
-Constrói a base vetorial Chroma com chunks enriquecidos (anchors/keywords/aliases).
+Constrói a base vetorial Chroma com chunks enriquecidos (anchors/keywords/aliases)
+e o índice lexical BM25 sobre os mesmos chunks.
+Os IDs dos chunks são determinísticos (hash de URL + texto), por isso uma nova
+execução só embebe chunks novos/alterados e remove os que deixaram de existir.
 """
 
-import json, time, uuid
+import os, json, time, hashlib
 from pathlib import Path
 from tqdm import tqdm
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
+
+from answer_cache import write_index_version
+from bm25_index import BM25Index, document_text
+from chunking import chunk_item, make_splitter
+from embedding_cache import cached_ollama_embeddings
+from intent_classifier import IntentClassifier
+from indexing_pipeline import AdaptiveBatchSize, index_documents, print_report
+from metadata_index import MetadataIndex, tag_fields
+from metrics import instrumented_run, timer
 
 DATA_PATH   = Path("rag_documents.json")
 CHROMA_PATH = Path("db")
+META_INDEX_PATH = Path("metadata_index.json")
+BM25_INDEX_PATH = Path("bm25_index.npz")
+INTENTS_PATH = Path("intent_centroids.npz")
 EMBEDDING_MODEL = "nomic-embed-text"
 BATCH_SIZE = 1000
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+EMBED_BATCH_START = 64
+EMBED_BATCH_MAX = 512
+EMBED_TARGET_LATENCY = 2.0  # segundos por pedido de embeddings
+WRITE_QUEUE_SIZE = 8
+GET_PAGE_SIZE = 5000
 
 def load_documents():
+    """Lê rag_documents.json e devolve (nº de páginas, chunks estruturados, listas por URL)."""
     with open(DATA_PATH,"r",encoding="utf-8") as f:
         data=json.load(f)
-    docs=[]
+    splitter = make_splitter()
+    pages, docs, item_lists = 0, [], {}
     for item in data:
         url   = item.get("url","")
         title = item.get("titulo","")
@@ -32,57 +53,142 @@ def load_documents():
             "type": item.get("type",""),
             "curso_nome": item.get("curso_nome",""),
             "degree_level": item.get("degree_level",""),
+            "section": item.get("section",""),
             "keywords": item.get("keywords",[]),
             "aliases":  item.get("aliases",[]),
             "anchors":  item.get("anchors",[])
         }
 
-        # 🧹 Corrigir metadados inválidos (listas/dicts → strings)
+        # 🧹 Corrigir metadados inválidos (listas/dicts → strings) + tags filtráveis
         safe_meta = {}
         for k, v in base_meta.items():
             if isinstance(v, (list, dict)):
                 safe_meta[k] = ", ".join(map(str, v))
             else:
                 safe_meta[k] = v
+        safe_meta.update(tag_fields(base_meta["keywords"]))
+        item_lists[url] = {"keywords": base_meta["keywords"], "aliases": base_meta["aliases"]}
+
+        # anchors como texto extra (boost leve) nos chunks do texto da página
+        anchors = base_meta["anchors"][:10]
+        for d in chunk_item(item, safe_meta, splitter):
+            if anchors and d.metadata.get("chunk_kind") == "pagina":
+                d.page_content = d.page_content + "\n\n" + "\n".join(anchors)
+            docs.append(d)
+        pages += 1
+    return pages, docs, item_lists
+
 
-        content = f"{title}\n\n{text}"
-        docs.append(Document(page_content=content, metadata=safe_meta))
-    return docs
+def chunk_id(url: str, text: str) -> str:
+    """ID determinístico de um chunk: hash de URL + texto do chunk."""
+    h = hashlib.sha256()
+    h.update(url.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()[:32]
 
 
+def fetch_existing(vectordb) -> dict:
+    """Lê (em páginas) todos os IDs já presentes na coleção, com os respetivos metadados."""
+    found, offset = {}, 0
+    while True:
+        page = vectordb.get(include=["metadatas"], limit=GET_PAGE_SIZE, offset=offset)
+        batch = page.get("ids", [])
+        found.update(zip(batch, page.get("metadatas") or [{}] * len(batch)))
+        if len(batch) < GET_PAGE_SIZE:
+            return found
+        offset += len(batch)
+
+
+@instrumented_run("build_chroma_index")
 def main():
     print("📦 A carregar documentos...")
-    docs = load_documents()
-    print(f"✅ {len(docs)} documentos carregados.\n")
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1200, chunk_overlap=200,
-        separators=["\n📘 ","\n📄 ","\n- ", "\n\n", "\n", " "]
-    )
-    split_docs = splitter.split_documents(docs)
-    # atribuir ids únicos e propagar anchors como texto extra (boost leve)
-    enriched=[]
+    with timer("index.load_documents"):
+        pages, split_docs, item_lists = load_documents()
+    print(f"✅ {pages} documentos carregados ({len(split_docs)} chunks estruturados).\n")
+
+    # ids determinísticos (conteúdo)
+    enriched = {}
     for d in split_docs:
         meta = dict(d.metadata)
-        anchors = meta.get("anchors",[])
-        if anchors:
-            d.page_content = d.page_content + "\n\n" + "\n".join(anchors[:10])
-        meta["chunk_id"] = str(uuid.uuid4())
-        enriched.append(Document(page_content=d.page_content, metadata=meta))
+        cid = chunk_id(meta.get("url", ""), d.page_content)
+        meta["chunk_id"] = cid
+        enriched[cid] = Document(page_content=d.page_content, metadata=meta)
 
     print(f"✅ {len(enriched)} segmentos prontos para indexação.\n")
-    embedding_fn = OllamaEmbeddings(model=EMBEDDING_MODEL)
+    embedding_fn = cached_ollama_embeddings(EMBEDDING_MODEL)
     vectordb = Chroma(persist_directory=str(CHROMA_PATH), embedding_function=embedding_fn)
 
-    total_batches = (len(enriched)+BATCH_SIZE-1)//BATCH_SIZE
-    for i in tqdm(range(total_batches), desc="🔄 Indexar batches", unit="batch"):
-        batch = enriched[i*BATCH_SIZE : min((i+1)*BATCH_SIZE, len(enriched))]
-        vectordb.add_documents(batch)
-        try: vectordb._client.persist()
-        except Exception: pass
-        time.sleep(0.1)
+    # 🔁 diff contra o que já está indexado
+    with timer("index.fetch_existing"):
+        existing = fetch_existing(vectordb)
+    new_ids = [cid for cid in enriched if cid not in existing]
+    stale_ids = sorted(existing.keys() - enriched.keys())
+    skipped = len(enriched) - len(new_ids)
+    # chunks inalterados cujos metadados mudaram: atualizar sem voltar a embeber
+    meta_ids = [cid for cid in enriched if cid in existing and existing[cid] != enriched[cid].metadata]
+    print(f"🔎 {len(existing)} chunks já indexados — {len(new_ids)} novos/alterados, "
+          f"{skipped} inalterados, {len(stale_ids)} obsoletos.\n")
+
+    for i in range(0, len(stale_ids), BATCH_SIZE):
+        vectordb.delete(ids=stale_ids[i:i+BATCH_SIZE])
+    for i in range(0, len(meta_ids), BATCH_SIZE):
+        batch_ids = meta_ids[i:i+BATCH_SIZE]
+        vectordb._collection.update(ids=batch_ids, metadatas=[enriched[cid].metadata for cid in batch_ids])
+
+    # ⚡ embeddings concorrentes → fila limitada → escritor único
+    with tqdm(total=len(new_ids), desc="🔄 Indexar chunks", unit="chunk") as bar:
+        report = index_documents(
+            vectordb, embedding_fn, enriched, new_ids,
+            workers=EMBED_WORKERS,
+            queue_size=WRITE_QUEUE_SIZE,
+            batch=AdaptiveBatchSize(start=EMBED_BATCH_START, max_size=EMBED_BATCH_MAX,
+                                    target_s=EMBED_TARGET_LATENCY),
+            progress=bar.update,
+        )
+    print_report(report)
+    # chunks que falharam não estão no Chroma: ficam fora dos restantes índices e da versão
+    failed = set(report["failed_ids"])
+    for cid in failed:
+        enriched.pop(cid, None)
+
+    # 🗂️ índice invertido de metadados (tipo/curso/grau/tag → chunks)
+    with timer("index.metadata"):
+        MetadataIndex.build(enriched, item_lists).save(META_INDEX_PATH)
+    print(f"🗂️ Índice de metadados guardado em: {META_INDEX_PATH.resolve()}")
+
+    # 🔤 índice lexical BM25: só os chunks novos (ou com metadados novos) são tokenizados
+    bm25 = BM25Index.load(BM25_INDEX_PATH)
+    if bm25 is None:
+        bm25, indexed = BM25Index(), set()
+    else:
+        indexed = set(bm25.ids)
+    added = {cid: document_text(enriched[cid]) for cid in enriched if cid not in indexed}
+    added.update({cid: document_text(enriched[cid]) for cid in meta_ids})
+    removed = indexed - enriched.keys()
+    if added or removed or not BM25_INDEX_PATH.exists():
+        with timer("index.bm25"):
+            bm25.update(added=added, removed=removed)
+            bm25.save(BM25_INDEX_PATH)
+    print(f"🔤 Índice BM25: {len(bm25)} chunks (+{len(added)} / -{len(removed)}) em {BM25_INDEX_PATH.resolve()}")
+
+    # 🧭 centróides por tipo de página para o classificador de intenção das perguntas
+    with timer("index.intents"):
+        intents = IntentClassifier.build_from_collection(vectordb._collection, GET_PAGE_SIZE)
+    if intents is not None:
+        intents.save(INTENTS_PATH)
+        print(f"🧭 Centróides de intenção ({', '.join(intents.types)}) guardados em: {INTENTS_PATH.resolve()}")
+
+    # 🔖 nova versão do índice → invalida as caches de respostas
+    if report["chunks"] or stale_ids or meta_ids:
+        digest = hashlib.sha256("\n".join(sorted(enriched)).encode("utf-8")).hexdigest()[:12]
+        write_index_version(CHROMA_PATH, f"{time.strftime('%Y%m%dT%H%M%S')}-{digest}")
 
-    print(f"\n✅ Base vetorial criada em: {CHROMA_PATH.resolve()}")
+    print(f"\n{'⚠️' if failed else '✅'} Base vetorial atualizada em: {CHROMA_PATH.resolve()}")
+    print(f"📊 Embebidos: {report['chunks']} | Falhados: {len(failed)} | Ignorados (inalterados): {skipped} | "
+          f"Removidos: {len(stale_ids)} | Metadados atualizados: {len(meta_ids)}")
+    if failed:
+        raise SystemExit(f"❌ {len(failed)} chunks falharam; volta a correr para os indexar.")
     print("📊 Pronta para consultas RAG.")
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+"""
+Chunking estruturado para o índice RAG (AI-ISEL).
+
+Em vez de partir o texto já achatado de cada página, usa os campos estruturados
+de rag_documents.json:
+ - tabelas → um chunk por bloco Ano/Semestre (lista de UCs com área e ECTS);
+ - UCs com FUC → um chunk por UC (dados da tabela + identificação da ficha)
+   e um chunk por secção da FUC (objetivos, programa, avaliação, ...);
+ - comissao_coordenadora → um chunk com coordenadores, representantes e contactos;
+ - texto geral da página → RecursiveCharacterTextSplitter, como antes.
+Cada chunk leva no início o curso e o Ano/Semestre/UC a que pertence, e esses
+campos vão também para os metadados.
+"""
+
+import re
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from prepare_rag_documents import clean_text, row_uc_name, row_ects, extract_comissao_text
+
+MAX_CHUNK_CHARS = 1200
+CHUNK_OVERLAP = 200
+MIN_SECTION_CHARS = 250
+
+# Cabeçalhos das Fichas de Unidade Curricular (o texto do PDF vem sem quebras de linha).
+# Os longos procuram-se em qualquer lado; os curtos só quando seguidos de ":".
+FUC_LONG_HEADINGS = [
+    "Docente responsável", "Outros docentes", "Objetivos de aprendizagem", "Objectivos de aprendizagem",
+    "Conteúdos programáticos", "Demonstração da coerência", "Metodologias de ensino",
+    "Métodos de avaliação", "Bibliografia principal", "Resultados de aprendizagem",
+    "Learning outcomes", "Syllabus", "Teaching methodologies", "Main bibliography",
+]
+FUC_SHORT_HEADINGS = ["Objetivos", "Programa", "Avaliação", "Bibliografia", "Pré-requisitos"]
+
+_FUC_HEADING_RE = re.compile(
+    "|".join(
+        [rf"(?P<l{i}>{re.escape(h)})" for i, h in enumerate(FUC_LONG_HEADINGS)]
+        + [rf"\b(?P<s{i}>{re.escape(h)})\s*:" for i, h in enumerate(FUC_SHORT_HEADINGS)]
+    ),
+    re.IGNORECASE,
+)
+
+_ROW_SKIP_KEYS = {"Ano", "Semestre", "FUC_TEXT", "FUC_PDF"}
+
+
+def make_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=MAX_CHUNK_CHARS, chunk_overlap=CHUNK_OVERLAP,
+        separators=["\n\n", "\n", ". ", " "],
+    )
+
+
+def _context_line(curso: str, *parts: str) -> str:
+    return " — ".join(p for p in (curso, *parts) if p)
+
+
+def split_fuc_sections(fuc_text: str) -> List[Tuple[str, str]]:
+    """Divide o texto de uma FUC em (secção, texto), juntando secções demasiado curtas."""
+    text = clean_text(fuc_text)
+    if not text:
+        return []
+
+    marks = [(m.start(), m.group(0).rstrip(": ").strip()) for m in _FUC_HEADING_RE.finditer(text)]
+    raw = []
+    if not marks or marks[0][0] > 0:
+        raw.append(("Identificação", text[: marks[0][0] if marks else len(text)]))
+    for i, (pos, heading) in enumerate(marks):
+        end = marks[i + 1][0] if i + 1 < len(marks) else len(text)
+        raw.append((heading, text[pos:end]))
+
+    merged: List[Tuple[str, str]] = []
+    for heading, body in raw:
+        body = body.strip()
+        if not body:
+            continue
+        if merged and len(merged[-1][1]) < MIN_SECTION_CHARS:
+            prev_heading, prev_body = merged[-1]
+            merged[-1] = (f"{prev_heading} / {heading}", f"{prev_body} {body}")
+        else:
+            merged.append((heading, body))
+    if len(merged) > 1 and len(merged[-1][1]) < MIN_SECTION_CHARS:
+        heading, body = merged.pop()
+        prev_heading, prev_body = merged[-1]
+        merged[-1] = (f"{prev_heading} / {heading}", f"{prev_body} {body}")
+    return merged
+
+
+def plan_chunks(item: dict, curso: str, splitter) -> List[Tuple[str, Dict]]:
+    """Chunks de blocos Ano/Semestre, UCs com FUC e secções das FUCs."""
+    out = []
+    for tab in item.get("tabelas", []):
+        ano = tab.get("ano") or ""
+        semestre = tab.get("semestre") or ""
+        rows = tab.get("rows", [])
+        if not rows:
+            continue
+
+        lines = [f"📘 Plano de estudos — {_context_line(curso, ano, semestre)}"]
+        total_ects = 0.0
+        for row in rows:
+            nome = row_uc_name(row) or "UC"
+            ects = row_ects(row)
+            area = row.get("Área científica") or ""
+            lines.append(f"- {nome}" + (f" ({area})" if area else "") + (f" — {ects} ECTS" if ects else ""))
+            try:
+                total_ects += float(str(ects).replace(",", "."))
+            except ValueError:
+                pass
+        if total_ects:
+            lines.append(f"Total: {total_ects:g} ECTS")
+        block_meta = {"chunk_kind": "plano_bloco", "ano": ano, "semestre": semestre}
+        for part in splitter.split_text("\n".join(lines)):
+            out.append((part, block_meta))
+
+        for row in rows:
+            fuc = row.get("FUC_TEXT") or ""
+            if len(fuc) <= 30 or fuc.startswith("[ERRO"):
+                continue
+            nome = row_uc_name(row) or "UC"
+            header = f"📄 {_context_line(curso, ano, semestre, nome)}"
+            uc_meta = {"chunk_kind": "uc", "ano": ano, "semestre": semestre,
+                       "uc": nome, "fuc_pdf": row.get("FUC_PDF", "")}
+
+            fields = [f"{k}: {v}" for k, v in row.items() if k not in _ROW_SKIP_KEYS and v]
+            sections = split_fuc_sections(fuc)
+            uc_text = "\n".join([header, *fields])
+            if row.get("FUC_PDF"):
+                uc_text += f"\nFicha da UC (PDF): {row['FUC_PDF']}"
+            if sections and sections[0][0].startswith("Identificação"):
+                uc_text += "\n" + sections.pop(0)[1]
+            for part in splitter.split_text(uc_text):
+                out.append((part, uc_meta))
+
+            for heading, body in sections:
+                sec_meta = {**uc_meta, "chunk_kind": "fuc_seccao", "fuc_seccao": heading}
+                for part in splitter.split_text(f"{header} — {heading}\n{body}"):
+                    out.append((part, sec_meta))
+    return out
+
+
+def loose_fuc_chunks(item: dict, curso: str, splitter) -> List[Tuple[str, Dict]]:
+    """FUCs sem tabela associada (só o campo `fucs`): secções com o PDF como referência."""
+    out = []
+    for f in item.get("fucs", []):
+        texto = f.get("texto") or ""
+        if len(texto) <= 30 or texto.startswith("[ERRO"):
+            continue
+        pdf = f.get("pdf", "")
+        nome = urlparse(pdf).path.rsplit("/", 1)[-1] if pdf else "UC"
+        header = f"📄 {_context_line(curso, f.get('ano', ''), f.get('semestre', ''), nome)}"
+        meta = {"chunk_kind": "fuc_seccao", "ano": f.get("ano", ""), "semestre": f.get("semestre", ""),
+                "uc": nome, "fuc_pdf": pdf}
+        for heading, body in split_fuc_sections(texto):
+            for part in splitter.split_text(f"{header} — {heading}\n{body}"):
+                out.append((part, {**meta, "fuc_seccao": heading}))
+    return out
+
+
+def chunk_item(item: dict, base_meta: dict, splitter=None) -> List[Document]:
+    """Converte um documento de rag_documents.json em chunks (Documents) com metadados."""
+    splitter = splitter or make_splitter()
+    title = item.get("titulo", "")
+    curso = item.get("curso_nome") or title
+    has_structure = bool(item.get("tabelas") or item.get("fucs") or item.get("comissao_coordenadora"))
+
+    pieces: List[Tuple[str, Dict]] = []
+    page_text = item.get("texto_pagina") if has_structure else None
+    if page_text is None:
+        page_text = item.get("texto", "")
+    if page_text.strip():
+        for part in splitter.split_text(f"{title}\n\n{page_text}"):
+            pieces.append((part, {"chunk_kind": "pagina"}))
+
+    if item.get("tabelas"):
+        pieces.extend(plan_chunks(item, curso, splitter))
+    elif item.get("fucs"):
+        pieces.extend(loose_fuc_chunks(item, curso, splitter))
+
+    comissao = extract_comissao_text(item)
+    if comissao:
+        pieces.append((f"👥 {curso}\n{comissao}", {"chunk_kind": "comissao"}))
+
+    return [Document(page_content=text, metadata={**base_meta, **extra}) for text, extra in pieces]
@@ -0,0 +1,258 @@
+"""
+Montagem do contexto do AI-ISEL por orçamento de tokens (em vez de cortar aos 6000 caracteres).
+
+ - conta tokens com o tokenizer do LLM alvo quando está disponível (tiktoken para
+   OpenAI; para os modelos Ollama, um tokenizer.json local do Hugging Face em
+   TOKENIZER_FILE ou TOKENIZER_DIR/<família>.json, ou descarregado do hub só com
+   TOKENIZER_DOWNLOAD=1) e, em último caso, com uma estimativa por caracteres
+   (avisando no arranque); com o router de LLMs o contador segue o modelo ativo
+   após failover;
+ - o orçamento é a janela de contexto do modelo menos o prompt fixo, a pergunta e
+   uma reserva para a resposta;
+ - chunks repetidos ou contidos noutro são descartados e a sobreposição do
+   splitter (até 200 caracteres entre chunks vizinhos da mesma página) é cortada;
+ - os chunks entram por relevância por token (a relevância vem da posição no
+   ranking), nunca cortados a meio: só o primeiro, se sozinho não couber, é
+   encurtado até ao fim de uma frase;
+ - a lista fixa de cursos do ISEL é só mais um candidato, de baixa prioridade,
+   usado quando a pergunta fala de cursos e sobra espaço.
+
+Os tokenizers das famílias de HF_TOKENIZERS são descarregados uma vez para
+TOKENIZER_DIR pela etapa "tokenizers" do pipeline.py (repositórios gated
+precisam de HF_TOKEN):
+    python context_packer.py --fetch-tokenizers
+"""
+
+import os
+import math
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, List
+
+CONTEXT_WINDOW = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+ANSWER_HEADROOM = int(os.getenv("ANSWER_HEADROOM", "512"))
+CHARS_PER_TOKEN = 3.2  # estimativa para português com tokenizers BPE/SentencePiece
+RANK_K = 5             # relevância de um chunk na posição r: 1 / (RANK_K + r)
+MIN_OVERLAP = 30
+MAX_OVERLAP = 260
+SEPARATOR = "\n\n---\n\n"
+
+# tokenizers locais: um ficheiro (TOKENIZER_FILE) ou uma pasta com <família>.json (TOKENIZER_DIR)
+TOKENIZER_FILE = os.getenv("TOKENIZER_FILE", "")
+TOKENIZER_DIR = os.getenv("TOKENIZER_DIR", str(Path(__file__).resolve().parent / "tokenizers"))
+# descarregar do hub no arranque é opt-in (repositórios gated falham sem token)
+TOKENIZER_DOWNLOAD = os.getenv("TOKENIZER_DOWNLOAD", "0") == "1"
+
+# repositórios Hugging Face com o tokenizer de cada família de modelos Ollama
+HF_TOKENIZERS = {
+    "mistral": "mistralai/Mistral-7B-Instruct-v0.2",
+    "phi3": "microsoft/Phi-3-mini-4k-instruct",
+    "llama3": "meta-llama/Meta-Llama-3-8B-Instruct",
+}
+
+COURSE_LIST = """🏛️ O ISEL integra o Instituto Politécnico de Lisboa (IPL),
+sendo uma instituição pública de ensino superior com autonomia
+administrativa e científica. O IPL inclui ainda as escolas ESCS, ESELx,
+ESML, ESD, ESTC e ESTeSL.
+
+🎓 **Licenciaturas oferecidas no ISEL:**
+- Engenharia Civil
+- Engenharia Eletrónica e Telecomunicações e de Computadores
+- Engenharia Informática e de Computadores
+- Engenharia Informática, Redes e Telecomunicações
+- Engenharia Mecânica
+- Engenharia Química e Biológica
+- Engenharia de Energia e Ambiente
+- Matemática Aplicada à Tecnologia e à Empresa
+- Engenharia Física Aplicada
+
+📘 **Mestrados:**
+- Engenharia Civil
+- Engenharia Eletrotécnica e de Computadores
+- Engenharia Informática
+- Engenharia Mecânica
+- Engenharia Química e Biológica
+- Engenharia de Energia e Ambiente
+- Matemática Aplicada à Indústria"""
+
+COURSE_HINTS = ("curso", "licenciatura", "mestrado")
+
+TokenCounter = Callable[[str], int]
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+_COUNTERS: Dict[str, TokenCounter] = {}
+
+
+def token_counter(llm_name: str = "") -> TokenCounter:
+    """Contador de tokens para o LLM escolhido por pick_llm ("openai", "ollama:mistral:latest", ...),
+    carregado uma vez por nome."""
+    if llm_name not in _COUNTERS:
+        _COUNTERS[llm_name] = _load_counter(llm_name)
+    return _COUNTERS[llm_name]
+
+
+def active_token_counter(llm, llm_name: str = "") -> TokenCounter:
+    """Como token_counter, mas com um LLMRouter usa em cada chamada o tokenizer do
+    candidato primário, que muda quando o router faz failover."""
+    if not hasattr(llm, "candidates"):
+        return token_counter(llm_name)
+    token_counter(llm.name)  # carrega já o do primário (e avisa no arranque se não houver tokenizer)
+    return lambda text: token_counter(llm.name)(text)
+
+
+def _load_counter(llm_name: str) -> TokenCounter:
+    if llm_name == "openai":
+        try:
+            import tiktoken
+            enc = tiktoken.encoding_for_model(os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+            return lambda text: len(enc.encode(text))
+        except Exception as e:
+            print(f"⚠️ tiktoken indisponível ({e}); contagem de tokens estimada por caracteres.")
+            return estimate_tokens
+    if not llm_name.startswith("ollama:"):
+        return estimate_tokens
+
+    family = llm_name.split(":", 1)[-1].split(":")[0]
+    path = TOKENIZER_FILE or os.path.join(TOKENIZER_DIR, f"{family}.json")
+    repo = (os.getenv("TOKENIZER") or HF_TOKENIZERS.get(family)) if TOKENIZER_DOWNLOAD else None
+    if not (os.path.exists(path) or repo):
+        print(f"⚠️ Sem tokenizer local para {llm_name} ({path}); contagem de tokens estimada por "
+              f"caracteres. Para contar com o tokenizer do modelo: python context_packer.py "
+              f"--fetch-tokenizers (ou TOKENIZER_FILE/TOKENIZER_DIR, ou TOKENIZER_DOWNLOAD=1).")
+        return estimate_tokens
+    try:
+        from tokenizers import Tokenizer
+        tok = Tokenizer.from_file(path) if os.path.exists(path) else Tokenizer.from_pretrained(repo)
+    except Exception as e:
+        print(f"⚠️ Tokenizer de {llm_name} indisponível ({e}); contagem de tokens estimada por caracteres.")
+        return estimate_tokens
+    return lambda text: len(tok.encode(text, add_special_tokens=False).ids)
+
+
+def fetch_tokenizers(out_dir: str = TOKENIZER_DIR) -> int:
+    """Guarda o tokenizer.json de cada família de HF_TOKENIZERS em out_dir/<família>.json
+    (os que já existem ficam); devolve quantos ficaram disponíveis."""
+    from tokenizers import Tokenizer
+    os.makedirs(out_dir, exist_ok=True)
+    ok = 0
+    for family, repo in HF_TOKENIZERS.items():
+        path = os.path.join(out_dir, f"{family}.json")
+        if not os.path.exists(path):
+            try:
+                Tokenizer.from_pretrained(repo, token=os.getenv("HF_TOKEN") or None).save(path)
+            except Exception as e:
+                print(f"⚠️ {family} ({repo}): {e}")
+                continue
+        print(f"✅ {family}: {path}")
+        ok += 1
+    return ok
+
+
+def _overlap(a: str, b: str) -> int:
+    """Comprimento do maior sufixo de `a` que é prefixo de `b` (sobreposição do splitter)."""
+    for k in range(min(len(a), len(b), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if a.endswith(b[:k]):
+            return k
+    return 0
+
+
+def dedup_chunks(docs: List) -> List[dict]:
+    """[{text, url, title, rank}] sem repetidos e sem a sobreposição entre vizinhos da mesma página."""
+    kept: List[dict] = []
+    for rank, d in enumerate(docs):
+        text = (d.page_content or "").strip()
+        if not text:
+            continue
+        url = d.metadata.get("url", "")
+        title = d.metadata.get("title", "") or d.metadata.get("curso_nome", "") or ""
+        same_page = [c for c in kept if c["url"] == url]
+        if any(text in c["text"] for c in same_page):
+            continue
+        for c in same_page:
+            if c["text"] in text:  # o novo contém um anterior: fica com a melhor posição
+                rank, c["text"] = min(rank, c["rank"]), ""
+                continue
+            k = _overlap(c["text"], text)
+            if k:
+                text = text[k:].lstrip()
+                continue
+            k = _overlap(text, c["text"])
+            if k:
+                text = text[:-k].rstrip()
+        kept.append({"text": text, "url": url, "title": title, "rank": rank})
+    return sorted((c for c in kept if c["text"]), key=lambda c: c["rank"])
+
+
+def _cut_to_budget(text: str, budget: int, count: TokenCounter) -> str:
+    """Encurta `text` até caber em `budget` tokens, terminando numa frase ou linha."""
+    approx = int(len(text) * budget / max(count(text), 1))
+    cut = text[:approx]
+    while cut and count(cut) > budget:
+        cut = cut[: int(len(cut) * 0.9)]
+    end = max(cut.rfind(". "), cut.rfind("\n"))
+    return cut[: end + 1].rstrip() if end > len(cut) // 2 else cut.rstrip()
+
+
+def context_budget(prompt_overhead: int, context_window: int = CONTEXT_WINDOW,
+                   answer_headroom: int = ANSWER_HEADROOM) -> int:
+    """Tokens disponíveis para o contexto: janela − (prompt fixo + pergunta) − resposta."""
+    return max(0, context_window - prompt_overhead - answer_headroom)
+
+
+def pack_context(docs: List, query: str, budget: int, count: TokenCounter = estimate_tokens) -> Dict:
+    """{"context", "sources", "tokens"} com os chunks que cabem em `budget` tokens."""
+    chunks = dedup_chunks(docs)
+    for c in chunks:
+        c["tokens"] = count(c["text"])
+        c["relevance"] = 1.0 / (RANK_K + c["rank"])
+    if chunks and any(h in query.lower() for h in COURSE_HINTS):
+        worst = min(c["relevance"] for c in chunks)
+        chunks.append({"text": COURSE_LIST, "url": "", "title": "", "rank": len(docs),
+                       "tokens": count(COURSE_LIST), "relevance": worst / 2})
+
+    sep = count(SEPARATOR)
+    chosen, used = [], 0
+    if chunks and chunks[0]["tokens"] > budget:
+        chunks[0]["text"] = _cut_to_budget(chunks[0]["text"], budget, count)
+        chunks[0]["tokens"] = count(chunks[0]["text"])
+    for c in sorted(chunks, key=lambda c: (c is not chunks[0], -c["relevance"] / max(c["tokens"], 1))):
+        cost = c["tokens"] + (sep if chosen else 0)
+        if c["text"] and used + cost <= budget:
+            chosen.append(c)
+            used += cost
+    chosen.sort(key=lambda c: c["rank"])
+
+    seen, sources = set(), []
+    for c in chosen:
+        if c["url"] and c["url"] not in seen:
+            seen.add(c["url"])
+            sources.append({"url": c["url"], "title": c["title"]})
+    return {
+        "context": SEPARATOR.join(c["text"] for c in chosen),
+        "sources": sources,
+        "tokens": {"context": used, "budget": budget, "chunks": len(chosen),
+                   "dropped": len(chunks) - len(chosen)},
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Tokenizers locais para a contagem de tokens do contexto")
+    p.add_argument("--fetch-tokenizers", action="store_true",
+                   help="Descarregar do hub os tokenizers das famílias de modelos Ollama conhecidas")
+    p.add_argument("--out", default=TOKENIZER_DIR, help="Pasta dos tokenizers (<família>.json)")
+    args = p.parse_args()
+    if not args.fetch_tokenizers:
+        p.print_help()
+        return
+    ok = fetch_tokenizers(args.out)
+    print(f"📁 {ok}/{len(HF_TOKENIZERS)} tokenizers em {args.out}")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
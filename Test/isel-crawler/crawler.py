@@ -16,11 +16,15 @@ from requests.exceptions import RequestException
 from bs4 import BeautifulSoup
 import tldextract
 
+from metrics import inc, timer
+from site_tree import SiteTree
+
 
 # ---------- utilitários ----------
 def same_registrable_domain(a: str, b: str) -> bool:
-    ea = tldextract.extract(a)
-    eb = tldextract.extract(b)
+    with timer("crawl.tldextract"):
+        ea = tldextract.extract(a)
+        eb = tldextract.extract(b)
     if not ea.registered_domain or not eb.registered_domain:
         return False
     return ea.registered_domain == eb.registered_domain
@@ -42,6 +46,7 @@ class CrawlerConfig:
     exclude_prefixes: List[str] = field(default_factory=list)
     max_pages: Optional[int] = None
     extract_content: bool = False  # ⬅️ ativa extração de texto
+    site_tree: Optional[str] = None  # índice da árvore do site (.npz): sementes + secção de cada página
 
 
 # ---------- classe principal ----------
@@ -59,6 +64,7 @@ class Crawler:
 
         self.root_domain = tldextract.extract(self.root).registered_domain
         self.root_netloc = urlparse(self.root).netloc
+        self.site_tree: Optional[SiteTree] = SiteTree.load(self.cfg.site_tree) if self.cfg.site_tree else None
 
     # ---------- helpers ----------
     def _should_follow(self, url: str) -> bool:
@@ -155,7 +161,8 @@ class Crawler:
         h1 = (container.find("h1").get_text(" ", strip=True) if container.find("h1") else "")
         h2 = [h.get_text(" ", strip=True) for h in container.find_all("h2")[:10]]
 
-        self._clean_dom(container)
+        with timer("crawl.clean_dom"):
+            self._clean_dom(container)
         text = container.get_text("\n", strip=True)
         lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
         cleaned_lines = [ln for ln in lines if len(ln) > 2 and not ln.lower().startswith("isel - instituto")]
@@ -174,12 +181,18 @@ class Crawler:
             "h2": h2,
             "lang": lang,
             "text": text_clean,
+            "section": self.site_tree.section_of(base_url) if self.site_tree else "",
         }
 
     # ---------- main ----------
     def crawl(self) -> None:
         q: deque = deque()
         q.append((self.root, 0))
+        if self.site_tree is not None:
+            # páginas já conhecidas da árvore do site abaixo da raiz (ou do prefixo) entram logo na fila
+            for url in self.site_tree.urls_under(self.cfg.confine_prefix or self.root):
+                if self._should_follow(url):
+                    q.append((url, 0))
 
         while q:
             url, depth = q.popleft()
@@ -191,9 +204,11 @@ class Crawler:
                 time.sleep(self.cfg.delay)
 
             try:
-                resp = self.session.get(url, timeout=self.cfg.timeout, allow_redirects=True)
-                resp.raise_for_status()
+                with timer("crawl.fetch"):
+                    resp = self.session.get(url, timeout=self.cfg.timeout, allow_redirects=True)
+                    resp.raise_for_status()
             except RequestException as e:
+                inc("crawl.errors")
                 self.errors[url] = str(e)
                 self.visited.add(url)
                 continue
@@ -204,15 +219,20 @@ class Crawler:
                 self.discovered.setdefault(final_url, [])
                 continue
 
-            soup = BeautifulSoup(resp.text, "html.parser")
-            links = self._normalize_links(final_url, soup)
+            inc("crawl.pages")
+            inc("crawl.bytes", len(resp.content))
+            with timer("crawl.parse"):
+                soup = BeautifulSoup(resp.text, "html.parser")
+            with timer("crawl.links"):
+                links = self._normalize_links(final_url, soup)
 
             self.visited.add(final_url)
             self.discovered[final_url] = links
 
             if self.cfg.extract_content:
                 try:
-                    content = self._extract_content_from_soup(soup, final_url)
+                    with timer("crawl.extract"):
+                        content = self._extract_content_from_soup(soup, final_url)
                     self.page_content[final_url] = {"status": "ok", **content}
                 except Exception as e:
                     self.page_content[final_url] = {"status": "error", "url": final_url, "error_msg": str(e)}
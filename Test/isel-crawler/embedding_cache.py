@@ -0,0 +1,175 @@
+"""
+Cache persistente de embeddings (SQLite) para o AI-ISEL.
+
+Envolve qualquer função de embeddings LangChain (ex.: OllamaEmbeddings) e guarda
+cada vetor (float32) indexado por nome do modelo + hash do texto normalizado.
+Assim, re-indexações completas e perguntas repetidas não voltam a chamar o
+servidor de embeddings. O tamanho é limitado (EMBEDDING_CACHE_MAX entradas):
+quando excede, são removidas as entradas usadas há mais tempo.
+
+Uso:
+    emb = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"), "nomic-embed-text")
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embeddings_cache.sqlite")
+CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX", "200000"))
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza Unicode (NFC) e espaços, para que variações triviais partilhem o vetor."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Armazenamento SQLite de vetores float32 com evição LRU por número de entradas."""
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                   model TEXT NOT NULL,
+                   key TEXT NOT NULL,
+                   vector BLOB NOT NULL,
+                   last_used REAL NOT NULL,
+                   PRIMARY KEY (model, key)
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model: str, keys: List[str]) -> dict:
+        """Devolve {key: vetor} para as chaves que existem na cache."""
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model=? AND key IN ({marks})",
+                    [model, *chunk],
+                ).fetchall()
+                for key, blob in rows:
+                    vec = array("f")
+                    vec.frombytes(blob)
+                    found[key] = vec.tolist()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used=? WHERE model=? AND key=?",
+                        [(now, model, key) for key, _ in rows],
+                    )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, model: str, items: dict) -> None:
+        """Guarda {key: vetor} e aplica a evição se o limite for ultrapassado."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings(model, key, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(model, key, array("f", vec).tobytes(), now) for key, vec in items.items()],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if total <= self.max_entries:
+            return
+        # remove um pouco abaixo do limite para não evictar a cada inserção
+        excess = total - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Função de embeddings que consulta a cache antes de chamar o modelo base."""
+
+    def __init__(self, base: Embeddings, model_name: str, cache: EmbeddingCache = None):
+        self.base = base
+        self.model_name = model_name
+        self.cache = cache if cache is not None else EmbeddingCache()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_key(t) for t in texts]
+        found = self.cache.get_many(self.model_name, list(dict.fromkeys(keys)))
+
+        # textos em falta (deduplicados) — uma só chamada ao servidor
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.base.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, fresh)
+            found.update(fresh)
+
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = text_key(text)
+        found = self.cache.get_many(self.model_name, [key])
+        if key in found:
+            return found[key]
+        vec = self.base.embed_query(text)
+        self.cache.put_many(self.model_name, {key: vec})
+        return vec
+
+
+def cached_ollama_embeddings(model: str) -> Embeddings:
+    """OllamaEmbeddings com cache persistente (desativável com EMBEDDING_CACHE=0)."""
+    from langchain_ollama import OllamaEmbeddings
+
+    base = OllamaEmbeddings(model=model)
+    if os.getenv("EMBEDDING_CACHE", "1") == "0":
+        return base
+    return CachedEmbeddings(base, model)
@@ -12,6 +12,8 @@ import requests
 from requests.exceptions import RequestException
 from bs4 import BeautifulSoup
 
+from metrics import instrumented_run, timed, timer
+
 
 # ---------- utilitários ----------
 def clean_dom(soup: BeautifulSoup) -> BeautifulSoup:
@@ -42,9 +44,11 @@ def classify_page_type(url: str) -> str:
         return "outro"
 
 
+@timed("extract.page")
 def extract_content_from_html(html: str, url: str) -> dict:
     """Extrai título, meta description, H1, H2 e texto limpo."""
-    soup = BeautifulSoup(html, "html.parser")
+    with timer("extract.parse"):
+        soup = BeautifulSoup(html, "html.parser")
     title = (soup.title.string.strip() if soup.title and soup.title.string else "")
     meta_desc = ""
     md = soup.find("meta", attrs={"name": "description"})
@@ -66,7 +70,8 @@ def extract_content_from_html(html: str, url: str) -> dict:
     h1 = (container.find("h1").get_text(" ", strip=True) if container.find("h1") else "")
     h2 = [h.get_text(" ", strip=True) for h in container.find_all("h2")[:10]]
 
-    clean_dom(container)
+    with timer("extract.clean_dom"):
+        clean_dom(container)
     text = container.get_text("\n", strip=True)
     lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
     cleaned_lines = [ln for ln in lines if len(ln) > 2 and not ln.lower().startswith("isel - instituto")]
@@ -101,6 +106,7 @@ def extract_content_from_html(html: str, url: str) -> dict:
 
 
 # ---------- principal ----------
+@instrumented_run("extract_content")
 def main():
     parser = argparse.ArgumentParser(description="Extrair conteúdo de páginas guardadas em links.json (AI-ISEL)")
     parser.add_argument("--input", default="links.json", help="Ficheiro de entrada com URLs")
@@ -134,8 +140,9 @@ def main():
             try:
                 time.sleep(args.delay)
                 print(f"[{i}/{len(pages)}] A extrair: {url}")
-                resp = session.get(url, timeout=args.timeout)
-                resp.raise_for_status()
+                with timer("extract.fetch"):
+                    resp = session.get(url, timeout=args.timeout)
+                    resp.raise_for_status()
                 if "text/html" not in resp.headers.get("Content-Type", "").lower():
                     print(f"   ⚠️ Ignorado (não é HTML)")
                     continue
@@ -6,27 +6,30 @@ incluindo:
  - os Representantes dos Alunos,
  - e os Contactos (emails de coordenação).
 
-Usa Selenium + PyMuPDF + BeautifulSoup.
+Usa Selenium + PyMuPDF + BeautifulSoup. O Selenium e o PyMuPDF só são importados
+quando usados: build_plano_record funciona sobre HTML já obtido (ex.: bench_pipeline.py).
 """
 
 import json
 import time
-import fitz  # PyMuPDF
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import requests
 from datetime import datetime
 
+from metrics import inc, instrumented_run, timer
+from planos_store import PlanosStore
+
 
 # ---------- Configuração ----------
 def setup_driver(headless=True):
     """Configura o ChromeDriver em modo headless (sem janela visível)."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from webdriver_manager.chrome import ChromeDriverManager
+
     options = Options()
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-gpu")
@@ -45,15 +48,20 @@ def setup_driver(headless=True):
 def extract_pdf_text(pdf_url: str):
     """Faz download temporário de um PDF e extrai o texto integral."""
     try:
-        resp = requests.get(pdf_url, timeout=25)
-        resp.raise_for_status()
+        import fitz  # PyMuPDF
+
+        with timer("pdf.download"):
+            resp = requests.get(pdf_url, timeout=25)
+            resp.raise_for_status()
+        inc("pdf.bytes", len(resp.content))
 
         temp_file = Path("temp_fuc.pdf")
         with open(temp_file, "wb") as f:
             f.write(resp.content)
 
         text = ""
-        with fitz.open(temp_file) as doc:
+        with timer("pdf.parse"), fitz.open(temp_file) as doc:
+            inc("pdf.pages", len(doc))
             for page in doc:
                 text += page.get_text("text") + "\n"
 
@@ -62,6 +70,7 @@ def extract_pdf_text(pdf_url: str):
         return text.strip()
 
     except Exception as e:
+        inc("pdf.errors")
         return f"[ERRO ao extrair PDF: {e}]"
 
 
@@ -196,8 +205,59 @@ def extract_comissao_info(soup, base_url):
     return data
 
 
+# ---------- Plano completo ----------
+def build_plano_record(html: str, url: str) -> dict:
+    """Registo de um plano (título, sigla, tabelas com FUCs e comissão) a partir do HTML da página."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    # === Extração ultra-robusta do título ===
+    title_candidates = [
+        soup.select_one("h1.field-content"),
+        soup.find("h1"),
+        soup.select_one("h1.page-title"),
+        soup.select_one("div.page-header h1"),
+        soup.select_one("section h1"),
+    ]
+    title_tag = next((t for t in title_candidates if t and t.get_text(strip=True)), None)
+    title_text = title_tag.get_text(strip=True) if title_tag else "Sem título"
+
+    if title_text == "Sem título":
+        print("   ⚠️ Atenção: não foi possível encontrar o nome do curso!")
+    else:
+        print(f"   🎓 Curso encontrado: {title_text}")
+
+    path_parts = urlparse(url).path.strip("/").split("/")
+    curso_sigla = next((p for p in path_parts if len(p) <= 6 and p.isalpha()), "")
+
+    # === Extrair tabelas ===
+    tables = extract_all_tables_from_page(html, url)
+    print(f"   ✅ {len(tables)} tabelas extraídas de {title_text}")
+
+    # === Extrair coordenadores / representantes / contactos ===
+    comissao = extract_comissao_info(soup, url)
+    if any(comissao.values()):
+        print(f"   👥 Comissão Coordenadora e contactos encontrados.")
+    else:
+        print(f"   ⚠️ Nenhuma comissão encontrada.")
+
+    return {
+        "url": url,
+        "domain": urlparse(url).netloc,
+        "curso": title_text,
+        "curso_sigla": curso_sigla.lower(),
+        "type": "plano_estudos",
+        "degree_level": "licenciatura" if "licenciatura" in html.lower() else "desconhecido",
+        "crawled_at": datetime.utcnow().isoformat(),
+        "tabelas": tables,
+        "comissao_coordenadora": comissao
+    }
+
+
 # ---------- Principal ----------
+@instrumented_run("extract_planos_estudo")
 def main():
+    from selenium.common.exceptions import TimeoutException
+
     planos_path = Path("planos_urls.txt")
     if not planos_path.exists():
         print("❌ Ficheiro 'planos_urls.txt' não encontrado. Corre primeiro generate_planos_list.py.")
@@ -217,50 +277,7 @@ def main():
         try:
             driver.get(url)
             time.sleep(3)
-            html = driver.page_source
-            soup = BeautifulSoup(html, "html.parser")
-
-            # === Extração ultra-robusta do título ===
-            title_candidates = [
-                soup.select_one("h1.field-content"),
-                soup.find("h1"),
-                soup.select_one("h1.page-title"),
-                soup.select_one("div.page-header h1"),
-                soup.select_one("section h1"),
-            ]
-            title_tag = next((t for t in title_candidates if t and t.get_text(strip=True)), None)
-            title_text = title_tag.get_text(strip=True) if title_tag else "Sem título"
-
-            if title_text == "Sem título":
-                print("   ⚠️ Atenção: não foi possível encontrar o nome do curso!")
-            else:
-                print(f"   🎓 Curso encontrado: {title_text}")
-
-            path_parts = urlparse(url).path.strip("/").split("/")
-            curso_sigla = next((p for p in path_parts if len(p) <= 6 and p.isalpha()), "")
-
-            # === Extrair tabelas ===
-            tables = extract_all_tables_from_page(html, url)
-            print(f"   ✅ {len(tables)} tabelas extraídas de {title_text}")
-
-            # === Extrair coordenadores / representantes / contactos ===
-            comissao = extract_comissao_info(soup, url)
-            if any(comissao.values()):
-                print(f"   👥 Comissão Coordenadora e contactos encontrados.")
-            else:
-                print(f"   ⚠️ Nenhuma comissão encontrada.")
-
-            results.append({
-                "url": url,
-                "domain": urlparse(url).netloc,
-                "curso": title_text,
-                "curso_sigla": curso_sigla.lower(),
-                "type": "plano_estudos",
-                "degree_level": "licenciatura" if "licenciatura" in html.lower() else "desconhecido",
-                "crawled_at": datetime.utcnow().isoformat(),
-                "tabelas": tables,
-                "comissao_coordenadora": comissao
-            })
+            results.append(build_plano_record(driver.page_source, url))
 
             if i % 3 == 0:
                 with open(output_file, "w", encoding="utf-8") as f:
@@ -279,6 +296,9 @@ def main():
 
     print(f"\n✅ Extração concluída — Ficheiro guardado em: {output_file.resolve()}")
 
+    store = PlanosStore.build(results)
+    print(f"🗃️ Tabelas dos planos ({len(store.cursos)} cursos) guardadas em: {store.path.resolve()}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,348 @@
+"""
+Site falso do ISEL (local) para benchmarks e testes do pipeline AI-ISEL.
+
+Gera, de forma determinística e à escala pedida, um site com a estrutura de
+www.isel.pt, sem tocar no site real:
+ - página inicial e listagens (/ensino/licenciaturas, /ensino/mestrados, /noticias, /servicos);
+ - páginas de curso (/curso/<grau>/<sigla>) com ligação ao plano de estudos;
+ - planos de estudo com a marcação do site (div.title-group por ano, tabelas com
+   caption de semestre, FUCs em PDF, tabela de créditos por área científica e a
+   Comissão Coordenadora / Representantes / Contactos em .list-coordenador);
+ - FUCs em PDF (PDF mínimo válido com o texto da ficha);
+ - notícias e páginas de serviços.
+Conta os pedidos por tipo de página em /stats.
+
+Uso:
+    python fake_isel_site.py --port 8800 --cursos 12 --noticias 50
+    python run.py http://127.0.0.1:8800 --depth 4 --extract-content --out-content pages_content.jsonl
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metadata_index import acronym
+from prepare_rag_documents import fold_accents
+
+AREAS_CURSO = [
+    "Informática e de Computadores", "Eletrotécnica e de Computadores", "Mecânica", "Civil",
+    "Química e Biológica", "Informática, Redes e Telecomunicações", "Eletrónica e Telecomunicações e de Computadores",
+    "Informática e Multimédia", "Física Aplicada", "Matemática Aplicada à Engenharia", "Biomédica",
+    "Energia e Ambiente",
+]
+AREAS_CIENTIFICAS = ["Matemática", "Física", "Informática", "Eletrónica", "Telecomunicações", "Mecânica",
+                     "Química", "Gestão", "Ciências Sociais"]
+UC_BASES = ["Programação", "Análise Matemática", "Álgebra Linear", "Sistemas Digitais", "Física", "Redes de Computadores",
+            "Bases de Dados", "Algoritmos e Estruturas de Dados", "Arquitetura de Computadores", "Sistemas Operativos",
+            "Sinais e Sistemas", "Controlo", "Materiais", "Termodinâmica", "Mecânica Aplicada", "Eletrónica",
+            "Probabilidades e Estatística", "Gestão de Projetos", "Computação Gráfica", "Segurança Informática",
+            "Inteligência Artificial", "Engenharia de Software", "Sistemas Distribuídos", "Comunicações Digitais"]
+ROMANOS = ["", " I", " II", " III", " IV"]
+NOMES = ["Ana", "João", "Maria", "Pedro", "Rita", "Nuno", "Sofia", "Luís", "Inês", "Carlos", "Marta", "Rui"]
+APELIDOS = ["Silva", "Santos", "Ferreira", "Pereira", "Costa", "Oliveira", "Rodrigues", "Martins", "Sousa", "Gomes"]
+FRASES = [
+    "O ISEL oferece formação de excelência em engenharia, com forte ligação às empresas.",
+    "As candidaturas decorrem nas datas indicadas no calendário escolar.",
+    "Os estudantes podem realizar mobilidade internacional ao abrigo do programa Erasmus+.",
+    "A propina anual é fixada pelo Conselho Geral e pode ser paga em prestações.",
+    "O curso prepara profissionais para a conceção, projeto e gestão de sistemas complexos.",
+    "As aulas decorrem em regime diurno e pós-laboral no campus de Chelas.",
+    "Os laboratórios estão equipados com material atualizado para as aulas práticas.",
+    "A avaliação inclui trabalhos práticos, relatórios e exame final.",
+    "Os diplomados têm elevada taxa de empregabilidade nas áreas de engenharia.",
+    "O ISEL integra o Instituto Politécnico de Lisboa.",
+    "Os serviços académicos apoiam as matrículas, inscrições e emissão de certidões.",
+    "A biblioteca disponibiliza acesso a bases de dados científicas e salas de estudo.",
+]
+SERVICOS = ["servicos-academicos", "biblioteca", "servico-de-informatica", "gabinete-de-relacoes-internacionais",
+            "acao-social", "gabinete-de-comunicacao", "provedor-do-estudante", "gabinete-de-apoio-ao-estudante",
+            "centro-de-documentacao", "unidade-de-empregabilidade"]
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", fold_accents(text)).strip("-")
+
+
+def minimal_pdf(text: str) -> bytes:
+    """PDF de uma página com o texto (Helvetica, latin-1), legível pelo PyMuPDF."""
+    words, lines, line = text.split(), [], ""
+    for w in words:
+        if len(line) + len(w) > 90:
+            lines.append(line)
+            line = ""
+        line = f"{line} {w}".strip()
+    lines.append(line)
+    esc = [ln.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for ln in lines[:60]]
+    stream = ("BT /F1 10 Tf 50 800 Td 12 TL " + " ".join(f"({ln}) Tj T*" for ln in esc) + " ET")
+    stream_bytes = stream.encode("latin-1", errors="replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 5 0 R "
+        b"/Resources << /Font << /F1 4 0 R >> >> >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length " + str(len(stream_bytes)).encode() + b" >>\nstream\n" + stream_bytes + b"\nendstream",
+    ]
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{o:010d} 00000 n \n".encode() for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+class FakeIselSite:
+    """Conteúdo do site: caminho → (tipo, content-type, gerador); as páginas são geradas e guardadas à primeira vez."""
+
+    def __init__(self, cursos: int = 8, noticias: int = 30, servicos: int = 8, ucs_por_semestre: int = 5,
+                 seed: int = 7):
+        self.seed = seed
+        self.ucs_por_semestre = ucs_por_semestre
+        self.routes = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.cursos = []
+        siglas = set()
+        for i in range(cursos):
+            grau = "licenciatura" if i % 3 != 2 else "mestrado"
+            area = AREAS_CURSO[i % len(AREAS_CURSO)] + (f" {i // len(AREAS_CURSO) + 1}" if i >= len(AREAS_CURSO) else "")
+            nome = f"{'Licenciatura' if grau == 'licenciatura' else 'Mestrado'} em Engenharia {area}"
+            sigla = acronym(nome).lower()
+            while sigla in siglas:
+                sigla += "x"
+            siglas.add(sigla)
+            curso = {"nome": nome, "sigla": sigla, "grau": grau, "anos": 3 if grau == "licenciatura" else 2,
+                     "path": f"/curso/{grau}/{sigla}"}
+            self.cursos.append(curso)
+            self.routes[curso["path"]] = ("curso", "text/html", lambda c=curso: self.course_page(c))
+            self.routes[curso["path"] + "/plano-de-estudos"] = ("plano", "text/html", lambda c=curso: self.plano_page(c))
+        self.noticias = [{"titulo": f"{random.Random(seed + n).choice(FRASES)[:-1]} ({n + 1})", "n": n}
+                         for n in range(noticias)]
+        for nt in self.noticias:
+            nt["path"] = f"/noticias/{slugify(nt['titulo'])}"
+            self.routes[nt["path"]] = ("noticia", "text/html", lambda nt=nt: self.news_page(nt))
+        self.servicos = [SERVICOS[i % len(SERVICOS)] + (f"-{i // len(SERVICOS) + 1}" if i >= len(SERVICOS) else "")
+                         for i in range(servicos)]
+        for s in self.servicos:
+            self.routes[f"/servicos/{s}"] = ("servico", "text/html", lambda s=s: self.service_page(s))
+        self.routes["/"] = ("home", "text/html", self.home_page)
+        self.routes["/ensino/licenciaturas"] = ("listagem", "text/html", lambda: self.course_list("licenciatura"))
+        self.routes["/ensino/mestrados"] = ("listagem", "text/html", lambda: self.course_list("mestrado"))
+        self.routes["/noticias"] = ("listagem", "text/html", self.news_list)
+        self.routes["/servicos"] = ("listagem", "text/html", self.service_list)
+        for c in self.cursos:
+            for uc in self.plano_ucs(c):
+                self.routes[uc["fuc"]] = ("fuc", "application/pdf", lambda c=c, uc=uc: self.fuc_pdf(c, uc))
+
+    # ---------- dados ----------
+    def _rng(self, key: str) -> random.Random:
+        return random.Random(f"{self.seed}:{key}")
+
+    def plano_ucs(self, curso: dict):
+        rng = self._rng(curso["sigla"])
+        start = rng.randrange(len(UC_BASES))
+        ucs = []
+        for ano in range(1, curso["anos"] + 1):
+            for sem in (1, 2):
+                ects = [6.0] * self.ucs_por_semestre
+                if self.ucs_por_semestre >= 2 and rng.random() < 0.5:
+                    ects[0], ects[1] = 7.5, 4.5
+                for k in range(self.ucs_por_semestre):
+                    i = start + len(ucs)
+                    nome = UC_BASES[i % len(UC_BASES)] + ROMANOS[(i // len(UC_BASES)) % len(ROMANOS)]
+                    code = f"{curso['sigla']}-{ano}{sem}{k}"
+                    ucs.append({"ano": ano, "semestre": sem, "uc": nome, "ects": ects[k],
+                                "area": AREAS_CIENTIFICAS[rng.randrange(len(AREAS_CIENTIFICAS))],
+                                "fuc": f"/fuc/{curso['sigla']}/{code}.pdf", "code": code})
+        return ucs
+
+    def pessoa(self, rng: random.Random) -> str:
+        return f"{rng.choice(NOMES)} {rng.choice(APELIDOS)}"
+
+    def paragrafos(self, key: str, n: int) -> str:
+        rng = self._rng(key)
+        return "".join(f"<p>{' '.join(rng.sample(FRASES, 3))}</p>" for _ in range(n))
+
+    # ---------- HTML ----------
+    def layout(self, title: str, body: str, description: str = "") -> str:
+        menu = "".join(f'<li><a href="{p}">{t}</a></li>' for p, t in (
+            ("/", "Início"), ("/ensino/licenciaturas", "Licenciaturas"), ("/ensino/mestrados", "Mestrados"),
+            ("/noticias", "Notícias"), ("/servicos", "Serviços")))
+        return (f'<!DOCTYPE html><html lang="pt-pt"><head><meta charset="utf-8">'
+                f"<title>{title} | ISEL - Instituto Superior de Engenharia de Lisboa</title>"
+                f'<meta name="description" content="{description or title}"></head><body>'
+                f'<header><nav class="navbar"><ul class="menu">{menu}</ul></nav></header>'
+                f'<main role="main" id="main-content"><h1 class="field-content">{title}</h1>{body}</main>'
+                f"<footer><p>ISEL - Instituto Superior de Engenharia de Lisboa, Rua Conselheiro Emídio Navarro 1</p>"
+                f'<a href="mailto:geral@isel.pt">geral@isel.pt</a></footer></body></html>')
+
+    def home_page(self) -> str:
+        destaques = "".join(f'<li><a href="{n["path"]}">{n["titulo"]}</a></li>' for n in self.noticias[:5])
+        return self.layout("ISEL", self.paragrafos("home", 2) + f"<h2>Destaques</h2><ul>{destaques}</ul>")
+
+    def course_list(self, grau: str) -> str:
+        items = "".join(f'<li><a href="{c["path"]}">{c["nome"]}</a></li>' for c in self.cursos if c["grau"] == grau)
+        return self.layout("Licenciaturas" if grau == "licenciatura" else "Mestrados", f"<ul>{items}</ul>")
+
+    def course_page(self, c: dict) -> str:
+        body = (f"<h2>Apresentação</h2>{self.paragrafos(c['sigla'], 3)}"
+                f"<h2>Saídas profissionais</h2>{self.paragrafos(c['sigla'] + ':saidas', 2)}"
+                f"<h2>Condições de acesso</h2>{self.paragrafos(c['sigla'] + ':acesso', 1)}"
+                f'<p><a href="{c["path"]}/plano-de-estudos">Plano de Estudos</a></p>')
+        return self.layout(c["nome"], body, f"{c['nome']} ({c['sigla'].upper()}) no ISEL")
+
+    def plano_page(self, c: dict) -> str:
+        ucs = self.plano_ucs(c)
+        parts = []
+        for ano in range(1, c["anos"] + 1):
+            parts.append(f'<div class="title-group">{ano}.º Ano</div>')
+            for sem in (1, 2):
+                rows = "".join(
+                    f'<tr><td><a href="{u["fuc"]}">{u["uc"]}</a></td><td>{u["area"]}</td>'
+                    f'<td>{format(u["ects"], "g").replace(".", ",")}</td></tr>'
+                    for u in ucs if u["ano"] == ano and u["semestre"] == sem)
+                parts.append(f"<table><caption>{sem}.º Semestre</caption><tr><th>Unidade Curricular</th>"
+                             f"<th>Área científica</th><th>ECTS</th></tr>{rows}</table>")
+        por_area = {}
+        for u in ucs:
+            por_area[u["area"]] = por_area.get(u["area"], 0.0) + u["ects"]
+        rows = "".join(f"<tr><td>{a}</td><td>{a[:3].upper()}</td><td>{e:g}</td><td>0</td></tr>"
+                       for a, e in sorted(por_area.items()))
+        parts.append('<div class="title-group">Créditos por área científica</div>'
+                     "<table><tr><th>Área Científica</th><th>Sigla</th><th>ECTS Obrigatórios</th>"
+                     f"<th>ECTS Optativos</th></tr>{rows}</table>")
+        rng = self._rng(c["sigla"] + ":comissao")
+        coord = "".join(f'<div class="item"><a href="/docentes/{slugify(n)}">{n}</a>'
+                        f'<img src="/img/{slugify(n)}.jpg"></div>' for n in {self.pessoa(rng) for _ in range(3)})
+        reps = "".join(f'<div class="field-content">{self.pessoa(rng)}</div>' for _ in range(2))
+        parts.append(f'<div class="list-coordenador"><header>Comissão Coordenadora</header>'
+                     f'<div class="view-content-wrap">{coord}</div></div>'
+                     f'<div class="list-coordenador"><header>Representantes dos Alunos</header>{reps}</div>'
+                     f'<div class="list-coordenador"><header>Contactos</header>'
+                     f'<a href="mailto:{c["sigla"]}@isel.pt">{c["sigla"]}@isel.pt</a></div>')
+        return self.layout(c["nome"], "".join(parts), f"Plano de estudos da {c['nome']}")
+
+    def fuc_pdf(self, c: dict, uc: dict) -> bytes:
+        text = (f"Ficha de Unidade Curricular {uc['uc']} ({uc['code']}). Curso: {c['nome']}. "
+                f"{uc['ano']}.º ano, {uc['semestre']}.º semestre, {uc['ects']:g} ECTS. Área científica: {uc['area']}. "
+                + " ".join(self._rng(uc["code"]).sample(FRASES, 6)))
+        return minimal_pdf(text)
+
+    def news_list(self) -> str:
+        items = "".join(f'<li><a href="{n["path"]}">{n["titulo"]}</a></li>' for n in self.noticias)
+        return self.layout("Notícias", f"<ul>{items}</ul>")
+
+    def news_page(self, n: dict) -> str:
+        return self.layout(n["titulo"], f"<p>{2024 + n['n'] % 2}-{1 + n['n'] % 12:02d}-15</p>"
+                           + self.paragrafos(n["path"], 4))
+
+    def service_list(self) -> str:
+        items = "".join(f'<li><a href="/servicos/{s}">{s.replace("-", " ").capitalize()}</a></li>'
+                        for s in self.servicos)
+        return self.layout("Serviços", f"<ul>{items}</ul>")
+
+    def service_page(self, s: str) -> str:
+        return self.layout(s.replace("-", " ").capitalize(), self.paragrafos(s, 3)
+                           + f'<p>Contacto: <a href="mailto:{s}@isel.pt">{s}@isel.pt</a></p>')
+
+    # ---------- acesso ----------
+    def get(self, path: str):
+        """(tipo, content-type, corpo em bytes) ou None se o caminho não existir."""
+        route = self.routes.get(path.rstrip("/") or "/")
+        if route is None:
+            return None
+        kind, ctype, build = route
+        with self._lock:
+            body = self._cache.get(path)
+        if body is None:
+            body = build()
+            body = body.encode("utf-8") if isinstance(body, str) else body
+            with self._lock:
+                self._cache[path] = body
+        return kind, ctype, body
+
+    def counts(self) -> dict:
+        out = {}
+        for kind, _, _ in self.routes.values():
+            out[kind] = out.get(kind, 0) + 1
+        return out
+
+
+class FakeIselHandler(BaseHTTPRequestHandler):
+    server_version = "FakeISEL/1.0"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, status: int, ctype: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype + ("; charset=utf-8" if ctype.startswith("text/") else ""))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split("?")[0].split("#")[0]
+        if path == "/stats":
+            with server.lock:
+                stats = {"requests": server.requests, "by_type": dict(server.by_type), "pages": server.site.counts()}
+            self._send(200, "application/json", json.dumps(stats).encode("utf-8"))
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        page = server.site.get(path)
+        with server.lock:
+            server.requests += 1
+            kind = page[0] if page else "404"
+            server.by_type[kind] = server.by_type.get(kind, 0) + 1
+        if page is None:
+            self._send(404, "text/html", b"<html><body><h1>404</h1></body></html>")
+        else:
+            self._send(200, page[1], page[2])
+
+
+def start_fake_site(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, **site_kwargs):
+    """Arranca o site numa thread e devolve (server, url). port=0 escolhe uma porta livre."""
+    server = ThreadingHTTPServer((host, port), FakeIselHandler)
+    server.daemon_threads = True
+    server.site = FakeIselSite(**site_kwargs)
+    server.latency = latency  # segundos por pedido (rede/servidor)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.by_type = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    p = argparse.ArgumentParser(description="Site falso do ISEL para benchmarks locais (AI-ISEL)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8800)
+    p.add_argument("--cursos", type=int, default=8, help="Número de cursos (cada um com página e plano)")
+    p.add_argument("--noticias", type=int, default=30, help="Número de notícias")
+    p.add_argument("--servicos", type=int, default=8, help="Número de páginas de serviços")
+    p.add_argument("--ucs", type=int, default=5, help="UCs por semestre em cada plano")
+    p.add_argument("--latency", type=float, default=0.0, help="Latência simulada por pedido (s)")
+    p.add_argument("--seed", type=int, default=7)
+    args = p.parse_args()
+
+    server, url = start_fake_site(args.host, args.port, args.latency, cursos=args.cursos, noticias=args.noticias,
+                                  servicos=args.servicos, ucs_por_semestre=args.ucs, seed=args.seed)
+    print(f"🧪 Site ISEL falso em {url} — {server.site.counts()} (Ctrl+C para parar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
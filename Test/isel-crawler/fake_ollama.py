@@ -0,0 +1,273 @@
+"""
+Servidor Ollama falso (local) para testes e benchmarks do AI-ISEL.
+
+Implementa o endpoint de embeddings da API do Ollama (/api/embed e o antigo
+/api/embeddings) com vetores determinísticos (hashing de palavras, normalizados),
+para que textos parecidos tenham vetores próximos. Conta pedidos e textos em
+/stats, o que permite verificar, p.ex., que a cache de embeddings evita chamadas.
+
+Implementa também /api/generate (com e sem streaming NDJSON), com latência
+configurável até ao primeiro token e entre tokens, para medir TTFT.
+
+Simula ainda o custo do prompt num Ollama em CPU: cada token (palavra) do prompt
+custa `prompt_token_cost` segundos, exceto o prefixo comum com o prompt anterior
+do mesmo modelo (reutilização da cache KV), e carregar o modelo custa
+`load_latency`. O modelo fica carregado durante `keep_alive` (como no Ollama:
+"5m", segundos, -1 = sempre, 0 = descarregar logo). Com `num_parallel` > 0 só
+essas gerações correm em simultâneo e as restantes esperam em fila, como com
+OLLAMA_NUM_PARALLEL num Ollama real (útil nos testes de carga).
+
+Uso:
+    python fake_ollama.py --port 11435
+    OLLAMA_HOST=http://127.0.0.1:11435 python build_chroma_index.py
+"""
+
+import json
+import math
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIM = 768
+DEFAULT_KEEP_ALIVE = 300.0
+FAKE_ANSWER = (
+    "🎓 Segundo os registos do ISEL, a informação pedida encontra-se nas fontes indicadas. "
+    "Consulta a página do curso para mais detalhes sobre o plano de estudos e as candidaturas."
+)
+
+
+def parse_keep_alive(value) -> float:
+    """Segundos (inf = sempre) a partir de 300, "5m", "1h", "30s", -1 ou 0."""
+    if value is None or value == "":
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, (int, float)):
+        return math.inf if value < 0 else float(value)
+    value = str(value).strip()
+    units = {"s": 1, "m": 60, "h": 3600}
+    if value[-1] in units:
+        seconds = float(value[:-1]) * units[value[-1]]
+    else:
+        seconds = float(value)
+    return math.inf if seconds < 0 else seconds
+
+
+def common_prefix(a: list, b: list) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def fake_embedding(text: str, dim: int = DIM) -> list:
+    """Vetor determinístico: cada palavra soma ±1 numa dimensão escolhida por hash."""
+    vec = [0.0] * dim
+    for word in (text or "").lower().split():
+        h = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        idx = int.from_bytes(h[:4], "little") % dim
+        vec[idx] += 1.0 if h[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+class FakeOllamaState:
+    def __init__(self, dim: int = DIM, latency: float = 0.0,
+                 first_token_latency: float = 0.0, token_latency: float = 0.0, answer: str = FAKE_ANSWER,
+                 prompt_token_cost: float = 0.0, load_latency: float = 0.0, num_parallel: int = 0):
+        self.dim = dim
+        self.latency = latency  # segundos por texto embebido
+        self.first_token_latency = first_token_latency  # segundos até ao 1.º token
+        self.token_latency = token_latency  # segundos entre tokens
+        self.answer = answer
+        self.prompt_token_cost = prompt_token_cost  # segundos por token do prompt avaliado
+        self.load_latency = load_latency  # segundos para carregar o modelo
+        self.slots = threading.BoundedSemaphore(num_parallel) if num_parallel > 0 else None
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.texts = 0
+        self.generations = 0
+        self.loads = 0
+        self.prompt_tokens = 0
+        self.prompt_tokens_cached = 0
+        self.models = {}  # modelo → {"prompt": [tokens], "until": instante de descarga}
+
+    def count(self, n_texts: int) -> None:
+        with self.lock:
+            self.requests += 1
+            self.texts += n_texts
+
+    def prompt_cost(self, model: str, prompt: str, keep_alive) -> tuple:
+        """(segundos de carga, tokens avaliados, tokens reutilizados) para um pedido."""
+        tokens = prompt.split()
+        now = time.monotonic()
+        with self.lock:
+            slot = self.models.get(model)
+            if slot is None or now >= slot["until"]:
+                load, cached = self.load_latency, 0
+                self.loads += 1
+            else:
+                load, cached = 0.0, common_prefix(slot["prompt"], tokens)
+            ttl = parse_keep_alive(keep_alive)
+            if ttl > 0:
+                self.models[model] = {"prompt": tokens, "until": now + ttl}
+            else:
+                self.models.pop(model, None)
+            self.prompt_tokens += len(tokens) - cached
+            self.prompt_tokens_cached += cached
+        return load, len(tokens) - cached, cached
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOllama/1.0"
+
+    @property
+    def state(self) -> FakeOllamaState:
+        return self.server.state
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send_json(self, obj, status=200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        return json.loads(raw or b"{}")
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json({"requests": self.state.requests, "texts": self.state.texts,
+                             "generations": self.state.generations, "loads": self.state.loads,
+                             "prompt_tokens": self.state.prompt_tokens,
+                             "prompt_tokens_cached": self.state.prompt_tokens_cached})
+        elif self.path in ("/", "/api/version"):
+            self._send_json({"version": "0.0.0-fake"})
+        elif self.path == "/api/tags":
+            self._send_json({"models": []})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        payload = self._read_json()
+        if self.path == "/api/embed":
+            inputs = payload.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            self.state.count(len(inputs))
+            if self.state.latency:
+                time.sleep(self.state.latency * len(inputs))
+            self._send_json({
+                "model": payload.get("model", ""),
+                "embeddings": [fake_embedding(t, self.state.dim) for t in inputs],
+            })
+        elif self.path == "/api/embeddings":
+            self.state.count(1)
+            if self.state.latency:
+                time.sleep(self.state.latency)
+            self._send_json({"embedding": fake_embedding(payload.get("prompt", ""), self.state.dim)})
+        elif self.path == "/api/generate":
+            if self.state.slots is None:
+                self._generate(payload)
+            else:
+                with self.state.slots:  # gerações em excesso ficam em fila
+                    self._generate(payload)
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _generate(self, payload: dict):
+        st = self.state
+        with st.lock:
+            st.generations += 1
+        tokens = [w + " " for w in st.answer.split()]
+        limit = (payload.get("options") or {}).get("num_predict")
+        if limit and limit > 0:
+            tokens = tokens[:limit]
+        prompt = payload.get("prompt") or ""
+        load, evaluated, _ = st.prompt_cost(payload.get("model", ""), prompt, payload.get("keep_alive"))
+        prompt_eval = evaluated * st.prompt_token_cost
+        if not prompt:  # pedido vazio = só carregar o modelo (pre-warm)
+            tokens = []
+        t0 = time.perf_counter()
+        time.sleep(load + prompt_eval + (st.first_token_latency if tokens else 0.0))
+        final = {
+            "model": payload.get("model", ""),
+            "created_at": "1970-01-01T00:00:00Z",
+            "response": "",
+            "done": True,
+            "done_reason": "stop" if tokens else "load",
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": int((prompt_eval + st.first_token_latency) * 1e9),
+            "eval_count": len(tokens),
+        }
+
+        if payload.get("stream", True) is False:
+            time.sleep(st.token_latency * max(len(tokens) - 1, 0))
+            final["response"] = "".join(tokens)
+            final["total_duration"] = int((time.perf_counter() - t0) * 1e9)
+            self._send_json(final)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for i, tok in enumerate(tokens):
+            if i:
+                time.sleep(st.token_latency)
+            line = {"model": payload.get("model", ""), "created_at": final["created_at"],
+                    "response": tok, "done": False}
+            self.wfile.write((json.dumps(line) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        final["total_duration"] = int((time.perf_counter() - t0) * 1e9)
+        self.wfile.write((json.dumps(final) + "\n").encode("utf-8"))
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_fake_ollama(host: str = "127.0.0.1", port: int = 0, **state_kwargs):
+    """Arranca o servidor numa thread e devolve (server, url). port=0 escolhe uma porta livre."""
+    server = ThreadingHTTPServer((host, port), FakeOllamaHandler)
+    server.daemon_threads = True
+    server.state = FakeOllamaState(**state_kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    p = argparse.ArgumentParser(description="Servidor Ollama falso para testes locais (AI-ISEL)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=11435)
+    p.add_argument("--dim", type=int, default=DIM, help="Dimensão dos embeddings")
+    p.add_argument("--latency", type=float, default=0.0, help="Latência simulada por texto (s)")
+    p.add_argument("--first-token-latency", type=float, default=0.5, help="Latência até ao 1.º token (s)")
+    p.add_argument("--token-latency", type=float, default=0.05, help="Latência entre tokens (s)")
+    p.add_argument("--prompt-token-cost", type=float, default=0.0, help="Custo por token de prompt avaliado (s)")
+    p.add_argument("--load-latency", type=float, default=0.0, help="Tempo de carga do modelo (s)")
+    p.add_argument("--num-parallel", type=int, default=0, help="Gerações em simultâneo (0 = sem limite)")
+    args = p.parse_args()
+
+    server, url = start_fake_ollama(
+        args.host, args.port, dim=args.dim, latency=args.latency,
+        first_token_latency=args.first_token_latency, token_latency=args.token_latency,
+        prompt_token_cost=args.prompt_token_cost, load_latency=args.load_latency,
+        num_parallel=args.num_parallel,
+    )
+    print(f"🧪 Ollama falso a correr em {url} (Ctrl+C para parar)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
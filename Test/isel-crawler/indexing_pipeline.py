@@ -0,0 +1,169 @@
+"""
+Pipeline de indexação em duas fases para a base vetorial Chroma (AI-ISEL).
+
+1) Embeddings: vários pedidos concorrentes ao servidor de embeddings, com
+   tamanho de batch adaptativo (cresce enquanto a latência está abaixo do alvo,
+   encolhe quando sobe ou quando há erros).
+2) Escrita: uma fila limitada alimenta um único escritor que faz upsert dos
+   vetores já calculados na coleção Chroma. Se a escrita atrasar, a fila enche
+   e os trabalhadores de embeddings ficam à espera (backpressure).
+
+No fim devolve um relatório de throughput (chunks/s e percentis de latência) e
+os ids dos chunks que falharam (embedding ou escrita), para ficarem de fora dos
+restantes índices e serem repetidos na próxima execução.
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from langchain_core.documents import Document
+
+from metrics import inc, latency_summary, observe
+
+_STOP = object()
+
+
+class AdaptiveBatchSize:
+    """Ajusta o tamanho do batch de embeddings à latência observada."""
+
+    def __init__(self, start: int = 64, min_size: int = 8, max_size: int = 512, target_s: float = 2.0):
+        self.size = start
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_s = target_s
+        self._lock = threading.Lock()
+
+    def observe(self, latency: float, ok: bool = True) -> None:
+        with self._lock:
+            if not ok or latency > self.target_s:
+                self.size = max(self.min_size, self.size // 2)
+            elif latency < self.target_s / 2:
+                self.size = min(self.max_size, int(self.size * 1.5) + 1)
+
+    def current(self) -> int:
+        with self._lock:
+            return self.size
+
+
+def _upsert(vectordb, ids, docs, vectors) -> None:
+    vectordb._collection.upsert(
+        ids=ids,
+        embeddings=vectors,
+        documents=[d.page_content for d in docs],
+        metadatas=[d.metadata for d in docs],
+    )
+
+
+def index_documents(
+    vectordb,
+    embedding_fn,
+    docs: Dict[str, Document],
+    ids: List[str],
+    workers: int = 4,
+    queue_size: int = 8,
+    batch: AdaptiveBatchSize = None,
+    max_retries: int = 3,
+    progress=None,
+) -> dict:
+    """Embebe e grava os `ids` indicados de `docs`; devolve o relatório de throughput."""
+    batch = batch or AdaptiveBatchSize()
+    out_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    in_flight = threading.Semaphore(workers + queue_size)
+    latencies, errors, failed_ids = [], [], []
+    written = [0]
+    write_times = []
+
+    def embed(batch_ids: List[str]) -> None:
+        try:
+            _embed(batch_ids)
+        except Exception as e:  # o futuro não é lido: qualquer erro tem de ficar no relatório
+            errors.append(f"{len(batch_ids)} chunks: {e!r}")
+            failed_ids.extend(batch_ids)
+        finally:
+            in_flight.release()
+
+    def _embed(batch_ids: List[str]) -> None:
+        texts = [docs[i].page_content for i in batch_ids]
+        for attempt in range(max_retries):
+            t0 = time.perf_counter()
+            try:
+                vectors = embedding_fn.embed_documents(texts)
+            except Exception as e:
+                batch.observe(time.perf_counter() - t0, ok=False)
+                inc("index.embed.errors")
+                if attempt == max_retries - 1:
+                    errors.append(f"{len(batch_ids)} chunks: {e}")
+                    failed_ids.extend(batch_ids)
+                    return
+                time.sleep(0.5 * (attempt + 1))
+                continue
+            dt = time.perf_counter() - t0
+            latencies.append(dt)
+            batch.observe(dt)
+            observe("index.embed", dt)
+            inc("index.embedded", len(batch_ids))
+            out_q.put((batch_ids, vectors))  # bloqueia se o escritor estiver atrasado
+            return
+
+    def writer() -> None:
+        while True:
+            item = out_q.get()
+            if item is _STOP:
+                return
+            batch_ids, vectors = item
+            t0 = time.perf_counter()
+            try:
+                _upsert(vectordb, batch_ids, [docs[i] for i in batch_ids], vectors)
+                written[0] += len(batch_ids)
+                if progress:
+                    progress(len(batch_ids))
+            except Exception as e:
+                inc("index.chroma_write.errors")
+                errors.append(f"escrita de {len(batch_ids)} chunks: {e}")
+                failed_ids.extend(batch_ids)
+            write_times.append(time.perf_counter() - t0)
+            observe("index.chroma_write", write_times[-1])
+
+    start = time.perf_counter()
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pos = 0
+        while pos < len(ids):
+            in_flight.acquire()
+            size = batch.current()
+            pool.submit(embed, ids[pos:pos + size])
+            pos += size
+
+    out_q.put(_STOP)
+    writer_thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "chunks": written[0],
+        "elapsed_s": round(elapsed, 2),
+        "chunks_per_s": round(written[0] / elapsed, 2) if elapsed > 0 else 0.0,
+        "embedding_batches": len(latencies),
+        "final_batch_size": batch.current(),
+        "embedding_latency": latency_summary(latencies),
+        "write_latency": latency_summary(write_times),
+        "errors": errors,
+        "failed_ids": failed_ids,
+    }
+
+
+def print_report(report: dict) -> None:
+    lat = report["embedding_latency"]
+    wr = report["write_latency"]
+    print(f"⚡ {report['chunks']} chunks em {report['elapsed_s']} s → {report['chunks_per_s']} chunks/s")
+    print(f"   🧠 Embeddings: {report['embedding_batches']} batches | p50 {lat['p50_ms']} ms | "
+          f"p95 {lat['p95_ms']} ms | p99 {lat['p99_ms']} ms | batch final {report['final_batch_size']}")
+    print(f"   💾 Escrita Chroma: p50 {wr['p50_ms']} ms | p95 {wr['p95_ms']} ms")
+    for e in report["errors"]:
+        print(f"   ⚠️ Erro: {e}")
+    if report["failed_ids"]:
+        print(f"   ⚠️ {len(report['failed_ids'])} chunks não indexados (serão repetidos na próxima execução)")
@@ -0,0 +1,106 @@
+"""
+Classificador de intenção da pergunta (AI-ISEL) por centróides de embeddings.
+
+No fim do build_chroma_index calcula-se, para cada `type` de página (curso,
+admissao, servico, noticia, ...), o centróide dos embeddings dos seus chunks,
+centrado pela média global (o que todos os chunks têm em comum não ajuda a
+distinguir) e normalizado. No momento da pergunta compara-se o embedding que
+já foi calculado para a recuperação com esses centróides — sem embedding extra —
+e escolhe-se o filtro pela margem:
+ - o melhor tipo, se destacar dos restantes por pelo menos INTENT_MARGIN;
+ - os tipos dentro da margem do melhor, se forem no máximo INTENT_MAX_TYPES;
+ - nenhum filtro se a pergunta for ambígua, pouco parecida com qualquer tipo
+   ou se o melhor for o tipo genérico ("outro").
+"""
+
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+INTENTS_PATH = Path("intent_centroids.npz")
+INTENT_MARGIN = float(os.getenv("INTENT_MARGIN", "0.05"))
+INTENT_MIN_SIM = float(os.getenv("INTENT_MIN_SIM", "0.05"))
+INTENT_MAX_TYPES = 2
+GENERIC_TYPES = {"", "outro"}
+GET_PAGE_SIZE = 5000
+
+
+def _unit(v: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(v, axis=-1, keepdims=True)
+    return v / np.where(norm == 0, 1.0, norm)
+
+
+class IntentClassifier:
+    """Centróides (centrados) dos embeddings por tipo de página."""
+
+    def __init__(self, types: Sequence[str], centroids: np.ndarray, mean: np.ndarray, counts: Sequence[int]):
+        self.types = list(types)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.counts = list(counts)
+
+    # ---------- construção ----------
+    @classmethod
+    def from_sums(cls, sums: dict, counts: dict) -> Optional["IntentClassifier"]:
+        """A partir de {tipo: soma dos vetores} e {tipo: nº de chunks}."""
+        types = sorted(t for t in sums if counts.get(t))
+        if len(types) < 2:
+            return None
+        total = sum(counts[t] for t in types)
+        mean = sum(sums[t] for t in types) / total
+        centroids = _unit(np.stack([sums[t] / counts[t] - mean for t in types]))
+        return cls(types, centroids, mean, [counts[t] for t in types])
+
+    @classmethod
+    def build_from_collection(cls, collection, page_size: int = GET_PAGE_SIZE) -> Optional["IntentClassifier"]:
+        """Lê (em páginas) os embeddings e tipos de todos os chunks da coleção Chroma."""
+        sums, counts, offset = {}, {}, 0
+        while True:
+            page = collection.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+            ids = page.get("ids", [])
+            if not ids:
+                break
+            vecs = np.asarray(page["embeddings"], dtype=np.float64)
+            types = np.array([(m or {}).get("type", "") for m in page["metadatas"]])
+            for t in np.unique(types):
+                mask = types == t
+                sums[t] = sums.get(t, 0.0) + vecs[mask].sum(axis=0)
+                counts[t] = counts.get(t, 0) + int(mask.sum())
+            if len(ids) < page_size:
+                break
+            offset += len(ids)
+        return cls.from_sums(sums, counts)
+
+    def save(self, path: Path = INTENTS_PATH) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, types=np.array(self.types), centroids=self.centroids, mean=self.mean,
+                     counts=np.array(self.counts))
+
+    @classmethod
+    def load(cls, path: Path = INTENTS_PATH) -> Optional["IntentClassifier"]:
+        if not Path(path).exists():
+            return None
+        with np.load(path) as z:
+            return cls([str(t) for t in z["types"]], z["centroids"], z["mean"], z["counts"].tolist())
+
+    # ---------- consulta ----------
+    def scores(self, query_vec: Sequence[float]) -> List[Tuple[str, float]]:
+        """[(tipo, similaridade)] por ordem decrescente."""
+        q = _unit(np.asarray(query_vec, dtype=np.float32) - self.mean)
+        sims = self.centroids @ q
+        order = np.argsort(-sims)
+        return [(self.types[i], float(sims[i])) for i in order]
+
+    def choose(self, query_vec: Sequence[float], margin: float = INTENT_MARGIN,
+               min_sim: float = INTENT_MIN_SIM, max_types: int = INTENT_MAX_TYPES) -> List[str]:
+        """Tipos a usar como filtro (lista vazia = sem filtro)."""
+        ranked = self.scores(query_vec)
+        best_type, best = ranked[0]
+        if best < min_sim or best_type in GENERIC_TYPES:
+            return []
+        chosen = [t for t, s in ranked if best - s < margin]
+        if len(chosen) > max_types or any(t in GENERIC_TYPES for t in chosen):
+            return []
+        return chosen
@@ -0,0 +1,228 @@
+"""
+Encaminhamento entre LLMs candidatos do AI-ISEL (OpenAI / vários modelos Ollama).
+
+Construir um OllamaLLM nunca falha, por isso o "fallback" antigo do pick_llm nunca
+disparava: o primeiro erro aparecia a meio de uma resposta. Aqui:
+ - no arranque, todos os candidatos são testados em paralelo com uma geração
+   mínima (1 token), medindo a latência; o resultado fica em cache (saudável ou não);
+ - cada pedido vai para o candidato saudável mais rápido dentro do limite
+   aceitável e, em caso de erro ou timeout, passa ao seguinte;
+ - cada candidato tem um circuit breaker (fechado → aberto após N falhas seguidas
+   → meio-aberto após o período de espera, com um pedido de teste);
+ - estado e latências por candidato em stats() (para o /metrics do rag_server).
+Em streaming só se muda de modelo antes do primeiro token.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Optional, Tuple
+
+from langchain_core.runnables import Runnable
+
+from metrics import StageLatencies
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))      # segundos por pedido (cliente HTTP)
+PROBE_TIMEOUT = float(os.getenv("LLM_PROBE_TIMEOUT", "90"))
+MAX_PROBE_LATENCY = float(os.getenv("LLM_MAX_PROBE_LATENCY", "30"))  # acima disto, só como recurso
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 30.0
+PROBE_PROMPT = "Responde apenas: OK"
+
+
+class CircuitBreaker:
+    """closed → open (após `threshold` falhas seguidas) → half_open (após `cooldown`)."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = "closed"
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"  # deixa passar um pedido de teste
+                return True
+            return False
+
+    def success(self) -> None:
+        with self._lock:
+            self.state, self.failures = "closed", 0
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state, self.opened_at = "open", time.monotonic()
+
+
+class Candidate:
+    def __init__(self, name: str, llm):
+        self.name = name
+        self.llm = llm
+        self.breaker = CircuitBreaker()
+        self.healthy: Optional[bool] = None  # None = ainda não testado
+        self.probe_ms: Optional[float] = None
+        self.probe_error = ""
+
+
+def _probe_copy(llm):
+    """Cópia do LLM limitada a 1 token (OllamaLLM: num_predict; ChatOpenAI: max_tokens)."""
+    for field in ("num_predict", "max_tokens"):
+        if field in type(llm).model_fields:
+            return llm.model_copy(update={field: 1})
+    return llm
+
+
+class LLMRouter(Runnable):
+    """Runnable que encaminha cada pedido para o melhor candidato disponível (com failover)."""
+
+    def __init__(self, candidates: List[Tuple[str, Any]], max_probe_latency: float = MAX_PROBE_LATENCY):
+        self.candidates = [Candidate(name, llm) for name, llm in candidates]
+        self.max_probe_latency = max_probe_latency
+        self.stats_latency = StageLatencies()
+        self.failovers = 0
+
+    # ---------- saúde ----------
+    def _probe(self, cand: Candidate) -> None:
+        t0 = time.perf_counter()
+        try:
+            _probe_copy(cand.llm).invoke(PROBE_PROMPT)
+            cand.healthy, cand.probe_error = True, ""
+            cand.breaker.success()
+        except Exception as e:
+            cand.healthy, cand.probe_error = False, str(e)[:200]
+            cand.breaker.failure()
+        cand.probe_ms = round(1000 * (time.perf_counter() - t0), 1)
+
+    def probe_all(self, timeout: float = PROBE_TIMEOUT) -> None:
+        """Testa todos os candidatos em paralelo; quem não responder a tempo fica não saudável."""
+        pool = ThreadPoolExecutor(max_workers=max(1, len(self.candidates)), thread_name_prefix="probe")
+        futures = {pool.submit(self._probe, c): c for c in self.candidates}
+        deadline = time.monotonic() + timeout
+        for fut, cand in futures.items():
+            try:
+                fut.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception:
+                cand.healthy, cand.probe_error = False, f"sem resposta em {timeout:.0f} s"
+                cand.probe_ms = round(1000 * timeout, 1)
+        pool.shutdown(wait=False)
+
+    def ordered(self) -> List[Candidate]:
+        """Saudáveis e rápidos (por latência) → saudáveis lentos → não testados → falhados."""
+        def key(c: Candidate):
+            if c.healthy is None:
+                tier = 2
+            elif not c.healthy:
+                tier = 3
+            else:
+                tier = 0 if (c.probe_ms or 0) <= 1000 * self.max_probe_latency else 1
+            return (tier, c.breaker.state == "open", c.probe_ms or 0.0)
+        return sorted(self.candidates, key=key)
+
+    def healthy(self) -> List[Candidate]:
+        return [c for c in self.ordered() if c.healthy]
+
+    @property
+    def primary(self) -> Optional[Candidate]:
+        order = self.ordered()
+        return order[0] if order else None
+
+    @property
+    def name(self) -> str:
+        return self.primary.name if self.primary else "none"
+
+    # ---------- pedidos ----------
+    def _attempts(self) -> Iterator[Candidate]:
+        tried = 0
+        for cand in self.ordered():
+            if cand.breaker.allow():
+                if tried:
+                    self.failovers += 1
+                tried += 1
+                yield cand
+        if not tried:
+            raise RuntimeError("Nenhum LLM disponível (todos os circuitos abertos).")
+
+    def _failed(self, cand: Candidate, err: Exception) -> None:
+        cand.breaker.failure()
+        self.stats_latency.error(cand.name)
+        print(f"⚠️ LLM {cand.name} falhou ({err}); a tentar o seguinte.")
+
+    def invoke(self, input, config=None, **kwargs):
+        last = None
+        for cand in self._attempts():
+            t0 = time.perf_counter()
+            try:
+                out = cand.llm.invoke(input, config, **kwargs)
+            except Exception as e:
+                self._failed(cand, e)
+                last = e
+                continue
+            cand.breaker.success()
+            self.stats_latency.record(cand.name, time.perf_counter() - t0)
+            return out
+        raise RuntimeError(f"Todos os LLMs falharam: {last}")
+
+    def stream(self, input, config=None, **kwargs):
+        last = None
+        for cand in self._attempts():
+            t0, started = time.perf_counter(), False
+            try:
+                for chunk in cand.llm.stream(input, config, **kwargs):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self._failed(cand, e)
+                if started:  # já há tokens enviados: não se pode trocar de modelo
+                    raise
+                last = e
+                continue
+            cand.breaker.success()
+            self.stats_latency.record(cand.name, time.perf_counter() - t0)
+            return
+        raise RuntimeError(f"Todos os LLMs falharam: {last}")
+
+    async def astream(self, input, config=None, **kwargs):
+        last = None
+        for cand in self._attempts():
+            t0, started = time.perf_counter(), False
+            try:
+                async for chunk in cand.llm.astream(input, config, **kwargs):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self._failed(cand, e)
+                if started:
+                    raise
+                last = e
+                continue
+            cand.breaker.success()
+            self.stats_latency.record(cand.name, time.perf_counter() - t0)
+            return
+        raise RuntimeError(f"Todos os LLMs falharam: {last}")
+
+    # ---------- métricas ----------
+    def stats(self) -> dict:
+        latency = self.stats_latency.summary()
+        return {
+            "primary": self.name,
+            "failovers": self.failovers,
+            "candidates": [
+                {
+                    "name": c.name, "healthy": c.healthy, "probe_ms": c.probe_ms, "probe_error": c.probe_error,
+                    "breaker": c.breaker.state, "consecutive_failures": c.breaker.failures,
+                    "trips": c.breaker.trips, "latency": latency.get(c.name),
+                }
+                for c in self.ordered()
+            ],
+        }
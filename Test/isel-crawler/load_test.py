@@ -0,0 +1,355 @@
+"""
+Teste de carga do caminho RAG do AI-ISEL: quantas perguntas em simultâneo o
+assistente aguenta antes de a latência disparar.
+
+Repete um conjunto de perguntas (com repetições realistas: poucas perguntas
+muito frequentes e uma cauda longa, distribuição de Zipf) pelo mesmo caminho do
+rag_server: planos de estudo → embedding → cache de respostas → retrieve →
+build_context → answer. Dois modos de carga, cada um com vários níveis:
+ - fechado (--concurrency 1,2,4,8): N clientes, cada um faz a pergunta seguinte
+   quando recebe a resposta → throughput máximo a cada nível de concorrência;
+ - aberto (--rate 1,2,4): chegadas de Poisson a R perguntas/s, independentes das
+   respostas → a latência inclui a espera em fila ("wait") quando o sistema não
+   acompanha, que é o que um estudante sente.
+Por nível reporta p50/p95/p99 por etapa, throughput, taxa de erro e de onde veio
+cada resposta (planos, cache, LLM); a capacidade é o maior nível que cumpre
+--slo-p95 (segundos, total) e --max-error-rate.
+
+Backends: "stub" (coleção em memória do rag_server + BM25, sem índices locais)
+ou "real" (índices locais do build_chroma_index, como o rag_query). LLM: "fake"
+(fake_ollama.py, com latências e --num-parallel gerações simultâneas, como
+OLLAMA_NUM_PARALLEL), "stub" (resposta fixa imediata), "real" (pick_llm) ou
+"none" (só recuperação).
+
+Uso:
+    python load_test.py --concurrency 1,2,4,8,16 --requests 100
+    python load_test.py --rate 0.5,1,2,4 --requests 120 --num-parallel 2 --slo-p95 6
+    python load_test.py --backend real --llm real --concurrency 1,2,4 --answer-cache
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import rag_query
+from bench_streaming import QUESTIONS
+from metrics import latency_summary
+
+STAGES = ["wait", "structured", "embed", "cache", "retrieve", "context", "answer", "total"]
+
+
+# ---------- perguntas ----------
+def load_questions(path: Optional[str]) -> List[str]:
+    """Perguntas de um .txt (uma por linha), .json (lista) ou .jsonl ({"question": ...});
+    sem ficheiro, as do bench_streaming."""
+    if not path:
+        return list(QUESTIONS)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            items = [json.loads(line) for line in f if line.strip()]
+        elif path.endswith(".json"):
+            items = json.load(f)
+        else:
+            items = [line for line in f]
+    out = [(q.get("question", "") if isinstance(q, dict) else str(q)).strip() for q in items]
+    return [q for q in out if q]
+
+
+def zipf_sample(questions: List[str], n: int, s: float, rng: random.Random) -> List[str]:
+    """n perguntas com frequência ∝ 1/rank^s (s=0 → uniforme); a ordem das mais
+    frequentes é baralhada com a seed, para não favorecer o início da lista."""
+    ranked = questions[:]
+    rng.shuffle(ranked)
+    weights = [1.0 / (i + 1) ** s for i in range(len(ranked))]
+    return rng.choices(ranked, weights=weights, k=n)
+
+
+# ---------- backends ----------
+class Backends:
+    """Tudo o que um pedido usa (partilhado entre threads, como no rag_server)."""
+
+    def __init__(self, db, llm, meta_index=None, bm25=None, intents=None, reranker=None, planos=None,
+                 answer_cache=None, count_tokens=None, llm_name: str = ""):
+        self.db = db
+        self.llm = llm
+        self.meta_index = meta_index
+        self.bm25 = bm25
+        self.intents = intents
+        self.reranker = reranker
+        self.planos = planos
+        self.answer_cache = answer_cache
+        self.count_tokens = count_tokens or rag_query.estimate_tokens
+        self.llm_name = llm_name
+
+
+def load_backends(args):
+    """(Backends, servidor Ollama falso ou None)."""
+    from langchain_ollama import OllamaLLM
+    from answer_cache import AnswerCache
+    from context_packer import active_token_counter
+    from rag_server import load_stub_backends, stub_bm25_index
+
+    if args.backend == "real":
+        from reranker import load_reranker
+        db = rag_query.load_db()
+        parts = dict(meta_index=rag_query.load_metadata_index(), bm25=rag_query.load_bm25_index(),
+                     intents=rag_query.load_intent_classifier(),
+                     reranker=load_reranker() if rag_query.RERANK else None,
+                     planos=rag_query.load_planos_store())
+        stub_llm = None
+    else:
+        db, _, stub_llm, _ = load_stub_backends(args.pages)
+        parts = dict(bm25=stub_bm25_index(db))
+
+    server, llm, llm_name = None, None, "none"
+    if args.llm == "fake":
+        from fake_ollama import start_fake_ollama
+        server, url = start_fake_ollama(first_token_latency=args.first_token_latency,
+                                        token_latency=args.token_latency,
+                                        prompt_token_cost=args.prompt_token_cost, num_parallel=args.num_parallel)
+        llm, llm_name = OllamaLLM(model="fake", base_url=url), "fake"
+    elif args.llm == "stub":
+        if stub_llm is None:
+            from langchain_core.language_models import FakeStreamingListLLM
+            from rag_server import STUB_ANSWER
+            stub_llm = FakeStreamingListLLM(responses=[STUB_ANSWER])
+        llm, llm_name = stub_llm, "stub"
+    elif args.llm == "real":
+        llm, llm_name = rag_query.pick_llm()
+        if llm is None:
+            raise SystemExit("❌ Não foi possível inicializar nenhum LLM (Ollama/OpenAI).")
+
+    cache = AnswerCache(db.embeddings, rag_query.CHROMA_PATH) if args.answer_cache else None
+    backends = Backends(db, llm, answer_cache=cache, llm_name=llm_name,
+                        count_tokens=active_token_counter(llm, llm_name) if args.llm == "real" else None, **parts)
+    return backends, server
+
+
+# ---------- um pedido ----------
+def run_request(b: Backends, question: str, arrival: float) -> Dict:
+    """Percorre o caminho do /answer do rag_server e devolve os tempos (s) por etapa,
+    a origem da resposta e, se falhar, a etapa do erro."""
+    rec = {"source": "", "error": None}
+    start = time.perf_counter()
+    rec["wait"] = start - arrival
+    stage = "structured"
+    try:
+        t = time.perf_counter()
+        structured = rag_query.structured_answer(question, b.planos)
+        rec["structured"] = time.perf_counter() - t
+        if structured is not None:
+            rec["source"] = "planos"
+            return rec
+
+        stage = "embed"
+        t = time.perf_counter()
+        query_vec = b.db.embeddings.embed_query(question)
+        rec["embed"] = time.perf_counter() - t
+        scope = ""
+        if b.answer_cache is not None:
+            stage = "cache"
+            t = time.perf_counter()
+            scope = rag_query.cache_scope(question, b.meta_index, b.intents, query_vec)
+            hit = b.answer_cache.lookup(question, scope, query_vec)
+            rec["cache"] = time.perf_counter() - t
+            if hit:
+                rec["source"] = "cache"
+                return rec
+
+        stage = "retrieve"
+        t = time.perf_counter()
+        docs = rag_query.retrieve_ranked(b.db, question, b.meta_index, b.bm25, b.reranker,
+                                         intents=b.intents, query_vec=query_vec)
+        rec["retrieve"] = time.perf_counter() - t
+
+        stage = "context"
+        t = time.perf_counter()
+        pack = rag_query.build_context(docs, question, b.count_tokens)
+        rec["context"] = time.perf_counter() - t
+        if not pack["context"]:
+            rec["source"] = "sem_contexto"
+            return rec
+        if b.llm is None:
+            rec["source"] = "so_recuperacao"
+            return rec
+
+        stage = "answer"
+        t = time.perf_counter()
+        text = rag_query.answer(b.llm, question, pack["context"])
+        rec["answer"] = time.perf_counter() - t
+        rec["source"] = "llm"
+        if b.answer_cache is not None:
+            b.answer_cache.store(question, text, pack["sources"], scope, query_vec)
+    except Exception as e:
+        rec["error"] = f"{stage}: {type(e).__name__}: {e}"
+    finally:
+        rec["total"] = time.perf_counter() - arrival
+    return rec
+
+
+# ---------- modos de carga ----------
+def run_closed(b: Backends, questions: List[str], concurrency: int) -> List[Dict]:
+    """N clientes em ciclo fechado: cada um envia a pergunta seguinte quando recebe a resposta."""
+    lock = threading.Lock()
+    pending = iter(questions)
+    out: List[Dict] = []
+
+    def client() -> None:
+        while True:
+            with lock:
+                q = next(pending, None)
+            if q is None:
+                return
+            rec = run_request(b, q, time.perf_counter())
+            with lock:
+                out.append(rec)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    return out
+
+
+def run_open(b: Backends, questions: List[str], rate: float, max_workers: int, rng: random.Random) -> List[Dict]:
+    """Chegadas de Poisson a `rate` perguntas/s; a latência conta a partir da chegada,
+    por isso inclui a espera por uma thread livre quando o sistema fica para trás."""
+    start = time.perf_counter()
+    arrival = start
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for q in questions:
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(run_request, b, q, arrival))
+            arrival += rng.expovariate(rate)
+        return [f.result() for f in futures]
+
+
+def summarize(records: List[Dict], elapsed: float) -> Dict:
+    ok = [r for r in records if r["error"] is None]
+    errors: Dict[str, int] = {}
+    for r in records:
+        if r["error"]:
+            stage = r["error"].split(":", 1)[0]
+            errors[stage] = errors.get(stage, 0) + 1
+    sources: Dict[str, int] = {}
+    for r in ok:
+        sources[r["source"]] = sources.get(r["source"], 0) + 1
+    return {
+        "requests": len(records),
+        "completed": len(ok),
+        "errors": errors,
+        "error_rate": round(1 - len(ok) / len(records), 4) if records else 0.0,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_qps": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        "sources": sources,
+        "stages": {s: latency_summary(r[s] for r in ok if s in r) for s in STAGES},
+        "sample_errors": [r["error"] for r in records if r["error"]][:5],
+    }
+
+
+def parse_levels(value: Optional[str], cast) -> List:
+    return [cast(v) for v in value.split(",") if v.strip()] if value else []
+
+
+def main():
+    p = argparse.ArgumentParser(description="Teste de carga do caminho RAG do AI-ISEL (retrieve/context/answer)")
+    p.add_argument("--concurrency", default=None, help="Níveis de concorrência (ciclo fechado), p.ex. 1,2,4,8")
+    p.add_argument("--rate", default=None, help="Níveis de chegadas/s (ciclo aberto, Poisson), p.ex. 0.5,1,2")
+    p.add_argument("--requests", type=int, default=60, help="Perguntas por nível")
+    p.add_argument("--warmup", type=int, default=3, help="Perguntas sequenciais antes de medir (não contam)")
+    p.add_argument("--max-workers", type=int, default=64, help="Threads no ciclo aberto (pedidos em curso)")
+    p.add_argument("--questions", default=None, help="Ficheiro de perguntas (.txt/.json/.jsonl)")
+    p.add_argument("--zipf", type=float, default=1.1, help="Expoente de Zipf das repetições (0 = uniforme)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--backend", choices=["stub", "real"], default="stub", help="Recuperação: stub ou índices locais")
+    p.add_argument("--pages", default="pages_content.jsonl", help="Páginas para a coleção stub")
+    p.add_argument("--llm", choices=["fake", "stub", "real", "none"], default="fake")
+    p.add_argument("--answer-cache", action="store_true", help="Usar a cache de respostas (limpa a cada nível)")
+    p.add_argument("--first-token-latency", type=float, default=0.8, help="LLM falso: latência até ao 1.º token (s)")
+    p.add_argument("--token-latency", type=float, default=0.02, help="LLM falso: latência entre tokens (s)")
+    p.add_argument("--prompt-token-cost", type=float, default=0.0, help="LLM falso: custo por token de prompt (s)")
+    p.add_argument("--num-parallel", type=int, default=1, help="LLM falso: gerações em simultâneo (0 = sem limite)")
+    p.add_argument("--slo-p95", type=float, default=5.0, help="Objetivo: p95 da latência total (s)")
+    p.add_argument("--max-error-rate", type=float, default=0.01, help="Objetivo: taxa de erro máxima")
+    p.add_argument("--out", default=None, help="Guardar resultados em JSON")
+    args = p.parse_args()
+
+    levels = [("concurrency", c) for c in parse_levels(args.concurrency, int)]
+    levels += [("rate", r) for r in parse_levels(args.rate, float)]
+    if not levels:
+        levels = [("concurrency", c) for c in (1, 2, 4, 8)]
+
+    questions = load_questions(args.questions)
+    rng = random.Random(args.seed)
+    print(f"🔍 A carregar backends ({args.backend}, LLM {args.llm})...")
+    backends, server = load_backends(args)
+    for q in questions[:args.warmup]:
+        run_request(backends, q, time.perf_counter())
+    print(f"✅ {len(questions)} perguntas distintas, {args.requests} por nível (Zipf s={args.zipf})\n")
+
+    steps = []
+    try:
+        for mode, level in levels:
+            sample = zipf_sample(questions, args.requests, args.zipf, rng)
+            if backends.answer_cache is not None:
+                backends.answer_cache.clear()
+            t0 = time.perf_counter()
+            if mode == "concurrency":
+                records = run_closed(backends, sample, level)
+            else:
+                records = run_open(backends, sample, level, args.max_workers, rng)
+            step = {"mode": mode, "level": level, **summarize(records, time.perf_counter() - t0)}
+            total = step["stages"]["total"]
+            step["meets_slo"] = (step["completed"] > 0 and total["p95_ms"] <= 1000 * args.slo_p95
+                                 and step["error_rate"] <= args.max_error_rate)
+            steps.append(step)
+            print(f"{'⚙️' if mode == 'concurrency' else '📈'} {mode}={level:g}: {step['throughput_qps']:.2f} q/s, "
+                  f"total p95 {total['p95_ms'] / 1000:.2f} s, erros {100 * step['error_rate']:.1f}%"
+                  f"{'' if step['meets_slo'] else ' ❌ SLO'}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    print(f"\n{'nível':<16} {'q/s':>7} {'erros':>7} {'espera p95':>11} {'retrieve p95':>13} {'answer p95':>11} "
+          f"{'total p50':>10} {'total p95':>10} {'total p99':>10}  origem")
+    for s in steps:
+        st = s["stages"]
+        label = f"{'conc' if s['mode'] == 'concurrency' else 'taxa'}={s['level']:g}"
+        sources = ", ".join(f"{k} {v}" for k, v in sorted(s["sources"].items()))
+        print(f"{label:<16} {s['throughput_qps']:>7.2f} {100 * s['error_rate']:>6.1f}% "
+              f"{st['wait']['p95_ms']:>9.0f}ms {st['retrieve']['p95_ms']:>11.0f}ms {st['answer']['p95_ms']:>9.0f}ms "
+              f"{st['total']['p50_ms']:>8.0f}ms {st['total']['p95_ms']:>8.0f}ms {st['total']['p99_ms']:>8.0f}ms"
+              f"  {sources}{'' if s['meets_slo'] else '  ❌'}")
+        for err in s["sample_errors"][:2]:
+            print(f"   ⚠️ {err}")
+
+    capacity = {}
+    for mode in ("concurrency", "rate"):
+        ok = [s["level"] for s in steps if s["mode"] == mode and s["meets_slo"]]
+        best = max((s for s in steps if s["mode"] == mode and s["meets_slo"]),
+                   key=lambda s: s["throughput_qps"], default=None)
+        if any(s["mode"] == mode for s in steps):
+            capacity[mode] = {"max_level": max(ok) if ok else None,
+                              "max_throughput_qps": best["throughput_qps"] if best else None}
+    print(f"\n🎯 SLO: p95 total ≤ {args.slo_p95:g} s e erros ≤ {100 * args.max_error_rate:g}%")
+    for mode, c in capacity.items():
+        if c["max_level"] is None:
+            print(f"   {mode}: nenhum nível cumpre o SLO")
+        else:
+            print(f"   {mode}: até {c['max_level']:g} (melhor throughput {c['max_throughput_qps']:.2f} q/s)")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"params": vars(args), "llm": backends.llm_name, "steps": steps, "capacity": capacity},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n📝 Resultados guardados em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
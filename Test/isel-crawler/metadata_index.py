@@ -0,0 +1,178 @@
+"""
+Camada de metadados filtráveis para o índice vetorial (AI-ISEL).
+
+O Chroma só aceita metadados escalares, por isso as listas (keywords/tags) são
+"explodidas" em campos booleanos `tag_<slug>: True`, que se podem usar em filtros
+`where`. Em paralelo é gravado um índice invertido (metadata_index.json) de
+tipo/curso/grau/tag → IDs de chunks, que permite, no momento da pergunta:
+ - reconhecer o curso (nome, alias ou sigla, ex. LEIC), o grau e tags na pergunta;
+ - saber quantos candidatos cada filtro deixa, e relaxá-lo se ficar vazio,
+sem nenhuma consulta vetorial.
+Os chunks também ficam indexados por URL, para os filtros por secção do site
+(lista de URLs de uma subárvore do site_tree.py).
+"""
+
+import re
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from prepare_rag_documents import fold_accents
+
+INDEX_PATH = Path("metadata_index.json")
+TAG_PREFIX = "tag_"
+INDEXED_FIELDS = ("type", "curso_nome", "degree_level", "tag", "url")
+
+# tags demasiado genéricas para servirem de filtro a partir da pergunta
+GENERIC_TAGS = {"curso", "plano", "tabelas", "ano_semestre", "outro"}
+ACRONYM_STOPWORDS = {"em", "e", "de", "da", "do", "das", "dos", "a", "o", "na", "no"}
+
+DEGREE_HINTS = {
+    "licenciatura": ("licenciatura", "licenciaturas", "1.º ciclo", "1º ciclo"),
+    "mestrado": ("mestrado", "mestrados", "2.º ciclo", "2º ciclo"),
+    "posgraduacao": ("pos-graduacao", "pos-graduacoes", "pos graduacao", "especializacao"),
+}
+
+
+def slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", fold_accents(str(value))).strip("_")
+
+
+def acronym(name: str) -> str:
+    """Sigla a partir do nome do curso (Licenciatura em Engenharia Informática e de Computadores → LEIC)."""
+    words = re.findall(r"[^\W\d_]+", name or "")
+    return "".join(w[0] for w in words if w.lower() not in ACRONYM_STOPWORDS).upper()
+
+
+def tag_fields(tags: Iterable[str]) -> Dict[str, bool]:
+    """Campos booleanos filtráveis para uma lista de tags."""
+    return {f"{TAG_PREFIX}{slug(t)}": True for t in tags if slug(t)}
+
+
+def contains_term(folded_query: str, term: str) -> bool:
+    return bool(term) and re.search(rf"(?<![a-z0-9]){re.escape(term)}(?![a-z0-9])", folded_query) is not None
+
+
+def combine_where(conditions: List[dict]) -> Optional[dict]:
+    """Junta condições Chroma (`$and` só quando há mais de uma)."""
+    conditions = [c for c in conditions if c]
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+class MetadataIndex:
+    """Índice invertido campo → valor → IDs de chunks, mais aliases por curso."""
+
+    def __init__(self, postings: Dict[str, Dict[str, List[str]]] = None, aliases: Dict[str, List[str]] = None):
+        self.postings = {f: {v: set(ids) for v, ids in (postings or {}).get(f, {}).items()} for f in INDEXED_FIELDS}
+        self.aliases = aliases or {}
+        self._curso_terms = self._build_curso_terms()
+
+    # ---------- construção ----------
+    @classmethod
+    def build(cls, chunks: Dict[str, "object"], item_lists: Dict[str, dict]) -> "MetadataIndex":
+        """chunks: {chunk_id: Document}; item_lists: {url: {"keywords": [...], "aliases": [...]}}."""
+        postings = {f: {} for f in INDEXED_FIELDS}
+        aliases: Dict[str, Set[str]] = {}
+        for cid, doc in chunks.items():
+            meta = doc.metadata
+            for field in ("type", "curso_nome", "degree_level", "url"):
+                value = meta.get(field)
+                if value:
+                    postings[field].setdefault(value, []).append(cid)
+            lists = item_lists.get(meta.get("url", ""), {})
+            for tag in lists.get("keywords", []):
+                postings["tag"].setdefault(slug(tag), []).append(cid)
+            curso = meta.get("curso_nome")
+            if curso:
+                aliases.setdefault(curso, set()).update(lists.get("aliases", []))
+        return cls(postings, {k: sorted(v) for k, v in aliases.items()})
+
+    def save(self, path: Path = INDEX_PATH) -> None:
+        payload = {
+            "postings": {f: {v: sorted(ids) for v, ids in vals.items()} for f, vals in self.postings.items()},
+            "aliases": self.aliases,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path = INDEX_PATH) -> Optional["MetadataIndex"]:
+        if not Path(path).exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        return cls(payload.get("postings"), payload.get("aliases"))
+
+    # ---------- consulta ----------
+    def _build_curso_terms(self) -> Dict[str, Set[str]]:
+        terms = {}
+        for curso in self.postings["curso_nome"]:
+            names = {curso, *self.aliases.get(curso, [])}
+            t = {fold_accents(n) for n in names if len(n) > 3}
+            t.update(fold_accents(acronym(n)) for n in names if len(acronym(n)) >= 3)
+            terms[curso] = t
+        return terms
+
+    def candidates(self, conds: Dict[str, object]) -> Optional[Set[str]]:
+        """IDs que satisfazem todas as condições (None se não houver condições).
+        Várias tags combinam-se com E; uma lista de tipos é um "$in" (OU)."""
+        result = None
+        for field, value in conds.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            postings = self.postings.get(field, {})
+            if field == "tag":
+                groups = [postings.get(v, set()) for v in values]
+            else:
+                groups = [set().union(*(postings.get(v, set()) for v in values))]
+            for ids in groups:
+                result = set(ids) if result is None else result & ids
+        return result
+
+    def match_query(self, query: str) -> Dict[str, object]:
+        """Condições (curso_nome, degree_level, tag) reconhecidas na pergunta."""
+        q = fold_accents(query)
+        conds: Dict[str, object] = {}
+
+        # curso: o termo mais longo que aparece na pergunta (nome completo > sigla)
+        best, best_len = None, 0
+        for curso, terms in self._curso_terms.items():
+            for term in terms:
+                if len(term) > best_len and contains_term(q, term):
+                    best, best_len = curso, len(term)
+        if best:
+            conds["curso_nome"] = best
+
+        for level, hints in DEGREE_HINTS.items():
+            if level in self.postings["degree_level"] and any(contains_term(q, fold_accents(h)) for h in hints):
+                conds["degree_level"] = level
+                break
+
+        skip = GENERIC_TAGS | set(self.postings["type"]) | set(self.postings["degree_level"])
+        tags = [t for t in self.postings["tag"] if t not in skip and contains_term(q, t.replace("_", " "))]
+        if tags:
+            conds["tag"] = sorted(tags)
+        return conds
+
+    def relax(self, conds: Dict[str, object]) -> Dict[str, object]:
+        """Retira condições (tags → tipo → curso → grau → secção) até haver candidatos."""
+        conds = dict(conds)
+        for field in ("tag", "type", "curso_nome", "degree_level", "url"):
+            found = self.candidates(conds)
+            if found is None or found:
+                break
+            conds.pop(field, None)
+        return conds
+
+    @staticmethod
+    def to_where(conds: Dict[str, object]) -> Optional[dict]:
+        parts = []
+        for field, value in conds.items():
+            if field == "tag":
+                parts.extend({f"{TAG_PREFIX}{t}": True} for t in value)
+            elif isinstance(value, (list, tuple)):
+                parts.append({field: {"$in": list(value)}})
+            else:
+                parts.append({field: value})
+        return combine_where(parts)
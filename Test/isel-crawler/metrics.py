@@ -0,0 +1,309 @@
+"""
+Utilitários de métricas (latências e percentis) partilhados pelos scripts AI-ISEL.
+
+Inclui também a instrumentação dos caminhos quentes (crawl, extração, PDFs,
+indexação, retrieve/answer): um registo global de contadores e histogramas,
+com timer() (context manager), timed() (decorador), inc() e observe().
+No fim de cada execução, instrumented_run() imprime a tabela de resumo ou
+exporta em texto Prometheus, e pode ligar um profiler:
+ - METRICS=0                     → instrumentação desligada (timers sem custo)
+ - METRICS_REPORT=table|prom|off|<ficheiro.prom>  (por omissão: table)
+ - PROFILE=cprofile|sample       → cProfile (.prof, ver com snakeviz/pstats) ou
+                                   amostragem de pilhas a cada PROFILE_INTERVAL s
+ - PROFILE_OUT=<ficheiro>        (por omissão: <nome do script>.prof / .sample.txt)
+"""
+
+import os
+import sys
+import math
+import time
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil p (0-100) com interpolação linear; 0.0 se não houver valores."""
+    if not values:
+        return 0.0
+    xs = sorted(values)
+    if len(xs) == 1:
+        return xs[0]
+    rank = (p / 100.0) * (len(xs) - 1)
+    lo, hi = math.floor(rank), math.ceil(rank)
+    return xs[lo] + (xs[hi] - xs[lo]) * (rank - lo)
+
+
+def latency_summary(values: Iterable[float]) -> Dict[str, float]:
+    """Resumo de latências (segundos → ms): count, média, p50, p95, p99 e máximo."""
+    xs = list(values)
+    if not xs:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": len(xs),
+        "mean_ms": round(1000 * sum(xs) / len(xs), 2),
+        "p50_ms": round(1000 * percentile(xs, 50), 2),
+        "p95_ms": round(1000 * percentile(xs, 95), 2),
+        "p99_ms": round(1000 * percentile(xs, 99), 2),
+        "max_ms": round(1000 * max(xs), 2),
+    }
+
+
+class StageLatencies:
+    """Latências recentes por etapa (retrieve, build_context, answer, ...), thread-safe."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages: Dict[str, deque] = {}
+        self._errors: Dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._stages.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+
+    def error(self, stage: str) -> None:
+        with self._lock:
+            self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    @contextmanager
+    def time(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.error(stage)
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - t0)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            stages = {k: list(v) for k, v in self._stages.items()}
+            errors = dict(self._errors)
+        return {k: {**latency_summary(v), "errors": errors.get(k, 0)} for k, v in stages.items()}
+
+
+# ---------- instrumentação ----------
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Registry:
+    """Contadores e histogramas por nome, thread-safe. Os timers são histogramas em segundos
+    (com contagem, soma, máximo, baldes cumulativos e uma janela recente para os percentis)."""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS, window: int = 10000, enabled: bool = True):
+        self.buckets = tuple(buckets)
+        self.window = window
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._hists: Dict[str, dict] = {}
+
+    def inc(self, name: str, n: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self._hists.get(name)
+            if h is None:
+                h = self._hists[name] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(self.buckets),
+                                         "recent": deque(maxlen=self.window)}
+            h["count"] += 1
+            h["sum"] += value
+            h["max"] = max(h["max"], value)
+            h["recent"].append(value)
+            for i, le in enumerate(self.buckets):
+                if value <= le:
+                    h["buckets"][i] += 1
+
+    @contextmanager
+    def timer(self, name: str):
+        """Mede o bloco em `name`; as exceções contam em `name.errors` e seguem."""
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(name + ".errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def timed(self, name: Optional[str] = None):
+        """Decorador: mede cada chamada da função (por omissão com o nome módulo.função)."""
+        def decorate(fn):
+            label = name or f"{fn.__module__}.{fn.__name__}"
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._hists.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """{"counters": {...}, "timers": {nome: latency_summary + total_s}} (cópia)."""
+        with self._lock:
+            counters = dict(self._counters)
+            hists = {k: (h["count"], h["sum"], list(h["recent"])) for k, h in self._hists.items()}
+        timers = {}
+        for name, (count, total, recent) in hists.items():
+            timers[name] = {**latency_summary(recent), "count": count, "total_s": round(total, 3)}
+        return {"counters": counters, "timers": timers}
+
+    def summary_table(self) -> str:
+        snap = self.snapshot()
+        if not snap["timers"] and not snap["counters"]:
+            return ""
+        lines = [f"{'etapa':<28} {'n':>8} {'total':>10} {'média':>10} {'p50':>10} {'p95':>10} {'máx':>10}"]
+        for name, t in sorted(snap["timers"].items(), key=lambda kv: -kv[1]["total_s"]):
+            lines.append(f"{name:<28} {t['count']:>8} {t['total_s']:>9.2f}s {t['mean_ms']:>8.1f}ms "
+                         f"{t['p50_ms']:>8.1f}ms {t['p95_ms']:>8.1f}ms {t['max_ms']:>8.1f}ms")
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"{name:<28} {value:>8g}")
+        return "\n".join(lines)
+
+    def prometheus_text(self, prefix: str = "aiisel_") -> str:
+        """Exportação no formato de texto do Prometheus (contadores e histogramas em segundos)."""
+        def metric(name: str) -> str:
+            return prefix + "".join(c if c.isalnum() else "_" for c in name)
+
+        with self._lock:
+            counters = dict(self._counters)
+            hists = {k: (h["count"], h["sum"], list(h["buckets"])) for k, h in self._hists.items()}
+        out = []
+        for name, value in sorted(counters.items()):
+            m = metric(name) + "_total"
+            out += [f"# TYPE {m} counter", f"{m} {value:g}"]
+        for name, (count, total, buckets) in sorted(hists.items()):
+            m = metric(name) + "_seconds"
+            out.append(f"# TYPE {m} histogram")
+            out += [f'{m}_bucket{{le="{le:g}"}} {n}' for le, n in zip(self.buckets, buckets)]
+            out += [f'{m}_bucket{{le="+Inf"}} {count}', f"{m}_sum {total:.6f}", f"{m}_count {count}"]
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry(enabled=os.getenv("METRICS", "1") != "0")
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+
+
+class SamplingProfiler:
+    """Profiler por amostragem: uma thread lê a pilha da thread alvo a cada `interval` s
+    e conta as funções (própria = topo da pilha, inclusiva = em qualquer nível).
+    Custo quase fixo, ao contrário do cProfile, que pesa em código com muitas chamadas."""
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = 0
+        self.own: Counter = Counter()
+        self.inclusive: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.own[self._label(frame)] += 1
+            seen = set()
+            while frame is not None:
+                label = self._label(frame)
+                if label not in seen:
+                    seen.add(label)
+                    self.inclusive[label] += 1
+                frame = frame.f_back
+
+    @staticmethod
+    def _label(frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def report(self, top: int = 30) -> str:
+        n = max(self.samples, 1)
+        lines = [f"{self.samples} amostras a cada {1000 * self.interval:g} ms",
+                 f"{'própria':>8} {'inclusiva':>10}  função"]
+        for label, own in self.own.most_common(top):
+            lines.append(f"{100 * own / n:>7.1f}% {100 * self.inclusive[label] / n:>9.1f}%  {label}")
+        lines += ["", "mais inclusivas:"]
+        for label, inc_n in self.inclusive.most_common(top):
+            lines.append(f"{100 * inc_n / n:>7.1f}%  {label}")
+        return "\n".join(lines)
+
+
+def write_report(name: str, report: str = None, registry: Registry = REGISTRY) -> None:
+    """Imprime a tabela de resumo ou exporta em Prometheus, conforme METRICS_REPORT."""
+    report = (report if report is not None else os.getenv("METRICS_REPORT", "table")).strip()
+    if not registry.enabled or report in ("", "off", "0"):
+        return
+    if report == "table":
+        table = registry.summary_table()
+        if table:
+            print(f"\n⏱️ Instrumentação ({name}):\n{table}")
+    elif report == "prom":
+        print(registry.prometheus_text(), end="")
+    else:
+        with open(report, "w", encoding="utf-8") as f:
+            f.write(registry.prometheus_text())
+        print(f"\n⏱️ Métricas ({name}) exportadas para {report}")
+
+
+@contextmanager
+def instrumented_run(name: str, profile: str = None):
+    """Envolve o main() de um script (também serve de decorador): perfil opcional
+    (PROFILE=cprofile|sample) e relatório das métricas no fim, mesmo com erro."""
+    profile = (profile if profile is not None else os.getenv("PROFILE", "")).strip().lower()
+    out = os.getenv("PROFILE_OUT", "")
+    profiler = sampler = None
+    if profile == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif profile == "sample":
+        sampler = SamplingProfiler(float(os.getenv("PROFILE_INTERVAL", "0.005"))).start()
+    try:
+        with REGISTRY.timer(f"{name}.total"):
+            yield REGISTRY
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            out = out or f"{name}.prof"
+            profiler.dump_stats(out)
+            import pstats
+            print(f"\n🔬 cProfile guardado em {out} (10 funções com mais tempo acumulado):")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(10)
+        if sampler is not None:
+            sampler.stop()
+            out = out or f"{name}.sample.txt"
+            with open(out, "w", encoding="utf-8") as f:
+                f.write(sampler.report(100) + "\n")
+            print(f"\n🔬 Perfil por amostragem guardado em {out}:\n" + "\n".join(sampler.report(10).splitlines()[:13]))
+        write_report(name)
@@ -1,6 +1,8 @@
 """
 Normaliza e unifica os ficheiros num dataset coerente (dataset_isel_completo.json),
 criando também tags e aliases de pesquisa para melhorar a recuperação no RAG.
+Cada página recebe a sua secção do site (nó mais profundo da árvore do site em
+site_tree.py), usada nos filtros por secção do retriever.
 """
 
 import json, csv, argparse
@@ -8,6 +10,8 @@ from pathlib import Path
 from urllib.parse import urlparse
 from datetime import datetime
 
+from site_tree import SiteTree
+
 def load_json(p):
     try:
         with open(p, "r", encoding="utf-8") as f: return json.load(f)
@@ -219,14 +223,17 @@ def main():
             links = [{"text":"","url":normalize_url(l)} for l in out_links]
             dataset[page_norm]["links"] = clean_and_enrich_links(dataset[page_norm].get("links",[]) + links)
 
-    # 6) limpeza e criação de tags/aliases
+    # 6) limpeza e criação de tags/aliases (+ secção da árvore do site)
     print("\n🧹 A normalizar e etiquetar...")
+    tree = SiteTree.load_or_build()
+    if tree is None: print("⚠️ Árvore do site não encontrada: páginas sem secção.")
     for url, data in dataset.items():
         if "links" in data:
             data["links"] = clean_and_enrich_links(data["links"])
         tags, aliases = build_aliases_and_tags(data)
         if tags: data["tags"]=tags
         if aliases: data["search_aliases"]=aliases
+        if tree is not None: data["section"] = tree.section_of(url)
 
     with open(out_json,"w",encoding="utf-8") as f:
         json.dump(dataset,f,ensure_ascii=False,indent=2)
@@ -238,7 +245,7 @@ def main():
         print("🧾 A gerar CSV...")
         with open(out_csv,"w",newline="",encoding="utf-8") as f:
             w=csv.writer(f)
-            w.writerow(["URL","Tipo","Título","Curso Nome","Plano de Estudos","Idioma","Links","FUCs","Tags"])
+            w.writerow(["URL","Tipo","Título","Curso Nome","Plano de Estudos","Idioma","Links","FUCs","Tags","Secção"])
             for url, data in dataset.items():
                 w.writerow([
                     url,
@@ -249,7 +256,8 @@ def main():
                     data.get("lang",""),
                     len(data.get("links",[])),
                     len(data.get("fucs",[])) if "fucs" in data else 0,
-                    "|".join(data.get("tags",[]))
+                    "|".join(data.get("tags",[])),
+                    data.get("section","")
                 ])
         print(f"✅ CSV exportado para: {out_csv.resolve()}")
 
@@ -0,0 +1,339 @@
+"""
+Orquestrador do pipeline de dados do AI-ISEL.
+
+Os scripts (run.py → extract_content_from_json.py → extract_hyperlinks.py →
+generate_planos_list.py → extract_planos_estudo.py → normalize_data.py →
+prepare_rag_documents.py → build_chroma_index.py) são etapas de um DAG com
+entradas e saídas declaradas (ficheiros nesta pasta):
+ - as dependências entre etapas saem das entradas/saídas (quem produz o quê);
+ - cada etapa tem uma chave = hash do conteúdo das entradas + do código + dos
+   argumentos; se a chave for a da última execução bem-sucedida e as saídas
+   existirem, a etapa é saltada (por isso, se um crawl novo der o mesmo links.json,
+   nada a jusante corre);
+ - etapas independentes correm em paralelo (--jobs);
+ - o estado fica em pipeline_state.json, o log de cada etapa em pipeline_logs/ e
+   os tempos de cada execução (por etapa) são acrescentados a pipeline_runs.jsonl.
+As etapas "externas" (que leem o site) correm sempre, exceto com --offline.
+
+Uso:
+    python pipeline.py                       # refresh completo (só o necessário)
+    python pipeline.py --dry-run             # mostrar o que correria
+    python pipeline.py --until prepare       # só até esta etapa (e as de que depende)
+    python pipeline.py --force normalize     # forçar etapas (e o que delas depende)
+    python pipeline.py --offline --jobs 4
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent
+STATE_PATH = BASE_DIR / "pipeline_state.json"
+RUNS_PATH = BASE_DIR / "pipeline_runs.jsonl"
+LOG_DIR = BASE_DIR / "pipeline_logs"
+ROOT_URL = os.getenv("ISEL_ROOT_URL", "https://www.isel.pt")
+SITE_TREE_CSV = os.getenv("SITE_TREE_CSV", "../../data/isel_site_tree.csv")
+HASH_BLOCK = 1 << 20
+
+
+@dataclass
+class Stage:
+    name: str
+    script: str
+    args: List[str] = field(default_factory=list)
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    code: List[str] = field(default_factory=list)  # módulos locais que a etapa importa
+    external: bool = False                          # lê o site: corre sempre (exceto --offline)
+
+    def command(self) -> List[str]:
+        return [sys.executable, self.script, *self.args]
+
+
+STAGES = [
+    Stage("crawl", "run.py", [ROOT_URL, "--same-domain", "--out", "links.json"],
+          outputs=["links.json"], code=["crawler.py", "site_tree.py"], external=True),
+    Stage("tokenizers", "context_packer.py", ["--fetch-tokenizers", "--out", "tokenizers"],
+          outputs=["tokenizers"]),
+    Stage("site_tree", "site_tree.py", ["--build", "--csv", SITE_TREE_CSV],
+          inputs=[SITE_TREE_CSV], outputs=["site_tree.npz"]),
+    Stage("content", "extract_content_from_json.py", ["--input", "links.json", "--out", "pages_content.jsonl"],
+          inputs=["links.json"], outputs=["pages_content.jsonl"], external=True),
+    Stage("hyperlinks", "extract_hyperlinks.py", ["--input", "pages_content.jsonl", "--out", "hyperlinks.json"],
+          inputs=["pages_content.jsonl"], outputs=["hyperlinks.json"], external=True),
+    Stage("planos_list", "generate_planos_list.py",
+          inputs=["hyperlinks.json"], outputs=["planos_urls.txt", "planos_urls_detalhados.json"]),
+    Stage("planos", "extract_planos_estudo.py",
+          inputs=["planos_urls.txt"], outputs=["planos_estudo_fuc_completo.json", "planos.sqlite"],
+          code=["planos_store.py"], external=True),
+    Stage("normalize", "normalize_data.py",
+          inputs=["links.json", "pages_content.jsonl", "hyperlinks.json", "planos_estudo_fuc_completo.json",
+                  "site_tree.npz"],
+          outputs=["dataset_isel_completo.json"], code=["site_tree.py"]),
+    Stage("prepare", "prepare_rag_documents.py",
+          inputs=["dataset_isel_completo.json"], outputs=["rag_documents.json"]),
+    Stage("index", "build_chroma_index.py",
+          inputs=["rag_documents.json"],
+          outputs=["db", "metadata_index.json", "bm25_index.npz", "intent_centroids.npz"],
+          code=["chunking.py", "bm25_index.py", "metadata_index.py", "intent_classifier.py",
+                "indexing_pipeline.py", "embedding_cache.py"]),
+]
+
+
+# ---------- hashes ----------
+class FileHasher:
+    """sha256 de ficheiros/pastas, reaproveitado entre execuções enquanto (tamanho, mtime) não mudam."""
+
+    def __init__(self, known: Dict[str, list] = None):
+        self.known = dict(known or {})
+
+    def file(self, path: Path) -> str:
+        st = path.stat()
+        key = str(path.relative_to(BASE_DIR)) if path.is_relative_to(BASE_DIR) else str(path)
+        cached = self.known.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        self.known[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def path(self, rel: str) -> str:
+        p = (BASE_DIR / rel).resolve()
+        if not p.exists():
+            return "missing"
+        if p.is_file():
+            return self.file(p)
+        h = hashlib.sha256()
+        for f in sorted(x for x in p.rglob("*") if x.is_file()):
+            h.update(str(f.relative_to(p)).encode("utf-8"))
+            h.update(self.file(f).encode("ascii"))
+        return h.hexdigest()
+
+
+def stage_key(stage: Stage, hasher: FileHasher) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps(stage.command()[1:], ensure_ascii=False).encode("utf-8"))
+    for rel in [*stage.inputs, stage.script, *stage.code]:
+        h.update(f"{rel}={hasher.path(rel)};".encode("utf-8"))
+    return h.hexdigest()
+
+
+def outputs_exist(stage: Stage) -> bool:
+    return all((BASE_DIR / o).exists() for o in stage.outputs)
+
+
+# ---------- DAG ----------
+def dependencies(stages: List[Stage]) -> Dict[str, List[str]]:
+    """Etapa → etapas que produzem alguma das suas entradas."""
+    producer = {o: s.name for s in stages for o in s.outputs}
+    return {s.name: sorted({producer[i] for i in s.inputs if i in producer}) for s in stages}
+
+
+def upstream(targets: List[str], deps: Dict[str, List[str]]) -> List[str]:
+    seen, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in seen:
+            seen.add(name)
+            stack.extend(deps[name])
+    return sorted(seen)
+
+
+def downstream(roots: List[str], deps: Dict[str, List[str]]) -> List[str]:
+    seen, stack = set(), list(roots)
+    while stack:
+        name = stack.pop()
+        if name not in seen:
+            seen.add(name)
+            stack.extend(n for n, d in deps.items() if name in d)
+    return sorted(seen)
+
+
+def check_acyclic(stages: List[Stage], deps: Dict[str, List[str]]) -> None:
+    done, visiting = set(), set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Ciclo no pipeline em '{name}'")
+        visiting.add(name)
+        for d in deps[name]:
+            visit(d)
+        visiting.discard(name)
+        done.add(name)
+
+    for s in stages:
+        visit(s.name)
+
+
+# ---------- estado ----------
+def load_state() -> dict:
+    if STATE_PATH.exists():
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"stages": {}, "hashes": {}}
+
+
+def save_state(state: dict) -> None:
+    tmp = STATE_PATH.with_name(STATE_PATH.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, STATE_PATH)
+
+
+# ---------- execução ----------
+def run_stage(stage: Stage) -> Tuple[int, float]:
+    """Corre o script da etapa (saída para pipeline_logs/<etapa>.log); devolve (código, segundos)."""
+    LOG_DIR.mkdir(exist_ok=True)
+    t0 = time.perf_counter()
+    with open(LOG_DIR / f"{stage.name}.log", "w", encoding="utf-8") as log:
+        log.write(f"$ {' '.join(stage.command())}\n\n")
+        log.flush()
+        proc = subprocess.run(stage.command(), cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT,
+                              env={**os.environ, "PYTHONUNBUFFERED": "1"})
+    return proc.returncode, time.perf_counter() - t0
+
+
+class Pipeline:
+    """Escalonador do DAG: corre em paralelo as etapas prontas e salta as que estão atualizadas."""
+
+    def __init__(self, stages: List[Stage] = None, jobs: int = 2, offline: bool = False,
+                 force: List[str] = None, dry_run: bool = False):
+        self.stages = {s.name: s for s in (stages or STAGES)}
+        self.deps = dependencies(list(self.stages.values()))
+        check_acyclic(list(self.stages.values()), self.deps)
+        self.jobs = jobs
+        self.offline = offline
+        self.forced = set(downstream(force or [], self.deps))
+        self.dry_run = dry_run
+        self.state = load_state()
+        self.hasher = FileHasher(self.state.get("hashes"))
+        self.results: Dict[str, dict] = {}
+
+    def is_fresh(self, stage: Stage, key: str) -> bool:
+        if stage.name in self.forced or not outputs_exist(stage):
+            return False
+        if stage.external and not self.offline:
+            return False
+        last = self.state["stages"].get(stage.name)
+        return stage.external or (last is not None and last.get("key") == key)
+
+    def _finish(self, name: str, status: str, seconds: float = 0.0, key: str = None) -> None:
+        self.results[name] = {"status": status, "seconds": round(seconds, 3)}
+        icon = {"ran": "✅", "skipped": "⏭️", "failed": "❌", "blocked": "⛔", "would_run": "▶️"}[status]
+        extra = f" ({seconds:.1f} s)" if status in ("ran", "failed") else ""
+        print(f"{icon} {name}: {status}{extra}")
+        if status == "ran" and key:
+            self.state["stages"][name] = {
+                "key": key,
+                "seconds": round(seconds, 3),
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                "outputs": {o: self.hasher.path(o) for o in self.stages[name].outputs},
+            }
+
+    def run(self, targets: List[str] = None) -> bool:
+        wanted = set(upstream(targets, self.deps)) if targets else set(self.stages)
+        pending = set(wanted)
+        running = {}
+        started_at = datetime.now().isoformat(timespec="seconds")
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="stage") as pool:
+            while pending or running:
+                # etapas cujas dependências (dentro do pedido) já terminaram
+                for name in sorted(pending):
+                    deps = [d for d in self.deps[name] if d in wanted]
+                    if any(self.results.get(d, {}).get("status") in ("failed", "blocked") for d in deps):
+                        pending.discard(name)
+                        self._finish(name, "blocked")
+                        continue
+                    if not all(d in self.results for d in deps):
+                        continue
+                    pending.discard(name)
+                    stage = self.stages[name]
+                    key = stage_key(stage, self.hasher)
+                    upstream_runs = any(self.results[d]["status"] == "would_run" for d in deps)
+                    if not upstream_runs and self.is_fresh(stage, key):
+                        self._finish(name, "skipped")
+                    elif self.dry_run:
+                        self._finish(name, "would_run")
+                    else:
+                        print(f"▶️ {name}: {' '.join(stage.command()[1:])}")
+                        running[pool.submit(run_stage, stage)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    code, seconds = fut.result()
+                    if code == 0:
+                        # chave recalculada com as entradas tal como estavam ao correr (inalteradas pela etapa)
+                        self._finish(name, "ran", seconds, stage_key(self.stages[name], self.hasher))
+                    else:
+                        self._finish(name, "failed", seconds)
+                        print(f"   ↳ ver {LOG_DIR.name}/{name}.log (código {code})")
+                    if not self.dry_run:
+                        self.state["hashes"] = self.hasher.known
+                        save_state(self.state)
+        self.record_run(started_at, time.perf_counter() - t0)
+        return all(r["status"] not in ("failed", "blocked") for r in self.results.values())
+
+    def record_run(self, started_at: str, total: float) -> None:
+        ran = [n for n, r in self.results.items() if r["status"] == "ran"]
+        skipped = [n for n, r in self.results.items() if r["status"] == "skipped"]
+        print(f"\n⏱️ Total: {total:.1f} s | corridas: {len(ran)} | saltadas: {len(skipped)}")
+        for name, r in sorted(self.results.items(), key=lambda kv: -kv[1]["seconds"]):
+            if r["seconds"]:
+                print(f"   {name:<12} {r['seconds']:>8.1f} s")
+        if self.dry_run:
+            return
+        with open(RUNS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "started_at": started_at,
+                "total_s": round(total, 3),
+                "jobs": self.jobs,
+                "offline": self.offline,
+                "stages": self.results,
+            }, ensure_ascii=False) + "\n")
+
+
+def main():
+    names = [s.name for s in STAGES]
+    p = argparse.ArgumentParser(description="Pipeline de dados do AI-ISEL (DAG com cache por hash de conteúdo)")
+    p.add_argument("--until", nargs="*", default=None, help=f"Etapas alvo (e dependências): {', '.join(names)}")
+    p.add_argument("--force", nargs="*", default=[], help="Correr estas etapas (e as que delas dependem)")
+    p.add_argument("--jobs", type=int, default=2, help="Etapas em paralelo")
+    p.add_argument("--offline", action="store_true", help="Não voltar a ler o site se as saídas já existirem")
+    p.add_argument("--dry-run", action="store_true", help="Só mostrar o que correria")
+    p.add_argument("--list", action="store_true", help="Mostrar o DAG e sair")
+    args = p.parse_args()
+
+    for name in (args.until or []) + args.force:
+        if name not in names:
+            p.error(f"etapa desconhecida: {name} (opções: {', '.join(names)})")
+
+    pipeline = Pipeline(jobs=args.jobs, offline=args.offline, force=args.force, dry_run=args.dry_run)
+    if args.list:
+        for s in STAGES:
+            deps = pipeline.deps[s.name]
+            print(f"{s.name:<12} {s.script:<30} ← {', '.join(deps) or '—'}{' (externa)' if s.external else ''}")
+        return
+    ok = pipeline.run(args.until)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""
+Planos de estudo em tabelas SQLite e respostas estruturadas (sem LLM).
+
+O extract_planos_estudo.py guarda os planos como JSON aninhado (tabelas → rows,
+com chaves que variam de plano para plano: "Unidade Curricular", "col_1",
+"ECTS Obrigatórios", ...). Aqui cada linha é normalizada para:
+ - cursos: nome, sigla (LEIC, ...), grau e URL do plano;
+ - ucs:    curso, ano, semestre, UC, área científica, ECTS e link da FUC;
+ - areas:  ECTS obrigatórios/optativos por área científica (tabela-resumo do plano);
+com índices por (curso, ano, semestre) e por nome da UC. O rag_query usa-o para
+responder diretamente, em milissegundos, a perguntas agregadas:
+ - "quantos ECTS tem o 2.º ano da LEIC?"            → soma
+ - "quantas UCs tem o 1.º semestre de LEIRT?"       → contagem (por ano, se o ano não for dito)
+ - "quais as disciplinas do 3.º ano da LEIC?"       → lista
+ - "em que semestre é Programação na LEIC?"         → ano/semestre de uma UC
+ - "quantos ECTS de Matemática tem a LEIC?"         → ECTS de uma área científica
+Só entram perguntas claramente agregadas: uma palavra de contagem/total/lista
+junto do alvo (ECTS, UCs, ano/semestre de uma UC). Menções a outros temas
+(exames, propinas, creditação, ...) ou perguntas sem curso reconhecido seguem
+pelo RAG normal.
+
+Uso:
+    python planos_store.py --build
+    python planos_store.py --ask "quantos ECTS tem o 2.º ano da LEIC?"
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from metadata_index import acronym, contains_term
+from prepare_rag_documents import fold_accents
+
+PLANOS_JSON = Path(os.getenv("PLANOS_JSON", "planos_estudo_fuc_completo.json"))
+PLANOS_DB_PATH = Path(os.getenv("PLANOS_DB_PATH", "planos.sqlite"))
+
+# cabeçalhos (variáveis) das tabelas dos planos
+UC_KEYS = ("Unidade Curricular", "Unidades Curriculares", "Disciplina", "col_1")
+AREA_KEYS = ("Área científica", "Área Científica", "Área")
+ORDINAIS = {"primeiro": 1, "segundo": 2, "terceiro": 3, "quarto": 4, "quinto": 5}
+
+# intenção da pergunta (sobre o texto em minúsculas e sem acentos)
+UC_WORDS = r"(?:ucs?|unidades curriculares|disciplinas|cadeiras)"
+AGG_WORDS = r"(?:quant[ao]s?|total(?:\s+de)?|soma(?:\s+d[oa]s)?|numero\s+de)"
+COUNT_RE = re.compile(rf"\b{AGG_WORDS}\s+(?:de\s+)?{UC_WORDS}\b")
+LIST_RE = re.compile(rf"\b(?:quais|lista|listar|enumera)\s+(?:sao\s+)?(?:as\s+)?(?:todas\s+as\s+)?{UC_WORDS}\b")
+ECTS_RE = re.compile(rf"\b{AGG_WORDS}\s+(?:de\s+)?(?:ects|creditos)\b")
+WHEN_RE = re.compile(r"\bem que (?:ano|semestre)\b|\bqual o (?:ano|semestre)\b")
+# temas que não se respondem com as tabelas do plano
+OTHER_RE = re.compile(r"\b(?:exames?|avaliac\w*|orais?|propinas?|valor|preco|custo|pag\w*|creditac\w*|"
+                      r"equivalenc\w*|horarios?|docentes?|professor\w*|inscricao|inscrever|frequencia|notas?)\b")
+
+SCHEMA = """
+CREATE TABLE cursos (
+    id INTEGER PRIMARY KEY,
+    curso TEXT NOT NULL,
+    sigla TEXT NOT NULL,
+    degree_level TEXT,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE ucs (
+    curso_id INTEGER NOT NULL REFERENCES cursos(id),
+    ano INTEGER,
+    semestre INTEGER,
+    uc TEXT NOT NULL,
+    uc_fold TEXT NOT NULL,
+    area TEXT,
+    ects REAL,
+    fuc_pdf TEXT
+);
+CREATE TABLE areas (
+    curso_id INTEGER NOT NULL REFERENCES cursos(id),
+    area TEXT NOT NULL,
+    area_fold TEXT NOT NULL,
+    ects_obrigatorios REAL,
+    ects_optativos REAL
+);
+CREATE INDEX idx_cursos_sigla ON cursos(sigla);
+CREATE INDEX idx_ucs_curso ON ucs(curso_id, ano, semestre);
+CREATE INDEX idx_ucs_nome ON ucs(uc_fold);
+CREATE INDEX idx_areas_curso ON areas(curso_id, area_fold);
+"""
+
+
+# ---------- normalização ----------
+def parse_ordinal(text: str, word: str) -> Optional[int]:
+    """Número do ano/semestre num rótulo ou pergunta ("2.º Ano", "Semestre 1", "primeiro semestre")."""
+    t = fold_accents(text or "")
+    m = re.search(rf"(?<!\d)(\d)\s*\.?\s*[oº]?\s*{word}\b|\b{word}\s*(\d)(?!\d)", t)
+    if m:
+        return int(m.group(1) or m.group(2))
+    m = re.search(rf"\b({'|'.join(ORDINAIS)})\s+{word}\b", t)
+    return ORDINAIS[m.group(1)] if m else None
+
+
+def parse_ects(value) -> Optional[float]:
+    """"6,0" → 6.0; vazio ou "-" → None."""
+    m = re.search(r"\d+(?:[.,]\d+)?", str(value or ""))
+    return float(m.group(0).replace(",", ".")) if m else None
+
+
+def format_ects(value: Optional[float]) -> str:
+    return f"{value or 0:g}".replace(".", ",")
+
+
+def ucs_label(n: int) -> str:
+    return f"{n} unidade curricular" if n == 1 else f"{n} unidades curriculares"
+
+
+def _first(row: dict, keys) -> str:
+    for key in keys:
+        if row.get(key):
+            return str(row[key]).strip()
+    return ""
+
+
+def _ects_column(row: dict, optativos: bool = False) -> Optional[float]:
+    """Valor da coluna de ECTS (obrigatórios por omissão; "ECTS" e "ECTS Obrigatórios" valem o mesmo)."""
+    for key, value in row.items():
+        k = fold_accents(key)
+        if k.startswith("ects") and ("optativ" in k) == optativos:
+            return parse_ects(value)
+    if not optativos:
+        # tabelas sem cabeçalhos (col_1, col_2, ...): o último valor numérico da linha
+        cols = [row[k] for k in row if k.startswith("col_") and k != "col_1"]
+        return next((v for v in map(parse_ects, reversed(cols)) if v is not None), None)
+    return None
+
+
+def normalize_plano(plano: dict):
+    """(linhas de UCs, linhas de áreas) de um plano extraído por extract_all_tables_from_page."""
+    ucs, areas = [], []
+    for tab in plano.get("tabelas", []):
+        for row in tab.get("rows", []):
+            uc = _first(row, UC_KEYS)
+            area = _first(row, AREA_KEYS)
+            if uc and not fold_accents(uc).startswith("total"):
+                ucs.append({
+                    "ano": parse_ordinal(row.get("Ano") or tab.get("ano"), "ano"),
+                    "semestre": parse_ordinal(row.get("Semestre") or tab.get("semestre"), "semestre"),
+                    "uc": uc,
+                    "area": area,
+                    "ects": _ects_column(row),
+                    "fuc_pdf": row.get("FUC_PDF", ""),
+                })
+            elif area and not fold_accents(area).startswith("total"):
+                areas.append({
+                    "area": area,
+                    "ects_obrigatorios": _ects_column(row),
+                    "ects_optativos": _ects_column(row, optativos=True),
+                })
+    return ucs, areas
+
+
+def plano_sigla(plano: dict) -> str:
+    sigla = (plano.get("curso_sigla") or "").upper()
+    if len(sigla) >= 3 and sigla != "CURSO":
+        return sigla
+    return acronym(plano.get("curso", ""))
+
+
+# ---------- armazenamento ----------
+class PlanosStore:
+    """Tabelas SQLite dos planos de estudo, com as consultas agregadas e o parser de perguntas."""
+
+    def __init__(self, path: Path = PLANOS_DB_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self.cursos = {r["id"]: dict(r) for r in self._conn.execute("SELECT * FROM cursos")}
+        # termos de cada curso (nome completo e sigla) e nomes de UCs/áreas, para ler as perguntas
+        self._curso_terms = {
+            cid: {t for t in (fold_accents(c["curso"]), fold_accents(c["sigla"])) if len(t) >= 3}
+            for cid, c in self.cursos.items()
+        }
+        self._uc_names: Dict[int, Dict[str, str]] = {}
+        for r in self._conn.execute("SELECT curso_id, uc, uc_fold FROM ucs"):
+            self._uc_names.setdefault(r["curso_id"], {})[r["uc_fold"]] = r["uc"]
+        self._area_names: Dict[int, Dict[str, str]] = {}
+        for r in self._conn.execute("SELECT curso_id, area FROM ucs WHERE area != '' UNION "
+                                    "SELECT curso_id, area FROM areas"):
+            self._area_names.setdefault(r["curso_id"], {})[fold_accents(r["area"])] = r["area"]
+
+    @classmethod
+    def build(cls, planos: List[dict], path: Path = PLANOS_DB_PATH) -> "PlanosStore":
+        """Recria a base a partir dos planos (escreve num temporário e substitui no fim)."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.unlink(missing_ok=True)
+        conn = sqlite3.connect(str(tmp))
+        conn.executescript(SCHEMA)
+        seen = set()
+        for plano in planos:
+            url = plano.get("url", "")
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            ucs, areas = normalize_plano(plano)
+            cid = conn.execute(
+                "INSERT INTO cursos (curso, sigla, degree_level, url) VALUES (?, ?, ?, ?)",
+                (plano.get("curso", ""), plano_sigla(plano), plano.get("degree_level", ""), url),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO ucs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(cid, u["ano"], u["semestre"], u["uc"], fold_accents(u["uc"]), u["area"], u["ects"], u["fuc_pdf"])
+                 for u in ucs],
+            )
+            conn.executemany(
+                "INSERT INTO areas VALUES (?, ?, ?, ?, ?)",
+                [(cid, a["area"], fold_accents(a["area"]), a["ects_obrigatorios"], a["ects_optativos"])
+                 for a in areas],
+            )
+        conn.commit()
+        conn.close()
+        os.replace(tmp, path)
+        return cls(path)
+
+    @classmethod
+    def from_json(cls, json_path: Path = PLANOS_JSON, path: Path = PLANOS_DB_PATH) -> "PlanosStore":
+        with open(json_path, "r", encoding="utf-8") as f:
+            return cls.build(json.load(f), path)
+
+    @classmethod
+    def load(cls, path: Path = PLANOS_DB_PATH) -> Optional["PlanosStore"]:
+        return cls(path) if Path(path).exists() else None
+
+    @classmethod
+    def load_or_build(cls, path: Path = PLANOS_DB_PATH, json_path: Path = PLANOS_JSON) -> Optional["PlanosStore"]:
+        """Abre a base; se não existir ou o JSON dos planos for mais recente, recria-a (None sem dados)."""
+        path, json_path = Path(path), Path(json_path)
+        if path.exists() and (not json_path.exists() or path.stat().st_mtime >= json_path.stat().st_mtime):
+            return cls.load(path)
+        if not json_path.exists():
+            return None
+        return cls.from_json(json_path, path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---------- consultas ----------
+    @staticmethod
+    def _where(curso_id: int, ano: Optional[int], semestre: Optional[int], area: Optional[str] = None):
+        sql, params = "curso_id = ?", [curso_id]
+        if ano:
+            sql, params = sql + " AND ano = ?", params + [ano]
+        if semestre:
+            sql, params = sql + " AND semestre = ?", params + [semestre]
+        if area:
+            sql, params = sql + " AND area = ?", params + [area]
+        return sql, params
+
+    def ects_total(self, curso_id: int, ano: int = None, semestre: int = None, area: str = None):
+        """(soma de ECTS, nº de UCs) do curso, opcionalmente num ano/semestre e numa área científica."""
+        where, params = self._where(curso_id, ano, semestre, area)
+        row = self._query(f"SELECT SUM(ects), COUNT(*) FROM ucs WHERE {where}", params)[0]
+        return row[0] or 0.0, row[1]
+
+    def list_ucs(self, curso_id: int, ano: int = None, semestre: int = None, area: str = None) -> List[sqlite3.Row]:
+        where, params = self._where(curso_id, ano, semestre, area)
+        return self._query(f"SELECT * FROM ucs WHERE {where} ORDER BY ano, semestre, rowid", params)
+
+    def find_uc(self, curso_id: int, uc_fold: str) -> List[sqlite3.Row]:
+        return self._query("SELECT * FROM ucs WHERE curso_id = ? AND uc_fold = ? ORDER BY ano, semestre",
+                           (curso_id, uc_fold))
+
+    def ects_by_year(self, curso_id: int, semestre: int, area: str = None) -> List[sqlite3.Row]:
+        """(ano, soma de ECTS, nº de UCs) de um semestre em cada ano do curso (opcionalmente numa área)."""
+        where, params = self._where(curso_id, None, semestre, area)
+        return self._query(f"SELECT ano, SUM(ects), COUNT(*) FROM ucs WHERE {where} "
+                           "GROUP BY ano ORDER BY ano", params)
+
+    def area_ects(self, curso_id: int, area_fold: str):
+        """(ECTS obrigatórios, optativos) de uma área: da tabela-resumo, ou somando as UCs da área."""
+        rows = self._query("SELECT SUM(ects_obrigatorios), SUM(ects_optativos) FROM areas "
+                           "WHERE curso_id = ? AND area_fold = ?", (curso_id, area_fold))
+        if rows[0][0] is not None:
+            return rows[0][0], rows[0][1] or 0.0
+        name = self._area_names.get(curso_id, {}).get(area_fold, "")
+        total = self._query("SELECT SUM(ects) FROM ucs WHERE curso_id = ? AND area = ?", (curso_id, name))
+        return total[0][0] or 0.0, 0.0
+
+    # ---------- perguntas ----------
+    @staticmethod
+    def _longest(q: str, names) -> Optional[str]:
+        best = None
+        for term in names:
+            if len(term) > 3 and (best is None or len(term) > len(best)) and contains_term(q, term):
+                best = term
+        return best
+
+    def match_curso(self, q: str) -> Optional[int]:
+        """Curso referido na pergunta (o termo mais longo: nome completo > sigla)."""
+        best, best_len = None, 0
+        for cid, terms in self._curso_terms.items():
+            for term in terms:
+                if len(term) > best_len and contains_term(q, term):
+                    best, best_len = cid, len(term)
+        return best
+
+    def answer(self, question: str) -> Optional[Dict]:
+        """Resposta direta a uma pergunta agregada sobre um plano, ou None (segue pelo RAG)."""
+        q = fold_accents(question)
+        if OTHER_RE.search(q):
+            return None
+        cid = self.match_curso(q)
+        if cid is None:
+            return None
+        curso = self.cursos[cid]
+        ano, semestre = parse_ordinal(q, "ano"), parse_ordinal(q, "semestre")
+        uc = self._longest(q, self._uc_names.get(cid, {}))
+        area = None if uc else self._longest(q, self._area_names.get(cid, {}))
+        area_name = self._area_names[cid][area] if area else None
+        sem_scope = (f"{semestre}.º semestre" + ("" if ano else " de cada ano")) if semestre else ""
+        scope = " — ".join(p for p in (area_name, f"{ano}.º ano" if ano else "", sem_scope) if p)
+        label = f"**{curso['sigla'] or curso['curso']}**" + (f" ({scope})" if scope else "")
+        sources = [{"title": f"Plano de Estudos — {curso['curso']}", "url": curso["url"]}]
+
+        if uc and (WHEN_RE.search(q) or ECTS_RE.search(q)):
+            rows = self.find_uc(cid, uc)
+            kind = "uc"
+            lines = [f"- {r['ano'] or '?'}.º ano, {r['semestre'] or '?'}.º semestre — {format_ects(r['ects'])} ECTS"
+                     + (f" ({r['area']})" if r["area"] else "") for r in rows]
+            text = f"**{rows[0]['uc']}** ({curso['sigla'] or curso['curso']}):\n" + "\n".join(lines)
+            sources += [{"title": f"FUC — {r['uc']}", "url": r["fuc_pdf"]} for r in rows[:1] if r["fuc_pdf"]]
+        elif (COUNT_RE.search(q) or ECTS_RE.search(q)) and semestre and not ano:
+            # semestre sem ano: um total por ano (somar os anos não responde à pergunta)
+            rows = self.ects_by_year(cid, semestre, area_name)
+            if not rows:
+                return None
+            kind = "count" if COUNT_RE.search(q) else "ects"
+            lines = [f"- {r[0] or '?'}.º ano: " + (f"**{ucs_label(r[2])}** ({format_ects(r[1])} ECTS)" if kind == "count"
+                                                   else f"**{format_ects(r[1])} ECTS** em {ucs_label(r[2])}")
+                     for r in rows]
+            text = f"{label}:\n" + "\n".join(lines)
+        elif COUNT_RE.search(q):
+            total, n = self.ects_total(cid, ano, semestre, area_name)
+            if not n:
+                return None
+            kind = "count"
+            text = f"{label}: **{ucs_label(n)}** ({format_ects(total)} ECTS)."
+        elif LIST_RE.search(q):
+            rows = self.list_ucs(cid, ano, semestre, area_name)
+            if not rows:
+                return None
+            kind = "list"
+            lines = [f"- {r['uc']} — {format_ects(r['ects'])} ECTS"
+                     + ("" if ano and semestre else f" ({r['ano'] or '?'}.º ano, {r['semestre'] or '?'}.º sem.)")
+                     for r in rows]
+            text = f"{label}: {ucs_label(len(rows))}\n" + "\n".join(lines)
+        elif ECTS_RE.search(q) and area and not (ano or semestre):
+            # área no curso todo: tabela-resumo (inclui optativos); com ano/semestre soma as UCs
+            obrig, opt = self.area_ects(cid, area)
+            kind = "area"
+            text = (f"{label}: **{format_ects(obrig)} ECTS**"
+                    + (f" obrigatórios (+ {format_ects(opt)} optativos)." if opt else "."))
+        elif ECTS_RE.search(q):
+            total, n = self.ects_total(cid, ano, semestre, area_name)
+            if not n:
+                return None
+            kind = "ects"
+            text = f"{label}: **{format_ects(total)} ECTS** em {ucs_label(n)}."
+        else:
+            return None
+        return {
+            "answer": text,
+            "sources": sources,
+            "structured": {"kind": kind, "curso": curso["sigla"], "ano": ano, "semestre": semestre},
+        }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Planos de estudo em SQLite e respostas estruturadas")
+    p.add_argument("--json", default=str(PLANOS_JSON), help="JSON dos planos (extract_planos_estudo.py)")
+    p.add_argument("--db", default=str(PLANOS_DB_PATH), help="Base SQLite")
+    p.add_argument("--build", action="store_true", help="Recriar a base a partir do JSON")
+    p.add_argument("--ask", default=None, help="Responder a uma pergunta")
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
+    store = PlanosStore.from_json(Path(args.json), Path(args.db)) if args.build \
+        else PlanosStore.load_or_build(Path(args.db), Path(args.json))
+    if store is None:
+        print(f"❌ Nem {args.db} nem {args.json} encontrados.")
+        return
+    n_ucs = store._query("SELECT COUNT(*) FROM ucs")[0][0]
+    print(f"🗃️ {len(store.cursos)} planos, {n_ucs} UCs em {args.db} ({1000 * (time.perf_counter() - t0):.0f} ms)")
+
+    if args.ask:
+        t0 = time.perf_counter()
+        result = store.answer(args.ask)
+        dt = 1000 * (time.perf_counter() - t0)
+        if result is None:
+            print(f"ℹ️ Pergunta sem resposta estruturada (segue pelo RAG) — {dt:.2f} ms")
+            return
+        print(f"\n🧠 {result['answer']}\n")
+        for s in result["sources"]:
+            print(f" - [{s['title']}]({s['url']})")
+        print(f"\n⚡ {result['structured']} em {dt:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ e organiza também a informação da Comissão Coordenadora, Representantes e Co
 """
 
 import json
+import unicodedata
 from pathlib import Path
 
 
@@ -18,7 +19,36 @@ def clean_text(text: str) -> str:
     return text.strip()
 
 
+def fold_accents(text: str) -> str:
+    """Minúsculas e sem acentos (informática → informatica), para comparações e pesquisa."""
+    decomposed = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def clean_lines(text: str) -> str:
+    """Como clean_text, mas mantém as quebras de linha (úteis para o splitter)."""
+    if not text:
+        return ""
+    lines = (" ".join(ln.split()) for ln in text.replace("\r", "\n").split("\n"))
+    return "\n".join(ln for ln in lines if ln)
+
+
 # ---------- Planos de Estudo ----------
+def row_uc_name(row: dict) -> str:
+    """Nome da UC numa linha de tabela (os cabeçalhos variam entre planos)."""
+    return (
+        row.get("Unidade Curricular")
+        or row.get("Disciplina")
+        or row.get("Área científica")
+        or row.get("col_1")
+        or ""
+    )
+
+
+def row_ects(row: dict) -> str:
+    return row.get("ECTS") or row.get("ECTS Obrigatórios") or ""
+
+
 def extract_planos_text(page_data: dict) -> str:
     """Extrai e formata o texto das tabelas dos planos de estudo (Ano / Semestre / Disciplinas)."""
     if not page_data.get("tabelas"):
@@ -34,13 +64,8 @@ def extract_planos_text(page_data: dict) -> str:
             parts.append(f"\n📘 {ano} — {semestre}\n")
 
         for row in rows:
-            nome = (
-                row.get("Unidade Curricular")
-                or row.get("Disciplina")
-                or row.get("Área científica")
-                or row.get("col_1")
-            )
-            ects = row.get("ECTS") or row.get("ECTS Obrigatórios") or ""
+            nome = row_uc_name(row)
+            ects = row_ects(row)
             area = row.get("Área científica") or ""
             fuc = row.get("FUC_TEXT", "")
 
@@ -80,6 +105,18 @@ def extract_comissao_text(page_data: dict) -> str:
 
 
 # ---------- Fusão de texto ----------
+def page_text_fields(page_data: dict) -> str:
+    """Só o texto geral da página (sem planos, comissão nem FUCs, que são chunked à parte)."""
+    parts = [page_data[k] for k in ("titulo", "texto", "meta_description") if page_data.get(k)]
+    if page_data.get("plano_de_estudos_url"):
+        parts.append(f"Plano de estudos disponível em: {page_data['plano_de_estudos_url']}")
+    if page_data.get("curso_nome"):
+        parts.append(f"Curso: {page_data['curso_nome']}")
+    if page_data.get("degree_level"):
+        parts.append(f"Grau: {page_data['degree_level']}")
+    return clean_lines("\n\n".join(parts))
+
+
 def merge_text_fields(page_data: dict) -> str:
     """Combina título, texto principal, plano de estudos, comissão e metadados relevantes."""
     parts = []
@@ -142,15 +179,25 @@ def main():
             "type": data.get("type", ""),
             "curso_nome": data.get("curso_nome", ""),
             "degree_level": data.get("degree_level", ""),
+            "section": data.get("section", ""),
             "plano_de_estudos_url": data.get("plano_de_estudos_url", ""),
             "texto": texto_final,
+            "texto_pagina": page_text_fields(data),
             "meta_description": data.get("meta_description", ""),
             "h1": data.get("h1", ""),
             "h2": data.get("h2", []),
             "lang": data.get("lang", ""),
             "domain": data.get("domain", ""),
+            # listas usadas como metadados filtráveis no índice vetorial
+            "keywords": data.get("tags", []),
+            "aliases": data.get("search_aliases", []),
+            "anchors": data.get("h2", []),
         }
 
+        # Incluir tabelas dos planos (para o chunking estruturado)
+        if data.get("tabelas"):
+            doc["tabelas"] = data["tabelas"]
+
         # Incluir FUCs, se existirem
         if "fucs" in data:
             doc["fucs"] = data["fucs"]
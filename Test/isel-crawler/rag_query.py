@@ -1,20 +1,45 @@
 """
 RAG Query (AI-ISEL) — precisão melhorada
-- Retriever com MMR + filtros por tipo de página (curso / plano_estudos) quando faz sentido
+- Filtro por tipo de página escolhido por classificador de intenção (centróides de embeddings)
+- Retriever híbrido: BM25 + vetorial (RRF) com MMR (uma só pesquisa vetorial) + filtros por tipo de página (curso / plano_estudos) quando faz sentido
+- Contexto por orçamento de tokens (tokenizer do LLM), sem chunks repetidos
+- Re-ranking opcional (cross-encoder local, RERANK=1) antes de montar o contexto
 - Prompt anti-alucinação (responder só do contexto, senão dizer que não há dados)
-- Fallback de modelos: Ollama -> (outro Ollama) -> OpenAI (se OPENAI_API_KEY)
+- Prompt com as instruções fixas como prefixo (reutilizável na cache KV do Ollama),
+  modelo mantido carregado (keep_alive) e pré-aquecido no arranque
+- Router de modelos (OpenAI se OPENAI_API_KEY, vários Ollama): teste de saúde em paralelo,
+  o mais rápido saudável primeiro, failover por pedido e circuit breaker
+- Filtro opcional por secção do site (ex.: /ensino/programas-de-mobilidade), com a
+  lista de páginas da subárvore dada pelo índice da árvore do site (site_tree.py)
+- Perguntas agregadas sobre planos de estudo ("quantos ECTS tem o 2.º ano da LEIC?")
+  respondidas diretamente das tabelas SQLite (planos_store.py), sem LLM
 """
 
 import os
 import sys
+import json
+import time
 import traceback
 from typing import List, Dict
 
 from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings, OllamaLLM
+from langchain_ollama import OllamaLLM
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
+from answer_cache import AnswerCache
+from bm25_index import BM25Index
+from context_packer import CONTEXT_WINDOW, active_token_counter, context_budget, estimate_tokens, pack_context
+from embedding_cache import cached_ollama_embeddings
+from intent_classifier import IntentClassifier
+from llm_router import LLM_TIMEOUT, LLMRouter
+from metadata_index import MetadataIndex, combine_where
+from metrics import instrumented_run, observe, timer
+from planos_store import PLANOS_JSON, PlanosStore
+from reranker import load_reranker
+from site_tree import SITE_TREE_CSV, SiteTree
+import retriever
+
 # (Opcional) OpenAI se tiveres chave
 USE_OPENAI = bool(os.getenv("OPENAI_API_KEY"))
 if USE_OPENAI:
@@ -24,7 +49,14 @@ if USE_OPENAI:
         USE_OPENAI = False
 
 CHROMA_PATH = "db"
+META_INDEX_PATH = "metadata_index.json"
+INTENTS_PATH = "intent_centroids.npz"
+BM25_INDEX_PATH = "bm25_index.npz"
+SITE_TREE_PATH = "site_tree.npz"
+PLANOS_DB_PATH = "planos.sqlite"
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+RERANK = os.getenv("RERANK", "0") == "1"
+RETRIEVE_K = 8
 
 # Ordem de preferência de modelos Ollama (leves -> médios)
 OLLAMA_CANDIDATES = [
@@ -33,10 +65,16 @@ OLLAMA_CANDIDATES = [
     "mistral:7b-instruct-q4_K_M",
 ]
 
+# tempo que o Ollama mantém o modelo (e a cache do prefixo) em memória entre perguntas
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
 # OpenAI por defeito (se houver API key)
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
-PROMPT_TEMPLATE = """
+# Instruções fixas: vêm sempre primeiro e sem variáveis, para serem um prefixo idêntico
+# em todos os pedidos (o Ollama/llama.cpp reaproveita a cache KV do prefixo comum e
+# a OpenAI faz prompt caching de prefixos). Tudo o que muda vem depois.
+SYSTEM_PROMPT = """
 És o **assistente oficial do ISEL**.
 
 Responde **apenas com base no contexto** abaixo. Se a resposta **não estiver claramente** no contexto, responde exatamente:
@@ -51,7 +89,9 @@ Estilo:
   - 📘 Mestrados (2.º ciclo)
   - 📗 Pós-graduações / Especialização
 - Inclui duração/ECTS **só** se constar no contexto.
+"""
 
+QUESTION_TEMPLATE = """
 ---
 📚 **Contexto:**
 {context}
@@ -62,39 +102,103 @@ Estilo:
 💬 **Resposta factual (apenas do contexto):**
 """
 
+PROMPT_TEMPLATE = SYSTEM_PROMPT + QUESTION_TEMPLATE
+
+NO_ANSWER = "> “Essa informação não se encontra disponível nos registos atuais do ISEL.”"
+
 prompt = PromptTemplate.from_template(PROMPT_TEMPLATE)
 
 
 def load_db():
-    embedding_fn = OllamaEmbeddings(model=EMBEDDING_MODEL)
+    embedding_fn = cached_ollama_embeddings(EMBEDDING_MODEL)
     db = Chroma(persist_directory=CHROMA_PATH, embedding_function=embedding_fn)
     return db
 
 
+def load_metadata_index():
+    """Índice invertido de metadados gerado pelo build_chroma_index (ou None se não existir)."""
+    return MetadataIndex.load(META_INDEX_PATH)
+
+
+def load_intent_classifier():
+    """Centróides por tipo de página gerados pelo build_chroma_index (ou None se não existirem)."""
+    return IntentClassifier.load(INTENTS_PATH)
+
+
+def load_bm25_index():
+    """Índice lexical BM25 gerado pelo build_chroma_index (ou None se não existir)."""
+    return BM25Index.load(BM25_INDEX_PATH)
+
+
+def load_site_tree():
+    """Árvore do site compilada (recompilada se o CSV for mais recente; None sem CSV)."""
+    return SiteTree.load_or_build(SITE_TREE_PATH, SITE_TREE_CSV)
+
+
+def load_planos_store():
+    """Tabelas dos planos de estudo (recriadas se o JSON dos planos for mais recente; None sem dados)."""
+    return PlanosStore.load_or_build(PLANOS_DB_PATH, PLANOS_JSON)
+
+
+def structured_answer(query: str, planos=None):
+    """Resposta direta das tabelas dos planos (ECTS, nº/lista de UCs, ano/semestre de uma UC) ou None."""
+    return planos.answer(query) if planos is not None else None
+
+
+def section_urls(section: str, site_tree=None):
+    """URLs das páginas abaixo de `section` (caminho ou URL) ou None se não houver filtro."""
+    if not section or site_tree is None:
+        return None
+    return site_tree.urls_under(section) or None
+
+
 def pick_llm():
-    # 1) OpenAI se disponível
+    """Router sobre os candidatos (OpenAI, se houver chave, e os modelos Ollama), testados
+    em paralelo no arranque; cada pedido vai para o mais rápido saudável, com failover."""
+    candidates = []
     if USE_OPENAI:
         try:
-            return ChatOpenAI(model=OPENAI_MODEL, temperature=0.2), "openai"
-        except Exception:
-            pass
-
-    # 2) Ollama local
-    last_err = None
-    for name in OLLAMA_CANDIDATES:
-        try:
-            llm = OllamaLLM(model=name, options={"num_gpu": 0})
-            return llm, f"ollama:{name}"
+            candidates.append(("openai", ChatOpenAI(model=OPENAI_MODEL, temperature=0.2, timeout=LLM_TIMEOUT)))
         except Exception as e:
-            last_err = e
-            continue
-    if last_err:
-        print(f"⚠️ Falha ao selecionar LLM Ollama: {last_err}")
-    return None, "none"
-
-
-def intent_filter(query: str):
-    """Escolhe filtro por tipo de página com base na pergunta."""
+            print(f"⚠️ OpenAI indisponível: {e}")
+    for name in dict.fromkeys(OLLAMA_CANDIDATES):
+        candidates.append((f"ollama:{name}", OllamaLLM(
+            model=name, num_gpu=0, num_ctx=CONTEXT_WINDOW, keep_alive=OLLAMA_KEEP_ALIVE,
+            client_kwargs={"timeout": LLM_TIMEOUT},
+        )))
+
+    router = LLMRouter(candidates)
+    print(f"🧪 A testar {len(candidates)} modelos em paralelo...")
+    router.probe_all()
+    for c in router.ordered():
+        status = f"✅ {c.probe_ms:.0f} ms" if c.healthy else f"❌ {c.probe_error}"
+        print(f"   · {c.name}: {status}")
+    if not router.healthy():
+        return None, "none"
+    return router, router.name
+
+
+def prewarm(llm, llm_name: str) -> float:
+    """Carrega o modelo Ollama e avalia já o prefixo fixo do prompt (1 token gerado),
+    para a 1.ª pergunta não pagar a carga nem a avaliação das instruções. Devolve segundos."""
+    if not llm_name.startswith("ollama:"):
+        return 0.0
+    if isinstance(llm, LLMRouter):
+        llm = llm.primary.llm
+    t0 = time.perf_counter()
+    try:
+        llm.model_copy(update={"num_predict": 1}).invoke(SYSTEM_PROMPT)
+    except Exception as e:
+        print(f"⚠️ Pré-aquecimento do modelo falhou: {e}")
+    return time.perf_counter() - t0
+
+
+def intent_filter(query: str, intents=None, query_vec=None):
+    """Filtro por tipo de página. Com o classificador de intenção (centróides por tipo,
+    calculados no build_chroma_index) usa o embedding da pergunta; sem ele, palavras-chave."""
+    if intents is not None and query_vec is not None:
+        types = intents.choose(query_vec)
+        return {"type": {"$in": types}} if types else None
     q = query.lower()
     if any(k in q for k in ["licenciatura", "licenciaturas", "cursos", "curso", "mestrado", "pós-graduação", "plano de estudos", "plano de estudo"]):
         return {"type": {"$in": ["curso", "plano_estudos"]}}
@@ -103,93 +207,106 @@ def intent_filter(query: str):
     return None
 
 
-def retrieve(db: Chroma, query: str, k: int = 8) -> List:
-    filter_meta = intent_filter(query)
-    docs = []
-    try:
-        docs = db.similarity_search(
-            query,
-            k=k,
-            filter=filter_meta,
-            search_type="mmr",
-            search_kwargs={"k": k, "fetch_k": max(20, 5 * k), "lambda_mult": 0.3},
-        )
-    except TypeError:
-        docs = db.similarity_search(query, k=k, filter=filter_meta)
-    if not docs:
-        try:
-            docs = db.similarity_search(
-                query,
-                k=k,
-                search_type="mmr",
-                search_kwargs={"k": k, "fetch_k": max(20, 5 * k), "lambda_mult": 0.3},
-            )
-        except TypeError:
-            docs = db.similarity_search(query, k=k)
-    return docs
-
-
-def build_context(docs: List, query: str) -> Dict[str, str]:
-    """Junta chunks e adiciona fallback manual para perguntas de cursos."""
+def query_conds(query: str, meta_index, intents=None, query_vec=None, urls=None) -> Dict[str, object]:
+    """Condições de metadados da pergunta (tipo + curso/grau/tags + secção), já relaxadas.
+    A secção (`urls`) é a última a ser relaxada."""
+    conds = meta_index.match_query(query)
+    type_filter = intent_filter(query, intents, query_vec)
+    if type_filter:
+        conds["type"] = type_filter["type"]["$in"]
+    if urls:
+        indexed = sorted(set(urls) & meta_index.postings["url"].keys())
+        if indexed:
+            conds["url"] = indexed
+    return meta_index.relax(conds)
+
+
+def query_filter(query: str, meta_index=None, intents=None, query_vec=None, urls=None):
+    """Filtro Chroma: tipo de página (intent_filter) + curso/grau/tags reconhecidos na pergunta
+    (+ páginas da secção, se dada). Com o índice de metadados, condições que não deixam
+    candidatos são relaxadas."""
+    if meta_index is None:
+        where = intent_filter(query, intents, query_vec)
+        return combine_where([where, {"url": {"$in": list(urls)}} if urls else None])
+    return MetadataIndex.to_where(query_conds(query, meta_index, intents, query_vec, urls))
+
+
+def cache_scope(query: str, meta_index=None, intents=None, query_vec=None, section: str = "") -> str:
+    """Âmbito da pergunta para a cache de respostas: perguntas parecidas sobre cursos
+    ou tipos de página diferentes (ex.: ECTS da LEIC vs da LEIRT) não partilham resposta."""
+    scope = json.dumps(query_filter(query, meta_index, intents, query_vec), sort_keys=True, ensure_ascii=False)
+    return f"{scope}|{section}" if section else scope
+
+
+def retrieve(db: Chroma, query: str, k: int = 8, meta_index=None, bm25=None, intents=None, query_vec=None,
+             urls=None) -> List:
+    """MMR sobre `fetch_k` candidatos de uma só consulta vetorial (ver retriever.py),
+    fundidos por RRF com os do BM25 quando há índice lexical. O embedding da pergunta
+    é calculado uma vez e serve também ao classificador de intenção. `urls` restringe
+    a pesquisa às páginas de uma secção (ver section_urls)."""
+    if query_vec is None:
+        with timer("rag.embed_query"):
+            query_vec = db.embeddings.embed_query(query)
+    with timer("rag.filter"):
+        if meta_index is None:
+            where, allowed = query_filter(query, None, intents, query_vec, urls), None
+        else:
+            conds = query_conds(query, meta_index, intents, query_vec, urls)
+            where = MetadataIndex.to_where(conds)
+            allowed = meta_index.candidates(conds) if bm25 is not None else None
+    with timer("rag.search"):
+        return retriever.search(db, query, k=k, where=where, query_vec=query_vec, bm25=bm25, allowed=allowed)
+
+
+def retrieve_ranked(db: Chroma, query: str, meta_index=None, bm25=None, reranker=None, k: int = RETRIEVE_K,
+                    intents=None, query_vec=None, urls=None) -> List:
+    """retrieve + re-ranking: com re-ranker, recupera `top_n` candidatos e fica com os melhores."""
+    if reranker is None:
+        return retrieve(db, query, k, meta_index, bm25, intents, query_vec, urls)
+    docs = retrieve(db, query, max(k, reranker.top_n), meta_index, bm25, intents, query_vec, urls)
+    return reranker.rerank(query, docs)
+
+
+def build_context(docs: List, query: str, count=estimate_tokens) -> Dict:
+    """Contexto por orçamento de tokens (ver context_packer.py): o que sobra da janela
+    do modelo depois do prompt fixo, da pergunta e da reserva para a resposta."""
+    overhead = count(prompt.format(context="", question=query))
     if not docs:
-        return {"context": "", "sources": []}
-
-    seen, sources, parts = set(), [], []
-    total_chars, MAX_CHARS = 0, 6000
-
-    for d in docs:
-        url = d.metadata.get("url", "")
-        title = d.metadata.get("title", "") or d.metadata.get("curso_nome", "") or ""
-        if url and url not in seen:
-            seen.add(url)
-            sources.append({"url": url, "title": title})
-        chunk = d.page_content.strip()
-        if not chunk:
-            continue
-        if total_chars + len(chunk) > MAX_CHARS:
-            chunk = chunk[: (MAX_CHARS - total_chars)]
-        parts.append(chunk)
-        total_chars += len(chunk)
-        if total_chars >= MAX_CHARS:
-            break
+        return {"context": "", "sources": [], "tokens": {"prompt": overhead, "context": 0}}
+    pack = pack_context(docs, query, context_budget(overhead), count)
+    pack["tokens"]["prompt"] = overhead + pack["tokens"]["context"]
+    return pack
 
-    context = "\n\n---\n\n".join(parts)
-
-    # 🔹 Fallback automático se a query falar de cursos
-    if any(k in query.lower() for k in ["curso", "licenciatura", "mestrado"]):
-        context += "\n\n---\n\n" + """
-        🏛️ O ISEL integra o Instituto Politécnico de Lisboa (IPL),
-sendo uma instituição pública de ensino superior com autonomia
-administrativa e científica. O IPL inclui ainda as escolas ESCS, ESELx,
-ESML, ESD, ESTC e ESTeSL.
-
-🎓 **Licenciaturas oferecidas no ISEL:**
-- Engenharia Civil
-- Engenharia Eletrónica e Telecomunicações e de Computadores
-- Engenharia Informática e de Computadores
-- Engenharia Informática, Redes e Telecomunicações
-- Engenharia Mecânica
-- Engenharia Química e Biológica
-- Engenharia de Energia e Ambiente
-- Matemática Aplicada à Tecnologia e à Empresa
-- Engenharia Física Aplicada
-
-📘 **Mestrados:**
-- Engenharia Civil
-- Engenharia Eletrotécnica e de Computadores
-- Engenharia Informática
-- Engenharia Mecânica
-- Engenharia Química e Biológica
-- Engenharia de Energia e Ambiente
-- Matemática Aplicada à Indústria
-"""
 
-    return {"context": context, "sources": sources}
+def answer(llm, question: str, ctx: str) -> str:
+    chain = prompt | llm | StrOutputParser()
+    with timer("rag.answer"):
+        return chain.invoke({"context": ctx, "question": question}).strip()
+
 
+def answer_stream(llm, question: str, ctx: str):
+    """Como answer(), mas devolve os tokens à medida que o LLM os gera. Mede o tempo
+    até ao primeiro token (rag.answer_stream.first_token) e o total (rag.answer_stream)."""
+    chain = prompt | llm | StrOutputParser()
+    with timer("rag.answer_stream"):
+        t0, first = time.perf_counter(), True
+        for token in chain.stream({"context": ctx, "question": question}):
+            if first:
+                observe("rag.answer_stream.first_token", time.perf_counter() - t0)
+                first = False
+            yield token
 
-def answer(llm, question: str, ctx: str) -> str:
+
+async def answer_astream(llm, question: str, ctx: str):
+    """Versão assíncrona de answer_stream (para o serviço HTTP), com as mesmas métricas."""
     chain = prompt | llm | StrOutputParser()
-    return chain.invoke({"context": ctx, "question": question}).strip()
+    with timer("rag.answer_stream"):
+        t0, first = time.perf_counter(), True
+        async for token in chain.astream({"context": ctx, "question": question}):
+            if first:
+                observe("rag.answer_stream.first_token", time.perf_counter() - t0)
+                first = False
+            yield token
 
 
 def print_sources(sources: List[Dict[str, str]]):
@@ -202,14 +319,26 @@ def print_sources(sources: List[Dict[str, str]]):
         print(f" - [{title}]({url})")
 
 
+@instrumented_run("rag_query")
 def main():
     print("🔍 A carregar base vetorial e embeddings...")
     db = load_db()
+    meta_index = load_metadata_index()
+    bm25 = load_bm25_index()
+    intents = load_intent_classifier()
+    reranker = load_reranker() if RERANK else None
+    planos = load_planos_store()
+    answer_cache = AnswerCache(db.embeddings, CHROMA_PATH)
     llm, llm_name = pick_llm()
     if not llm:
         print("❌ Não foi possível inicializar nenhum LLM (Ollama/OpenAI).")
         sys.exit(1)
 
+    count_tokens = active_token_counter(llm, llm_name)
+    warm = prewarm(llm, llm_name)
+    if warm:
+        print(f"🔥 Modelo carregado e prefixo do prompt avaliado em {warm:.1f} s (keep_alive={OLLAMA_KEEP_ALIVE})")
+
     print(f"\n🤖 AI-ISEL RAG iniciado! (LLM: {llm_name}) — Escreve a tua pergunta (ou 'sair'):\n")
     while True:
         try:
@@ -224,16 +353,47 @@ def main():
 
         print("\n💭 A pensar...\n")
         try:
-            docs = retrieve(db, query, k=8)
-            pack = build_context(docs, query)
+            t0 = time.perf_counter()
+            structured = structured_answer(query, planos)
+            if structured:
+                print("\n🧠 Resposta:\n")
+                print(structured["answer"])
+                print_sources(structured["sources"])
+                print(f"\n⚡ Dos planos de estudo ({structured['structured']['kind']}) em "
+                      f"{1000 * (time.perf_counter() - t0):.1f} ms")
+                print("\n" + "-" * 80)
+                continue
+
+            query_vec = db.embeddings.embed_query(query)
+            scope = cache_scope(query, meta_index, intents, query_vec)
+            cached = answer_cache.lookup(query, scope, query_vec)
+            if cached:
+                print("\n🧠 Resposta:\n")
+                print(cached["answer"])
+                print_sources(cached["sources"])
+                print(f"\n⚡ Da cache ({cached['match']}, sim={cached['similarity']}) em "
+                      f"{time.perf_counter() - t0:.2f} s")
+                print("\n" + "-" * 80)
+                continue
+
+            docs = retrieve_ranked(db, query, meta_index, bm25, reranker, intents=intents, query_vec=query_vec)
+            pack = build_context(docs, query, count_tokens)
             if not pack["context"]:
-                print("> “Essa informação não se encontra disponível nos registos atuais do ISEL.”")
+                print(NO_ANSWER)
                 continue
 
-            resp = answer(llm, query, pack["context"])
             print("\n🧠 Resposta:\n")
-            print(resp)
+            ttft, tokens = None, []
+            for token in answer_stream(llm, query, pack["context"]):
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+                tokens.append(token)
+                print(token, end="", flush=True)
+            print()
+            answer_cache.store(query, "".join(tokens).strip(), pack["sources"], scope, query_vec)
             print_sources(pack["sources"])
+            print(f"\n⏱️ 1.º token: {ttft or 0:.2f} s | total: {time.perf_counter() - t0:.2f} s"
+                  f" | 🧮 prompt: {pack['tokens']['prompt']} tokens ({pack['tokens']['chunks']} chunks)")
             print("\n" + "-" * 80)
 
         except Exception as e:
@@ -241,6 +401,10 @@ def main():
             traceback.print_exc()
             print("\n" + "-" * 80)
 
+    s = answer_cache.stats()
+    print(f"📊 Cache de respostas: {s['exact_hits']} exatas + {s['semantic_hits']} semânticas "
+          f"em {s['lookups']} perguntas (hit rate {s['hit_rate']:.0%})")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,457 @@
+"""
+Serviço HTTP (assíncrono) do AI-ISEL sobre o rag_query.
+
+Carrega a base Chroma, o índice de metadados e o LLM uma única vez e expõe:
+ - POST /retrieve   {"question", "k"}  → chunks recuperados
+ - POST /context    {"question", "k"}  → contexto + fontes
+ - POST /answer     {"question", "k"}  → resposta + fontes
+ - POST /answer/stream {"question"}    → Server-Sent Events: `token`…, `sources`, `done`
+ - POST /api/chat   {"message"}        → {"reply", "sources"} (formato do frontend React)
+ - GET  /health, GET /metrics          → estado e latências por etapa (p50/p95/p99)
+   (GET /metrics?format=prometheus     → instrumentação do metrics.py em texto Prometheus)
+Perguntas agregadas sobre planos de estudo (ECTS, nº/lista de UCs) são respondidas
+diretamente das tabelas dos planos (planos_store.py), sem passar pelo LLM.
+Todos os POST aceitam "section" (ex.: "/ensino/programas-de-mobilidade") para limitar
+a pesquisa às páginas dessa secção do site (índice da árvore do site, site_tree.py).
+
+As etapas (bloqueantes) correm num pool de threads limitado; se houver demasiados
+pedidos em espera, o servidor responde 503 em vez de acumular latência.
+
+Uso:
+    python rag_server.py --port 5000
+    python rag_server.py --stub      # LLM e embeddings falsos, índice em memória
+"""
+
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+import rag_query
+from answer_cache import AnswerCache
+from reranker import RERANK_MODEL, load_reranker
+from metrics import REGISTRY, StageLatencies
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 32
+DEFAULT_K = 8
+MAX_K = 50  # limita o fetch_k do MMR (k maiores não cabem no contexto de qualquer forma)
+STUB_PAGES = 200
+STUB_ANSWER = "🧪 (resposta simulada) Segundo os registos do ISEL, consulta as fontes indicadas."
+
+
+# ---------- backends ----------
+def load_backends():
+    """Backends reais: Chroma + embeddings Ollama (com cache) + LLM escolhido por pick_llm."""
+    db = rag_query.load_db()
+    meta_index = rag_query.load_metadata_index()
+    llm, llm_name = rag_query.pick_llm()
+    if not llm:
+        raise RuntimeError("Não foi possível inicializar nenhum LLM (Ollama/OpenAI).")
+    return db, meta_index, llm, llm_name
+
+
+def load_stub_backends(pages_path: str = "pages_content.jsonl", max_pages: int = STUB_PAGES):
+    """Backends falsos para testes locais: embeddings determinísticos, LLM fixo e
+    uma coleção Chroma em memória com as primeiras páginas de pages_content.jsonl."""
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_core.language_models import FakeStreamingListLLM
+    from chunking import chunk_item
+
+    embedding_fn = DeterministicFakeEmbedding(size=768)
+    db = Chroma(collection_name="aiisel_stub", embedding_function=embedding_fn)
+    docs = []
+    with open(pages_path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if i >= max_pages:
+                break
+            if not line.strip():
+                continue
+            page = json.loads(line)
+            item = {"titulo": page.get("title", ""), "texto": page.get("text", "")}
+            meta = {"url": page.get("url", ""), "title": page.get("title", ""), "type": page.get("type", "")}
+            docs.extend(chunk_item(item, meta))
+    if docs:
+        db.add_documents(docs)
+    llm = FakeStreamingListLLM(responses=[STUB_ANSWER])
+    return db, None, llm, "stub"
+
+
+def stub_bm25_index(db):
+    """Índice BM25 em memória sobre a coleção stub."""
+    from bm25_index import BM25Index, document_text
+    from langchain_core.documents import Document
+
+    data = db.get(include=["documents", "metadatas"])
+    return BM25Index.build({
+        cid: document_text(Document(page_content=text or "", metadata=meta or {}))
+        for cid, text, meta in zip(data["ids"], data["documents"], data["metadatas"])
+    })
+
+
+# ---------- helpers ----------
+def _json_response(obj, status: int = 200) -> web.Response:
+    return web.json_response(obj, status=status, dumps=lambda o: json.dumps(o, ensure_ascii=False))
+
+
+def _doc_to_json(d) -> dict:
+    return {"content": d.page_content, "metadata": d.metadata}
+
+
+async def _read_question(request: web.Request) -> tuple:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="JSON inválido")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="O corpo tem de ser um objeto JSON")
+    question = body.get("question") or body.get("message") or ""
+    section = body.get("section") or ""
+    if not isinstance(question, str) or not isinstance(section, str):
+        raise web.HTTPBadRequest(text="'question' e 'section' têm de ser texto")
+    question, section = question.strip(), section.strip()
+    if not question:
+        raise web.HTTPBadRequest(text="Falta o campo 'question'")
+    try:
+        k = int(body.get("k") or DEFAULT_K)
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(text="'k' tem de ser um número inteiro")
+    return question, max(1, min(k, MAX_K)), section
+
+
+class RagService:
+    """Estado partilhado do serviço (modelos carregados uma vez) e execução das etapas."""
+
+    def __init__(self, db, meta_index, llm, llm_name, workers: int, max_pending: int,
+                 answer_cache: AnswerCache = None, bm25=None, reranker=None, intents=None, site_tree=None,
+                 planos=None):
+        self.db = db
+        self.site_tree = site_tree
+        self.planos = planos
+        self.intents = intents
+        self.bm25 = bm25
+        self.reranker = reranker
+        self.answer_cache = answer_cache
+        self.meta_index = meta_index
+        self.llm = llm
+        self.llm_name = llm_name
+        self.count_tokens = rag_query.active_token_counter(llm, llm_name)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag")
+        self.llm_slots = asyncio.Semaphore(workers)  # gerações em streaming simultâneas
+        self.max_pending = max_pending
+        self.pending = 0
+        self.stats = StageLatencies()
+        self.started_at = time.time()
+
+    async def run(self, stage: str, fn, *args, timings: dict = None):
+        """Executa uma etapa bloqueante no pool e regista a latência (global e do pedido)."""
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self.pool, fn, *args)
+        except Exception:
+            self.stats.error(stage)
+            raise
+        finally:
+            dt = time.perf_counter() - t0
+            self.stats.record(stage, dt)
+            if timings is not None:
+                timings[stage] = round(1000 * dt, 2)
+
+    async def retrieve(self, question: str, k: int, timings: dict = None, section: str = "", query_vec=None):
+        """`query_vec`: embedding já calculado (p.ex. no _scope da cache), para não embeber de novo."""
+        urls = rag_query.section_urls(section, self.site_tree)
+        return await self.run(
+            "retrieve",
+            lambda: rag_query.retrieve(self.db, question, k=k, meta_index=self.meta_index, bm25=self.bm25,
+                                       intents=self.intents, query_vec=query_vec, urls=urls),
+            timings=timings,
+        )
+
+    async def context(self, question: str, k: int, timings: dict = None, section: str = "", query_vec=None):
+        if self.reranker is None:
+            docs = await self.retrieve(question, k, timings, section, query_vec)
+        else:
+            docs = await self.retrieve(question, max(k, self.reranker.top_n), timings, section, query_vec)
+            docs = await self.run("rerank", self.reranker.rerank, question, docs, timings=timings)
+        return await self.run("build_context", rag_query.build_context, docs, question, self.count_tokens,
+                              timings=timings)
+
+    def _scope(self, question: str, section: str = "") -> tuple:
+        """(âmbito da pergunta, embedding); o embedding serve à intenção e à cache (lookup e store)."""
+        query_vec = self.db.embeddings.embed_query(question)
+        return rag_query.cache_scope(question, self.meta_index, self.intents, query_vec, section), query_vec
+
+    async def cached(self, question: str, timings: dict = None, section: str = ""):
+        """(resultado da cache de respostas ou None, âmbito da pergunta, embedding da pergunta ou None)."""
+        if self.answer_cache is None:
+            return None, "", None
+        scope, query_vec = await self.run("cache_scope", self._scope, question, section, timings=timings)
+        hit = await self.run("answer_cache", self.answer_cache.lookup, question, scope, query_vec, timings=timings)
+        return hit, scope, query_vec
+
+    async def structured(self, question: str, timings: dict = None):
+        """Resposta das tabelas dos planos de estudo, ou None."""
+        if self.planos is None:
+            return None
+        return await self.run("structured", rag_query.structured_answer, question, self.planos, timings=timings)
+
+    async def answer(self, question: str, k: int, timings: dict = None, section: str = "") -> dict:
+        structured = await self.structured(question, timings)
+        if structured:
+            return structured
+        hit, scope, query_vec = await self.cached(question, timings, section)
+        if hit:
+            return {"answer": hit["answer"], "sources": hit["sources"], "cached": hit["match"]}
+        pack = await self.context(question, k, timings, section, query_vec)
+        if not pack["context"]:
+            return {"answer": rag_query.NO_ANSWER, "sources": []}
+        text = await self.run("answer", rag_query.answer, self.llm, question, pack["context"], timings=timings)
+        if self.answer_cache is not None:
+            await self.run("answer_cache_store", self.answer_cache.store, question, text, pack["sources"], scope,
+                           query_vec)
+        return {"answer": text, "sources": pack["sources"], "tokens": pack["tokens"]}
+
+    async def answer_stream(self, question: str, ctx: str, timings: dict):
+        """Tokens da resposta à medida que chegam; regista TTFT e duração da geração."""
+        async with self.llm_slots:
+            t0 = time.perf_counter()
+            first = None
+            try:
+                async for token in rag_query.answer_astream(self.llm, question, ctx):
+                    if first is None:
+                        first = time.perf_counter() - t0
+                        timings["first_token"] = round(1000 * first, 2)
+                        self.stats.record("first_token", first)
+                    yield token
+            except Exception:
+                self.stats.error("answer_stream")
+                raise
+            finally:
+                dt = time.perf_counter() - t0
+                timings["answer_stream"] = round(1000 * dt, 2)
+                self.stats.record("answer_stream", dt)
+
+
+# ---------- middlewares ----------
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Content-Type",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+}
+
+
+@web.middleware
+async def cors_middleware(request: web.Request, handler):
+    if request.method == "OPTIONS":
+        resp = web.Response()
+    else:
+        resp = await handler(request)
+    if not resp.prepared:  # respostas em streaming já enviaram os cabeçalhos
+        resp.headers.update(CORS_HEADERS)
+    return resp
+
+
+@web.middleware
+async def admission_middleware(request: web.Request, handler):
+    """Limita pedidos em curso; acima do limite responde 503 (backpressure para o cliente)."""
+    service: RagService = request.app["service"]
+    if request.method != "POST":
+        return await handler(request)
+    if service.pending >= service.max_pending:
+        return _json_response({"error": "Servidor ocupado, tenta novamente."}, status=503)
+    service.pending += 1
+    t0 = time.perf_counter()
+    try:
+        return await handler(request)
+    finally:
+        service.pending -= 1
+        service.stats.record("request", time.perf_counter() - t0)
+
+
+# ---------- handlers ----------
+async def handle_retrieve(request: web.Request):
+    service: RagService = request.app["service"]
+    question, k, section = await _read_question(request)
+    timings = {}
+    docs = await service.retrieve(question, k, timings, section)
+    return _json_response({"chunks": [_doc_to_json(d) for d in docs], "timings_ms": timings})
+
+
+async def handle_context(request: web.Request):
+    service: RagService = request.app["service"]
+    question, k, section = await _read_question(request)
+    timings = {}
+    pack = await service.context(question, k, timings, section)
+    return _json_response({**pack, "timings_ms": timings})
+
+
+async def handle_answer(request: web.Request):
+    service: RagService = request.app["service"]
+    question, k, section = await _read_question(request)
+    timings = {}
+    result = await service.answer(question, k, timings, section)
+    return _json_response({**result, "timings_ms": timings})
+
+
+async def handle_answer_stream(request: web.Request):
+    """Resposta em Server-Sent Events: um evento `token` por token, depois `sources` e `done`."""
+    service: RagService = request.app["service"]
+    question, k, section = await _read_question(request)
+    t0 = time.perf_counter()
+    timings = {}
+    structured = await service.structured(question, timings)
+    if structured:
+        hit, scope, query_vec = ({"answer": structured["answer"], "sources": structured["sources"],
+                                  "match": "structured"}, "", None)
+    else:
+        hit, scope, query_vec = await service.cached(question, timings, section)
+    pack = ({"context": "", "sources": hit["sources"]} if hit
+            else await service.context(question, k, timings, section, query_vec))
+
+    resp = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream; charset=utf-8",
+        "Cache-Control": "no-cache",
+        **CORS_HEADERS,
+    })
+    await resp.prepare(request)
+
+    async def send(event: str, data) -> None:
+        await resp.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    if hit:
+        timings["ttft"] = round(1000 * (time.perf_counter() - t0), 2)
+        timings["cached"] = hit["match"]
+        await send("token", {"t": hit["answer"]})
+    elif not pack["context"]:
+        await send("token", {"t": rag_query.NO_ANSWER})
+    else:
+        tokens = []
+        async for token in service.answer_stream(question, pack["context"], timings):
+            if "ttft" not in timings:
+                timings["ttft"] = round(1000 * (time.perf_counter() - t0), 2)
+            tokens.append(token)
+            await send("token", {"t": token})
+        if service.answer_cache is not None:
+            # store embebe a pergunta (HTTP bloqueante): no pool, para não parar os outros streams
+            await service.run("answer_cache_store", service.answer_cache.store, question,
+                              "".join(tokens).strip(), pack["sources"], scope, query_vec)
+    timings["total"] = round(1000 * (time.perf_counter() - t0), 2)
+    await send("sources", pack["sources"])
+    await send("done", {"timings_ms": timings, "tokens": pack.get("tokens")})
+    await resp.write_eof()
+    return resp
+
+
+async def handle_chat(request: web.Request):
+    """Compatível com o frontend (ChatWindow.jsx): {"message"} → {"reply"}."""
+    service: RagService = request.app["service"]
+    question, k, section = await _read_question(request)
+    try:
+        result = await service.answer(question, k, section=section)
+    except Exception as e:
+        return _json_response({"reply": f"⚠️ Erro: {e}", "sources": []}, status=500)
+    reply = result["answer"]
+    if result["sources"]:
+        reply += "\n\n🔗 Fontes:\n" + "\n".join(f"- {s.get('title') or s['url']}: {s['url']}" for s in result["sources"])
+    return _json_response({"reply": reply, "sources": result["sources"]})
+
+
+async def handle_health(request: web.Request):
+    service: RagService = request.app["service"]
+    return _json_response({
+        "status": "ok",
+        "llm": service.llm.name if hasattr(service.llm, "stats") else service.llm_name,
+        "uptime_s": round(time.time() - service.started_at, 1),
+        "pending": service.pending,
+    })
+
+
+async def handle_metrics(request: web.Request):
+    service: RagService = request.app["service"]
+    if request.query.get("format") == "prometheus":
+        return web.Response(text=REGISTRY.prometheus_text(), content_type="text/plain")
+    return _json_response({
+        "pending": service.pending,
+        "stages": service.stats.summary(),
+        "answer_cache": service.answer_cache.stats() if service.answer_cache is not None else None,
+        "reranker": service.reranker.summary() if service.reranker is not None else None,
+        "llm": service.llm.stats() if hasattr(service.llm, "stats") else {"primary": service.llm_name},
+    })
+
+
+async def handle_options(request: web.Request):
+    return web.Response()
+
+
+def create_app(service: RagService) -> web.Application:
+    app = web.Application(middlewares=[cors_middleware, admission_middleware])
+    app["service"] = service
+    app.router.add_post("/retrieve", handle_retrieve)
+    app.router.add_post("/context", handle_context)
+    app.router.add_post("/answer", handle_answer)
+    app.router.add_post("/answer/stream", handle_answer_stream)
+    app.router.add_post("/api/chat", handle_chat)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_route("OPTIONS", "/{tail:.*}", handle_options)
+
+    async def on_cleanup(app):
+        app["service"].pool.shutdown(wait=False)
+
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    p = argparse.ArgumentParser(description="Serviço HTTP do AI-ISEL (RAG)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=5000)
+    p.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads para as etapas RAG")
+    p.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING, help="Pedidos em curso antes de 503")
+    p.add_argument("--stub", action="store_true", help="Usar LLM/embeddings falsos e índice em memória")
+    p.add_argument("--no-bm25", action="store_true", help="Só pesquisa vetorial (sem fusão com BM25)")
+    p.add_argument("--rerank", nargs="?", const=RERANK_MODEL, default=None,
+                   help="Ativar re-ranking (modelo cross-encoder, ou 'lexical')")
+    p.add_argument("--no-answer-cache", action="store_true", help="Desativar a cache de respostas")
+    p.add_argument("--cache-threshold", type=float, default=None, help="Limiar de similaridade da cache semântica")
+    args = p.parse_args()
+
+    print("🔍 A carregar base vetorial, embeddings e LLM (uma só vez)...")
+    db, meta_index, llm, llm_name = load_stub_backends() if args.stub else load_backends()
+    bm25 = None
+    if not args.no_bm25:
+        bm25 = stub_bm25_index(db) if args.stub else rag_query.load_bm25_index()
+    reranker = load_reranker(args.rerank) if args.rerank else None
+    if args.stub:
+        from intent_classifier import IntentClassifier
+        intents = IntentClassifier.build_from_collection(db._collection)
+    else:
+        intents = rag_query.load_intent_classifier()
+    site_tree = rag_query.load_site_tree()
+    planos = rag_query.load_planos_store()
+    if planos is not None:
+        print(f"🗃️ Planos de estudo: {len(planos.cursos)} cursos (respostas estruturadas ativas)")
+    if site_tree is not None:
+        print(f"🌳 Árvore do site: {len(site_tree)} páginas (filtro \"section\" ativo)")
+    answer_cache = None
+    if not args.no_answer_cache:
+        answer_cache = AnswerCache(db.embeddings, rag_query.CHROMA_PATH)
+        if args.cache_threshold is not None:
+            answer_cache.threshold = args.cache_threshold
+    if not args.stub:
+        warm = rag_query.prewarm(llm, llm_name)
+        if warm:
+            print(f"🔥 Modelo pré-aquecido em {warm:.1f} s (keep_alive={rag_query.OLLAMA_KEEP_ALIVE})")
+    service = RagService(db, meta_index, llm, llm_name, args.workers, args.max_pending,
+                         answer_cache, bm25, reranker, intents, site_tree, planos)
+    print(f"🤖 AI-ISEL API pronta (LLM: {llm_name}) em http://{args.host}:{args.port}")
+    web.run_app(create_app(service), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
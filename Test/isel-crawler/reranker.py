@@ -0,0 +1,134 @@
+"""
+Re-ranking opcional dos chunks recuperados (AI-ISEL), entre retrieve e build_context.
+
+O retrieve traz `top_n` candidatos; um cross-encoder pequeno, local e em CPU
+(por omissão um MiniLM multilingue, com quantização dinâmica int8) dá uma
+pontuação a cada par (pergunta, chunk) e só os `keep` melhores seguem para o LLM.
+ - as pontuações são calculadas em lotes;
+ - há um orçamento de latência por pergunta, de melhor esforço: o 1.º lote é
+   sempre pontuado (e mantém a estimativa atualizada, mesmo depois de um lote
+   lento); antes de cada lote seguinte estima-se o tempo (média móvel dos lotes)
+   e, se não couber, pára-se — os candidatos não pontuados mantêm a ordem
+   original, a seguir aos pontuados. Um lote lento pode passar do orçamento;
+ - se o modelo não existir (sentence-transformers não instalado, erro ao
+   carregar) ou falhar, devolve-se a ordem original.
+Com RERANK_MODEL=lexical usa-se um scorer leve (sobreposição de termos), sem modelo.
+"""
+
+import os
+import time
+import threading
+from typing import Callable, List, Optional, Sequence
+
+from bm25_index import tokenize
+from metrics import StageLatencies
+
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "20"))
+RERANK_KEEP = int(os.getenv("RERANK_KEEP", "5"))
+RERANK_BATCH = int(os.getenv("RERANK_BATCH", "8"))
+RERANK_BUDGET = float(os.getenv("RERANK_BUDGET", "0.4"))  # segundos por pergunta (melhor esforço)
+RERANK_MAX_LENGTH = 384
+
+Scorer = Callable[[str, Sequence[str]], List[float]]
+
+
+def lexical_scorer(query: str, texts: Sequence[str]) -> List[float]:
+    """Fração dos termos da pergunta presentes em cada texto (sem modelo)."""
+    q = set(tokenize(query))
+    if not q:
+        return [0.0] * len(texts)
+    return [len(q & set(tokenize(t))) / len(q) for t in texts]
+
+
+def load_cross_encoder(model_name: str = RERANK_MODEL, quantize: bool = True) -> Optional[Scorer]:
+    """Scorer com um CrossEncoder do sentence-transformers (ou None se indisponível)."""
+    try:
+        from sentence_transformers import CrossEncoder
+    except Exception:
+        print("⚠️ sentence-transformers não instalado — re-ranking desativado.")
+        return None
+    try:
+        model = CrossEncoder(model_name, max_length=RERANK_MAX_LENGTH, device="cpu")
+        if quantize:
+            import torch
+            model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+    except Exception as e:
+        print(f"⚠️ Falha ao carregar o re-ranker {model_name}: {e}")
+        return None
+
+    def score(query: str, texts: Sequence[str]) -> List[float]:
+        return [float(s) for s in model.predict([(query, t) for t in texts], batch_size=len(texts),
+                                                show_progress_bar=False)]
+    return score
+
+
+class Reranker:
+    """Reordena candidatos com um scorer, em lotes e dentro de um orçamento de latência."""
+
+    def __init__(self, scorer: Scorer, name: str = "", top_n: int = RERANK_TOP_N, keep: int = RERANK_KEEP,
+                 batch_size: int = RERANK_BATCH, budget_s: float = RERANK_BUDGET):
+        self.scorer = scorer
+        self.name = name
+        self.top_n = top_n
+        self.keep = keep
+        self.batch_size = batch_size
+        self.budget_s = budget_s
+        self.stats = StageLatencies()
+        self._lock = threading.Lock()
+        self._batch_s = 0.0  # média móvel do tempo por lote
+        self.counters = {"queries": 0, "partial": 0, "fallback": 0}
+
+    def rerank(self, query: str, docs: List, keep: int = None) -> List:
+        keep = keep or self.keep
+        if len(docs) <= 1:
+            return docs[:keep]
+        t0 = time.perf_counter()
+        candidates = docs[: self.top_n]
+        scores: List[float] = []
+        try:
+            for i in range(0, len(candidates), self.batch_size):
+                if i and time.perf_counter() - t0 + self._batch_s > self.budget_s:
+                    break  # o 1.º lote corre sempre, senão a estimativa nunca recuperaria
+                tb = time.perf_counter()
+                batch = candidates[i:i + self.batch_size]
+                scores.extend(self.scorer(query, [d.page_content for d in batch]))
+                dt = time.perf_counter() - tb
+                with self._lock:
+                    self._batch_s = dt if not self._batch_s else 0.8 * self._batch_s + 0.2 * dt
+        except Exception as e:
+            print(f"⚠️ Re-ranking falhou ({e}); a usar a ordem original.")
+            self.stats.error("rerank")
+            with self._lock:
+                self.counters["queries"] += 1
+                self.counters["fallback"] += 1
+            return docs[:keep]
+
+        scored = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        order = scored + list(range(len(scores), len(candidates)))
+        self.stats.record("rerank", time.perf_counter() - t0)
+        with self._lock:
+            self.counters["queries"] += 1
+            if not scores:
+                self.counters["fallback"] += 1
+            elif len(scores) < len(candidates):
+                self.counters["partial"] += 1
+        return [candidates[i] for i in order[:keep]]
+
+    def summary(self) -> dict:
+        with self._lock:
+            out = {"model": self.name, "top_n": self.top_n, "keep": self.keep,
+                   "budget_ms": round(1000 * self.budget_s, 1), **self.counters}
+        out["latency"] = self.stats.summary().get("rerank")
+        return out
+
+
+def load_reranker(model_name: str = RERANK_MODEL, **kwargs) -> Optional[Reranker]:
+    """Re-ranker pronto a usar (None se o modelo não estiver disponível)."""
+    if model_name == "lexical":
+        return Reranker(lexical_scorer, "lexical", **kwargs)
+    scorer = load_cross_encoder(model_name)
+    if scorer is None:
+        return None
+    scorer("aquecimento", ["ISEL"])  # 1.ª inferência (lenta) fora do orçamento das perguntas
+    return Reranker(scorer, model_name, **kwargs)
@@ -0,0 +1,151 @@
+"""
+Recuperação vetorial do AI-ISEL numa só pesquisa.
+
+O `similarity_search` do LangChain ignora `search_type`/`search_kwargs` (não havia
+MMR nenhum) e cada chamada volta a calcular o embedding da pergunta. Aqui:
+ 1) o embedding da pergunta é calculado uma única vez;
+ 2) uma só consulta à coleção Chroma traz `fetch_k` candidatos já filtrados
+    (`where`), com os respetivos vetores;
+ 3) com um índice BM25 (bm25_index.py), os resultados lexicais juntam-se aos
+    vetoriais por Reciprocal Rank Fusion (RRF);
+ 4) o MMR (Maximal Marginal Relevance) é feito localmente, vetorizado com NumPy;
+ 5) se o filtro não deixar candidatos, repete-se a consulta sem filtro com o
+    mesmo vetor (sem novo embedding).
+"""
+
+from typing import Dict, List, Optional, Sequence, Set
+
+import numpy as np
+from langchain_core.documents import Document
+
+FETCH_K_MIN = 20
+FETCH_K_FACTOR = 5
+MMR_LAMBDA = 0.3
+RRF_K = 60
+
+
+def fetch_k_for(k: int) -> int:
+    return max(FETCH_K_MIN, FETCH_K_FACTOR * k)
+
+
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def mmr_select(query_vec: Sequence[float], cand_vecs: np.ndarray, k: int,
+               lambda_mult: float = MMR_LAMBDA, relevance: Optional[np.ndarray] = None) -> List[int]:
+    """Índices (por ordem de escolha) dos k candidatos escolhidos por MMR.
+    lambda_mult=1 → só relevância; 0 → só diversidade. Sem `relevance`, usa o
+    cosseno com a pergunta."""
+    n = len(cand_vecs)
+    if n == 0 or k <= 0:
+        return []
+    cands = _normalize_rows(np.asarray(cand_vecs, dtype=np.float32))
+    q = _normalize_rows(np.asarray(query_vec, dtype=np.float32)[None, :])[0]
+    if relevance is None:
+        relevance = cands @ q
+    relevance = np.asarray(relevance, dtype=np.float32)
+    pairwise = cands @ cands.T
+
+    selected = [int(np.argmax(relevance))]
+    max_sim = pairwise[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < min(k, n):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_sim
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_sim, pairwise[best], out=max_sim)
+    return selected
+
+
+def vector_candidates(collection, query_vec: Sequence[float], fetch_k: int,
+                      where: Optional[dict] = None) -> Dict[str, list]:
+    """Uma consulta à coleção: {"ids", "documents", "metadatas", "embeddings", "distances"}."""
+    res = collection.query(
+        query_embeddings=[list(query_vec)],
+        n_results=fetch_k,
+        where=where,
+        include=["documents", "metadatas", "embeddings", "distances"],
+    )
+    out = {}
+    for key in ("ids", "documents", "metadatas", "embeddings", "distances"):
+        values = res.get(key)
+        out[key] = list(values[0]) if values is not None and len(values) else []
+    return out
+
+
+def rrf_scores(rankings: List[List[str]], k: int = RRF_K) -> Dict[str, float]:
+    """Reciprocal Rank Fusion: soma de 1/(k + posição) em cada ranking."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, cid in enumerate(ranking, start=1):
+            scores[cid] = scores.get(cid, 0.0) + 1.0 / (k + rank)
+    return scores
+
+
+def fuse_lexical(collection, cands: Dict[str, list], lexical_ids: List[str], fetch_k: int,
+                 where: Optional[dict] = None) -> Dict[str, list]:
+    """Junta os candidatos vetoriais com os do BM25 (RRF). Os que só o BM25 encontrou
+    vêm da coleção num único `get` (com o mesmo filtro), sem novo embedding.
+    Devolve os candidatos por ordem de fusão, com "relevance" normalizada em [0, 1]."""
+    by_id = {cid: i for i, cid in enumerate(cands["ids"])}
+    missing = [cid for cid in lexical_ids if cid not in by_id]
+    extra = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+    if missing:
+        res = collection.get(ids=missing, where=where, include=["documents", "metadatas", "embeddings"])
+        for key in extra:
+            values = res.get(key)
+            extra[key] = list(values) if values is not None else []
+    extra_by_id = {cid: i for i, cid in enumerate(extra["ids"])}
+
+    lexical = [cid for cid in lexical_ids if cid in by_id or cid in extra_by_id]
+    scores = rrf_scores([cands["ids"], lexical])
+    ranked = sorted(scores, key=scores.get, reverse=True)[:fetch_k]
+
+    out = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+    for cid in ranked:
+        src, i = (cands, by_id[cid]) if cid in by_id else (extra, extra_by_id[cid])
+        for key in out:
+            out[key].append(src[key][i])
+    top = scores[ranked[0]] if ranked else 1.0
+    out["relevance"] = [scores[cid] / top for cid in ranked]
+    return out
+
+
+def to_documents(cands: Dict[str, list], order: List[int]) -> List[Document]:
+    return [
+        Document(id=cands["ids"][i], page_content=cands["documents"][i] or "",
+                 metadata=cands["metadatas"][i] or {})
+        for i in order
+    ]
+
+
+def search(db, query: str, k: int = 8, where: Optional[dict] = None, fetch_k: Optional[int] = None,
+           lambda_mult: float = MMR_LAMBDA, query_vec: Optional[Sequence[float]] = None,
+           bm25=None, allowed: Optional[Set[str]] = None) -> List[Document]:
+    """Pesquisa MMR com um único embedding; sem resultados filtrados, repete sem filtro.
+    Com `bm25`, funde os resultados lexicais (restritos a `allowed`, se dado) por RRF."""
+    if query_vec is None:
+        query_vec = db.embeddings.embed_query(query)
+    fetch_k = fetch_k or fetch_k_for(k)
+
+    cands = vector_candidates(db._collection, query_vec, fetch_k, where)
+    if not cands["ids"] and where:
+        where, allowed = None, None
+        cands = vector_candidates(db._collection, query_vec, fetch_k, None)
+
+    relevance = None
+    if bm25 is not None:
+        lexical = [cid for cid, _ in bm25.search(query, fetch_k, allowed)]
+        if lexical:
+            cands = fuse_lexical(db._collection, cands, lexical, fetch_k, where)
+            relevance = np.asarray(cands["relevance"], dtype=np.float32)
+    if not cands["ids"]:
+        return []
+    order = mmr_select(query_vec, np.asarray(cands["embeddings"], dtype=np.float32), k, lambda_mult, relevance)
+    return to_documents(cands, order)
@@ -1,8 +1,10 @@
 # run.py
 import argparse
 from crawler import Crawler, CrawlerConfig
+from metrics import instrumented_run
 
 
+@instrumented_run("crawl")
 def main():
     p = argparse.ArgumentParser(
         description="Crawler simples para extrair hiperligações (links) e conteúdos de um site."
@@ -29,6 +31,11 @@ def main():
         default=None,
         help="Caminho para o ficheiro NDJSON onde guardar os conteúdos extraídos (ex.: pages_content.jsonl)",
     )
+    p.add_argument(
+        "--site-tree",
+        default=None,
+        help="Índice da árvore do site (site_tree.npz): semeia a fila com as páginas conhecidas e marca a secção",
+    )
 
     args = p.parse_args()
 
@@ -42,6 +49,7 @@ def main():
         exclude_prefixes=args.exclude,
         max_pages=args.max_pages,
         extract_content=args.extract_content,  # ⬅️ ativa o modo de extração
+        site_tree=args.site_tree,
     )
 
     cr = Crawler(args.root, cfg)
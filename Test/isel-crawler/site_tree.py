@@ -0,0 +1,240 @@
+"""
+Índice compilado da árvore do site do ISEL (data/isel_site_tree.csv).
+
+O CSV tem, por URL, a hierarquia Grupo → Subgrupo → … → Nível 9, que é
+exatamente a sequência de segmentos do caminho. Aqui essa hierarquia vira uma
+trie de segmentos, numerada em pré-ordem e com os URLs ordenados pela mesma
+ordem, de modo que todos os URLs de uma subárvore são um intervalo contíguo:
+ - "todas as páginas abaixo de /ensino/programas-de-mobilidade" = descer pelos
+   segmentos (dicionário por nó) e devolver urls[início:fim], sem percorrer nada;
+ - "secção deste URL" = o nó conhecido mais profundo no caminho do URL
+   (funciona também para URLs que não estão no CSV);
+ - guardado num .npz comprimido (tabelas de strings + arrays int32), que carrega
+   em milissegundos; é recompilado sozinho quando o CSV é mais recente.
+Os segmentos comparam-se em minúsculas (o Drupal do site não distingue).
+
+Uso:
+    python site_tree.py --build
+    python site_tree.py --under /ensino/programas-de-mobilidade
+    python site_tree.py --section https://www.isel.pt/curso/licenciatura/leic/plano-de-estudos
+"""
+
+import os
+import csv
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+SITE_TREE_CSV = Path(os.getenv("SITE_TREE_CSV", "../../data/isel_site_tree.csv"))
+SITE_TREE_PATH = Path(os.getenv("SITE_TREE_PATH", "site_tree.npz"))
+LEVEL_NAMES = ["Grupo", "Subgrupo", "Sub-subgrupo", "Sub-sub-subgrupo", "Sub-sub-sub-subgrupo",
+               "Nível 6", "Nível 7", "Nível 8", "Nível 9"]
+
+
+def path_segments(url_or_path: str) -> List[str]:
+    """Segmentos do caminho em minúsculas ("https://x/Ensino/A/" e "/ensino/a" → ["ensino", "a"])."""
+    value = (url_or_path or "").strip().split("#")[0].split("?")[0]
+    path = urlparse(value).path if "://" in value else value
+    return [s.lower() for s in path.split("/") if s]
+
+
+def _pack_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = blob.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+class SiteTree:
+    """Trie de segmentos de caminho com os URLs de cada subárvore num intervalo contíguo."""
+
+    def __init__(self, segments: List[str], parent, url_start, url_end, own_end, urls: List[str],
+                 level_names: List[str] = None):
+        self.segments = segments                        # segmento de cada nó (nó 0 = raiz, "")
+        self.parent = np.asarray(parent, dtype=np.int32)
+        self.url_start = np.asarray(url_start, dtype=np.int32)
+        self.url_end = np.asarray(url_end, dtype=np.int32)  # fim da subárvore
+        self.own_end = np.asarray(own_end, dtype=np.int32)  # fim dos URLs do próprio nó
+        self.urls = urls
+        self.level_names = list(level_names or LEVEL_NAMES)
+        self._child = {(int(p), s): i for i, (p, s) in enumerate(zip(self.parent, self.segments)) if i}
+
+    # ---------- construção ----------
+    @classmethod
+    def build(cls, urls: Iterable[str], level_names: List[str] = None) -> "SiteTree":
+        nested: Dict = {}
+        for url in dict.fromkeys(u.strip() for u in urls if u and u.strip()):
+            node = nested
+            for seg in path_segments(url):
+                node = node.setdefault(seg, {})
+            node.setdefault(None, []).append(url)
+
+        segments, parent, url_start, url_end, own_end, ordered = [], [], [], [], [], []
+
+        def visit(node: Dict, seg: str, par: int) -> None:
+            i = len(segments)
+            segments.append(seg)
+            parent.append(par)
+            url_start.append(len(ordered))
+            ordered.extend(sorted(node.get(None, [])))
+            own_end.append(len(ordered))
+            url_end.append(0)
+            for child in sorted(k for k in node if k is not None):
+                visit(node[child], child, i)
+            url_end[i] = len(ordered)
+
+        visit(nested, "", -1)
+        return cls(segments, parent, url_start, url_end, own_end, ordered, level_names)
+
+    @classmethod
+    def from_csv(cls, path: Path = SITE_TREE_CSV) -> "SiteTree":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f, delimiter=";")
+            urls = [row.get("URL", "") for row in reader]
+            levels = [c for c in (reader.fieldnames or []) if c != "URL"]
+        return cls.build(urls, levels or None)
+
+    def save(self, path: Path = SITE_TREE_PATH) -> None:
+        seg_blob, seg_off = _pack_strings(self.segments)
+        url_blob, url_off = _pack_strings(self.urls)
+        lvl_blob, lvl_off = _pack_strings(self.level_names)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, seg_blob=seg_blob, seg_off=seg_off, url_blob=url_blob, url_off=url_off,
+                                lvl_blob=lvl_blob, lvl_off=lvl_off, parent=self.parent,
+                                url_start=self.url_start, url_end=self.url_end, own_end=self.own_end)
+
+    @classmethod
+    def load(cls, path: Path = SITE_TREE_PATH) -> Optional["SiteTree"]:
+        if not Path(path).exists():
+            return None
+        with np.load(path) as z:
+            return cls(_unpack_strings(z["seg_blob"], z["seg_off"]), z["parent"], z["url_start"], z["url_end"],
+                       z["own_end"], _unpack_strings(z["url_blob"], z["url_off"]),
+                       _unpack_strings(z["lvl_blob"], z["lvl_off"]))
+
+    @classmethod
+    def load_or_build(cls, path: Path = SITE_TREE_PATH, csv_path: Path = SITE_TREE_CSV) -> Optional["SiteTree"]:
+        """Carrega o .npz; se não existir ou o CSV for mais recente, compila-o de novo (None sem CSV)."""
+        path, csv_path = Path(path), Path(csv_path)
+        if path.exists() and (not csv_path.exists() or path.stat().st_mtime >= csv_path.stat().st_mtime):
+            return cls.load(path)
+        if not csv_path.exists():
+            return None
+        tree = cls.from_csv(csv_path)
+        tree.save(path)
+        return tree
+
+    # ---------- consulta ----------
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def _walk(self, url_or_path: str) -> Tuple[int, int]:
+        """(nó mais profundo encontrado, nº de segmentos percorridos)."""
+        node, depth = 0, 0
+        for seg in path_segments(url_or_path):
+            child = self._child.get((node, seg))
+            if child is None:
+                break
+            node, depth = child, depth + 1
+        return node, depth
+
+    def find(self, prefix: str) -> int:
+        """Nó que corresponde exatamente ao caminho (-1 se não existir)."""
+        node, depth = self._walk(prefix)
+        return node if depth == len(path_segments(prefix)) else -1
+
+    def __contains__(self, url: str) -> bool:
+        node = self.find(url)
+        return node >= 0 and self.own_end[node] > self.url_start[node]
+
+    def urls_under(self, prefix: str) -> List[str]:
+        """Todos os URLs da subárvore de `prefix` (caminho ou URL), incluindo o próprio."""
+        node = self.find(prefix)
+        return [] if node < 0 else self.urls[self.url_start[node]:self.url_end[node]]
+
+    def count_under(self, prefix: str) -> int:
+        node = self.find(prefix)
+        return 0 if node < 0 else int(self.url_end[node] - self.url_start[node])
+
+    def path_of(self, node: int) -> str:
+        parts = []
+        while node > 0:
+            parts.append(self.segments[node])
+            node = int(self.parent[node])
+        return "/" + "/".join(reversed(parts))
+
+    def section_of(self, url: str, depth: Optional[int] = None) -> str:
+        """Caminho do nó conhecido mais profundo no caminho do URL (limitado a `depth` níveis)."""
+        node, found = self._walk(url)
+        if found == 0:
+            return ""
+        path = self.path_of(node)
+        if depth:
+            path = "/" + "/".join(path.strip("/").split("/")[:depth])
+        return path
+
+    def levels_of(self, url: str) -> Dict[str, str]:
+        """Hierarquia do URL com os nomes de nível do CSV (Grupo, Subgrupo, ...)."""
+        section = self.section_of(url)
+        segs = section.strip("/").split("/") if section else []
+        return {name: (segs[i] if i < len(segs) else "") for i, name in enumerate(self.level_names)}
+
+    def children(self, prefix: str = "/") -> List[Tuple[str, int]]:
+        """[(segmento, nº de URLs na subárvore)] dos filhos diretos de `prefix`."""
+        node = self.find(prefix)
+        if node < 0:
+            return []
+        kids = np.flatnonzero(self.parent == node)
+        return [(self.segments[c], int(self.url_end[c] - self.url_start[c])) for c in kids]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Índice compilado da árvore do site (isel_site_tree.csv)")
+    p.add_argument("--csv", default=str(SITE_TREE_CSV), help="CSV da árvore do site (separado por ';')")
+    p.add_argument("--out", default=str(SITE_TREE_PATH), help="Ficheiro .npz do índice")
+    p.add_argument("--build", action="store_true", help="Recompilar o índice a partir do CSV")
+    p.add_argument("--under", default=None, help="Listar os URLs abaixo deste caminho")
+    p.add_argument("--section", default=None, help="Secção de um URL")
+    args = p.parse_args()
+
+    if args.build:
+        t0 = time.perf_counter()
+        tree = SiteTree.from_csv(Path(args.csv))
+        tree.save(Path(args.out))
+        print(f"🌳 {len(tree)} URLs, {len(tree.segments)} nós compilados em {1000 * (time.perf_counter() - t0):.0f} ms "
+              f"→ {args.out} ({os.path.getsize(args.out) / 1024:.0f} KB)")
+
+    t0 = time.perf_counter()
+    tree = SiteTree.load_or_build(Path(args.out), Path(args.csv))
+    if tree is None:
+        print(f"❌ Nem {args.out} nem {args.csv} encontrados.")
+        return
+    print(f"⚡ Índice carregado em {1000 * (time.perf_counter() - t0):.1f} ms ({len(tree)} URLs)")
+
+    if args.under:
+        urls = tree.urls_under(args.under)
+        print(f"\n📂 {len(urls)} páginas abaixo de {args.under}:")
+        for u in urls:
+            print(f" - {u}")
+    if args.section:
+        print(f"\n📍 Secção: {tree.section_of(args.section) or '(desconhecida)'}")
+        for name, seg in tree.levels_of(args.section).items():
+            if seg:
+                print(f"   {name}: {seg}")
+    if not args.under and not args.section:
+        print("\n🌳 Secções de topo:")
+        for seg, n in tree.children("/"):
+            print(f" - /{seg}: {n} páginas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Testes das respostas estruturadas dos planos de estudo (planos_store.py):
+só perguntas claramente agregadas são respondidas; as restantes seguem pelo RAG.
+
+Uso:
+    python -m pytest -q test_planos_store.py
+"""
+
+import pytest
+
+from planos_store import PlanosStore, parse_ordinal
+
+URL = "https://www.isel.pt/curso/licenciatura/leic/plano-de-estudos"
+
+
+def _row(ano: int, semestre: int, uc: str, area: str, ects: str) -> dict:
+    return {"Ano": f"{ano}.º Ano", "Semestre": f"{semestre}.º Semestre", "Unidade Curricular": uc,
+            "Área científica": area, "ECTS": ects, "FUC_PDF": f"https://www.isel.pt/fuc/{uc}.pdf"}
+
+
+PLANO = {
+    "url": URL,
+    "curso": "Licenciatura em Engenharia Informática e de Computadores",
+    "curso_sigla": "leic",
+    "degree_level": "licenciatura",
+    "tabelas": [
+        {"id": 1, "ano": "1.º Ano", "semestre": "1.º Semestre", "rows": [
+            _row(1, 1, "Programação", "Informática", "6"),
+            _row(1, 1, "Análise Matemática I", "Matemática", "7,5"),
+            _row(1, 1, "Física", "Física", "4,5"),
+        ]},
+        {"id": 2, "ano": "1.º Ano", "semestre": "2.º Semestre", "rows": [
+            _row(1, 2, "Algoritmos e Estruturas de Dados", "Informática", "6"),
+        ]},
+        {"id": 3, "ano": "2.º Ano", "semestre": "1.º Semestre", "rows": [
+            _row(2, 1, "Sistemas Operativos", "Informática", "6"),
+            _row(2, 1, "Probabilidades e Estatística", "Matemática", "6"),
+        ]},
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    s = PlanosStore.build([PLANO], tmp_path_factory.mktemp("planos") / "planos.sqlite")
+    yield s
+    s.close()
+
+
+@pytest.mark.parametrize("question", [
+    "Como pedir creditação de créditos na LEIC?",
+    "Qual o valor da propina por ECTS na LEIC?",
+    "quando é o exame de Programação na LEIC?",
+    "Em que disciplinas da LEIC há exame oral?",
+    "Quantos ECTS preciso para pedir equivalência na LEIC?",
+    "Que disciplinas da LEIC têm avaliação contínua?",
+    "Os ECTS da LEIC são reconhecidos no estrangeiro?",
+    "Quem é o docente de Programação na LEIC?",
+    "Quantos ECTS tem o 1.º ano?",  # sem curso reconhecido
+])
+def test_non_aggregate_questions_fall_through(store, question):
+    assert store.answer(question) is None
+
+
+def test_ects_total_of_a_year(store):
+    r = store.answer("Quantos ECTS tem o 1.º ano da LEIC?")
+    assert r["structured"]["kind"] == "ects"
+    assert "24 ECTS" in r["answer"] and "4 unidades curriculares" in r["answer"]
+
+
+def test_total_credits_of_course(store):
+    r = store.answer("Qual o total de créditos da LEIC?")
+    assert r["structured"]["kind"] == "ects"
+    assert "36 ECTS" in r["answer"]
+
+
+def test_semester_without_year_is_broken_down_by_year(store):
+    r = store.answer("quantas UCs tem o 1.º semestre de LEIC?")
+    assert r["structured"]["kind"] == "count"
+    assert "1.º semestre de cada ano" in r["answer"]
+    assert "1.º ano: **3 unidades curriculares** (18 ECTS)" in r["answer"]
+    assert "2.º ano: **2 unidades curriculares** (12 ECTS)" in r["answer"]
+
+
+def test_count_with_year_and_semester(store):
+    r = store.answer("Quantas unidades curriculares tem o 1.º ano, 1.º semestre da LEIC?")
+    assert "**3 unidades curriculares**" in r["answer"]
+    assert "cada ano" not in r["answer"]
+
+
+def test_list_of_a_year(store):
+    r = store.answer("Quais as disciplinas do 2.º ano da LEIC?")
+    assert r["structured"]["kind"] == "list"
+    assert "Sistemas Operativos" in r["answer"] and "Programação" not in r["answer"]
+
+
+def test_when_is_a_uc(store):
+    r = store.answer("Em que semestre é Programação na LEIC?")
+    assert r["structured"]["kind"] == "uc"
+    assert "1.º ano, 1.º semestre" in r["answer"]
+
+
+def test_area_ects(store):
+    r = store.answer("Quantos ECTS de Matemática tem a LEIC?")
+    assert r["structured"]["kind"] == "area"
+    assert "13,5 ECTS" in r["answer"]
+
+
+def test_count_and_list_are_filtered_by_area(store):
+    r = store.answer("Quantas disciplinas de Matemática tem a LEIC?")
+    assert r["structured"]["kind"] == "count"
+    assert "**2 unidades curriculares** (13,5 ECTS)" in r["answer"]
+    r = store.answer("Quais as disciplinas de Informática do 1.º ano da LEIC?")
+    assert "Programação" in r["answer"] and "Algoritmos" in r["answer"]
+    assert "Física" not in r["answer"] and "Sistemas Operativos" not in r["answer"]
+    r = store.answer("Quantos ECTS de Matemática tem o 2.º ano da LEIC?")
+    assert "**6 ECTS** em 1 unidade curricular" in r["answer"]
+
+
+@pytest.mark.parametrize("text, word, expected", [
+    ("2.º Ano", "ano", 2),
+    ("Semestre 1", "semestre", 1),
+    ("primeiro semestre", "semestre", 1),
+    ("plano 3", "ano", None),
+    ("humano 2", "ano", None),
+    ("curso de 3 anos", "ano", None),
+])
+def test_parse_ordinal_needs_whole_words(text, word, expected):
+    assert parse_ordinal(text, word) == expected
@@ -0,0 +1,146 @@
+"""
+Paridade e tempos do filtro de navegação do section_crawler.py.
+
+Compara, para todos os links de cada página HTML guardada, a versão de
+referência (is_in_navigation, que sobe de cada link até à raiz) com a anotação
+numa só passagem (anotar_navegacao + em_navegacao), nos dois modos (categoria
+"Cursos" e restantes), e mede o tempo de cada uma.
+
+Sem páginas guardadas, usa páginas sintéticas ao estilo do site (Drupal: menus
+aninhados, banner-curso, views-field-field-menu, menu--ensino).
+
+Uso:
+    python bench_navegacao.py --guardar ../data/html      # guarda as páginas de SECTIONS
+    python bench_navegacao.py --html-dir ../data/html
+    python bench_navegacao.py --sinteticas 50 --out nav.json
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+
+from bs4 import BeautifulSoup
+
+from sections import SECTIONS
+from section_crawler import SectionCrawler, anotar_navegacao, em_navegacao, is_in_navigation, normalizar_url
+
+MODOS = ("", "Cursos")
+
+
+def pagina_sintetica(i, links_por_bloco=25, profundidade=12):
+    """HTML com a estrutura típica das páginas do ISEL (e casos das exceções)."""
+    def aninhar(conteudo, n, cls="field__item"):
+        for k in range(n):
+            conteudo = f'<div class="{cls} nivel-{k}">{conteudo}</div>'
+        return conteudo
+
+    def bloco(prefixo):
+        return "".join(f'<a href="/{prefixo}/{i}/{j}">{prefixo} {j}</a>' for j in range(links_por_bloco))
+
+    return f"""<html><body>
+<header><nav class="navbar"><ul class="menu">{bloco("menu-global")}</ul></nav></header>
+<div class="cookie-banner">{bloco("cookies")}</div>
+<div class="dialog-off-canvas-main-canvas"><div class="layout-container">
+<main role="main">
+ {aninhar(bloco("conteudo"), profundidade)}
+ <div class="banner-curso">{aninhar('<ul class="menu">' + bloco("curso") + '</ul>', profundidade // 2)}</div>
+ <div class="views-field-field-menu"><div class="menu-item">{bloco("field-menu")}</div></div>
+ <div class="menu--ensino"><ul class="menu">{bloco("ensino")}</ul></div>
+ <div class="skip-link">{bloco("skip")}</div>
+ {aninhar('<div class="submenu">' + bloco("submenu") + '</div>', profundidade)}
+ <a href="/curso/licenciatura/x/{i}" role="navigation">role</a>
+ <aside>{bloco("aside")}</aside>
+</main></div></div>
+<footer>{bloco("rodape")}</footer>
+</body></html>"""
+
+
+def carregar_paginas(args):
+    if args.html_dir:
+        paths = sorted(glob.glob(os.path.join(args.html_dir, "*.html")))
+        return [(os.path.basename(p), open(p, encoding="utf-8").read()) for p in paths]
+    return [(f"sintetica-{i}", pagina_sintetica(i)) for i in range(args.sinteticas)]
+
+
+def guardar_paginas(pasta, workers):
+    """Guarda o HTML das páginas raiz de SECTIONS (para testes offline)."""
+    os.makedirs(pasta, exist_ok=True)
+    urls = [normalizar_url(u) for subcats in SECTIONS.values() for u in subcats.values()]
+    crawler = SectionCrawler(workers=workers)
+    urls = list(dict.fromkeys(urls))
+    n = 0
+    # o crawler só guarda os links; aqui pede-se o HTML diretamente
+    for url, html in zip(urls, crawler.pool.map(crawler._get, urls)):
+        if html:
+            nome = url.split("://", 1)[-1].strip("/").replace("/", "__") or "raiz"
+            with open(os.path.join(pasta, nome + ".html"), "w", encoding="utf-8") as f:
+                f.write(html)
+            n += 1
+    crawler.close()
+    print(f"📁 {n} páginas guardadas em {pasta}")
+
+
+def comparar(nome, html):
+    soup = BeautifulSoup(html, "html.parser")
+    links = soup.find_all("a", href=True)
+    out = {"pagina": nome, "links": len(links), "divergencias": 0, "referencia_ms": 0.0, "anotada_ms": 0.0}
+    for categoria in MODOS:
+        t0 = time.perf_counter()
+        ref = [is_in_navigation(a, "", categoria) for a in links]
+        t1 = time.perf_counter()
+        anotacao = anotar_navegacao(soup)
+        nova = [em_navegacao(a, anotacao, categoria) for a in links]
+        t2 = time.perf_counter()
+        out["referencia_ms"] += 1000 * (t1 - t0)
+        out["anotada_ms"] += 1000 * (t2 - t1)
+        for a, r, n in zip(links, ref, nova):
+            if r != n:
+                out["divergencias"] += 1
+                print(f"❌ {nome} [{categoria or '-'}] {a.get('href')}: referência={r} anotada={n}")
+    return out
+
+
+def main():
+    p = argparse.ArgumentParser(description="Paridade e tempos de is_in_navigation vs anotação numa passagem")
+    p.add_argument("--html-dir", default=None, help="Pasta com páginas HTML guardadas (*.html)")
+    p.add_argument("--sinteticas", type=int, default=20, help="Nº de páginas sintéticas (sem --html-dir)")
+    p.add_argument("--guardar", default=None, help="Guardar as páginas de SECTIONS nesta pasta e sair")
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--out", default=None, help="Guardar resultados em JSON")
+    args = p.parse_args()
+
+    if args.guardar:
+        guardar_paginas(args.guardar, args.workers)
+        return
+
+    paginas = carregar_paginas(args)
+    if not paginas:
+        print("⚠️ Nenhuma página para comparar.")
+        sys.exit(1)
+    resultados = [comparar(nome, html) for nome, html in paginas]
+
+    links = sum(r["links"] for r in resultados)
+    div = sum(r["divergencias"] for r in resultados)
+    ref = sum(r["referencia_ms"] for r in resultados)
+    nova = sum(r["anotada_ms"] for r in resultados)
+    print(f"\n📄 Páginas: {len(resultados)} | 🔗 links: {links} | modos: {len(MODOS)}")
+    print(f"{'versão':<12} {'total':>10} {'por página':>12} {'por link':>10}")
+    for nome, ms in (("referência", ref), ("anotada", nova)):
+        print(f"{nome:<12} {ms:>8.1f}ms {ms / len(resultados):>10.2f}ms "
+              f"{1000 * ms / max(1, links * len(MODOS)):>8.1f}µs")
+    print(f"⚡ Aceleração: {ref / max(nova, 1e-9):.1f}x")
+    print("✅ Paridade total." if not div else f"❌ {div} divergências.")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"paginas": resultados, "referencia_ms": ref, "anotada_ms": nova, "divergencias": div},
+                      f, ensure_ascii=False, indent=2)
+        print(f"📝 Resultados guardados em {args.out}")
+    sys.exit(1 if div else 0)
+
+
+if __name__ == "__main__":
+    main()
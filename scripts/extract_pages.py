@@ -1,19 +1,21 @@
-<<<<<<< HEAD
 import json
 import time
-<<<<<<< Updated upstream
+import sqlite3
+import hashlib
+import argparse
+import threading
 import requests
 import pandas as pd
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
 import os
-=======
->>>>>>> Stashed changes
 
 HEADERS = {"User-Agent": "Mozilla/5.0 (AISEL academic bot)"}
 INPUT_XLSX = "../data/isel_site_tree.xlsx"
-INPUT_CSV = "../data/isel_links_hierarquico.csv"
+INPUT_CSV = "../data/isel_site_tree.csv"
 OUTPUT_JSON = "../data/isel_site_tree_pages.json"
+CACHE_PATH = "../data/extract_pages_cache.sqlite"
 
 # padrões de subpáginas que queremos capturar (fragmento do href -> rótulo)
 SUBPAGE_PATTERNS = {
@@ -26,18 +28,21 @@ SUBPAGE_PATTERNS = {
 }
 
 TIMEOUT = 8
-SLEEP_BETWEEN = 0.25
+WORKERS = 16
+MAX_AGE = 24 * 3600  # segundos em que um resultado em cache é usado sem voltar a pedir a página
+
 
 def load_input():
-    # tenta primeiro o Excel, depois o CSV
+    # tenta primeiro o Excel, depois o CSV (separado por ";", exportado com BOM)
     if os.path.exists(INPUT_XLSX):
         df = pd.read_excel(INPUT_XLSX, engine="openpyxl", dtype=str).fillna("")
     elif os.path.exists(INPUT_CSV):
-        df = pd.read_csv(INPUT_CSV, dtype=str).fillna("")
+        df = pd.read_csv(INPUT_CSV, sep=";", dtype=str, encoding="utf-8-sig").fillna("")
     else:
         raise FileNotFoundError(f"Nem {INPUT_XLSX} nem {INPUT_CSV} encontrados.")
     return df
 
+
 def find_url_column(df):
     # retorna o nome da coluna que contém 'url' (case-insensitive)
     for col in df.columns:
@@ -48,153 +53,209 @@ def find_url_column(df):
         return "URL"
     raise KeyError("Coluna com URL não encontrada no ficheiro de entrada.")
 
+
 def extract_subpages_from_html(page_url, soup):
     found = {}
     for a in soup.find_all("a", href=True):
         href = a["href"].strip()
         if not href:
-# === 1️⃣ LER O NOVO CSV ===
-csv_path = "../data/isel_site_tree.csv"
+            continue
+        # cria full url
+        full = href if href.startswith("http") else urljoin(page_url, href)
+        lower = full.lower()
+        for pattern, label in SUBPAGE_PATTERNS.items():
+            if pattern in lower:
+                if label not in found:
+                    found[label] = {"title": a.get_text(strip=True) or label, "url": full}
+    return found
 
-df = pd.read_csv(csv_path, sep=";", encoding="utf-8")
-df = df.fillna("")  # substituir NaN por vazio
 
-print(f"✅ CSV lido com sucesso ({len(df)} linhas)")
-print("Colunas:", df.columns.tolist())
+class ProbeCache:
+    """
+    Resultados anteriores por URL (SQLite): subpáginas encontradas, ETag,
+    Last-Modified e hash do HTML. Dentro de `max_age` o URL nem é pedido; depois
+    disso faz-se um GET condicional e, se a página não mudou (304 ou mesmo hash),
+    reaproveitam-se as subpáginas sem voltar a analisar o HTML.
+    """
 
-# === 2️⃣ LISTA PARA GUARDAR OS RESULTADOS ===
-pages = []
+    def __init__(self, path=CACHE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS probes (
+                   url TEXT PRIMARY KEY,
+                   etag TEXT,
+                   last_modified TEXT,
+                   content_hash TEXT,
+                   subpages TEXT NOT NULL,
+                   checked_at REAL NOT NULL
+               )"""
+        )
+        self._conn.commit()
 
-headers = {"User-Agent": "Mozilla/5.0 (AISEL academic bot)"}
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, subpages, checked_at FROM probes WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "content_hash": row[2],
+                "subpages": json.loads(row[3]), "checked_at": row[4]}
 
+    def put(self, url, subpages, etag="", last_modified="", content_hash=""):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, json.dumps(subpages, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
 
-def limpar_texto(texto):
-    """Remove espaços e quebras desnecessárias"""
-    return " ".join(texto.split())
+    def touch(self, url):
+        with self._lock:
+            self._conn.execute("UPDATE probes SET checked_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
 
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
 
-# === 3️⃣ LER AS PÁGINAS HTML ===
-for i, row in df.iterrows():
-    url = str(row.get("URL", "")).strip()
 
-    # Ignorar linhas sem URL ou inválidas
-    if not url or not url.startswith("http"):
-        print(f"⚠️ URL inválido (linha {i}): '{url}'")
-        continue
+class Prober:
+    """Procura as subpáginas de cada URL com uma sessão HTTP partilhada e a cache de resultados."""
 
-    # Ignorar PDFs
-    if "pdf" in url.lower():
-        continue
+    def __init__(self, workers=WORKERS, cache=None, max_age=MAX_AGE, timeout=TIMEOUT):
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.cache = cache
+        self.max_age = max_age
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.counts = {"cache": 0, "not_modified": 0, "unchanged": 0, "fetched": 0, "errors": 0}
 
-    grupo = row.get("Grupo", "")
-    subgrupo = row.get("Subgrupo", "")
-    subsub = row.get("Sub-subgrupo", "")
-    subsubsub = row.get("Sub-sub-subgrupo", "")
-    subsubsubsub = row.get("Sub-sub-sub-subgrupo", "")
-    nivel6 = row.get("Nível 6", "")
-    nivel7 = row.get("Nível 7", "")
-    nivel8 = row.get("Nível 8", "")
-    nivel9 = row.get("Nível 9", "")
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
 
-    print(f"📖 [{grupo} > {subgrupo} > {subsub}] A ler: {url}")
+    def probe(self, page_url):
+        """(subpáginas, erro ou None, estado HTTP ou None) de uma página.
+        Respostas diferentes de 200 (e 304) contam como erro, não como página sem subpáginas."""
+        cached = self.cache.get(page_url) if self.cache else None
+        if cached and time.time() - cached["checked_at"] < self.max_age:
+            self._count("cache")
+            return cached["subpages"], None, None
 
-    try:
-        resposta = requests.get(url, headers=headers, timeout=20)
-        if resposta.status_code != 200:
-            print(f"⚠️ Erro {resposta.status_code} ao abrir {url}")
-            continue
-        # cria full url
-        full = href if href.startswith("http") else urljoin(page_url, href)
-        lower = full.lower()
-        for pattern, label in SUBPAGE_PATTERNS.items():
-            if pattern in lower:
-                if label not in found:
-                    found[label] = {"title": a.get_text(strip=True) or label, "url": full}
-    return found
+        headers = {}
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            resp = self.session.get(page_url, headers=headers, timeout=self.timeout)
+        except Exception as e:
+            self._count("errors")
+            return {}, str(e), None
 
-<<<<<<< Updated upstream
-def build_json_records(df):
+        if resp.status_code == 304 and cached:
+            self.cache.touch(page_url)
+            self._count("not_modified")
+            return cached["subpages"], None, 304
+        if resp.status_code != 200:
+            self._count("errors")
+            return {}, f"HTTP {resp.status_code}", resp.status_code
+
+        content_hash = hashlib.sha256(resp.content).hexdigest()
+        if "text/html" not in resp.headers.get("Content-Type", ""):
+            subpages = {}  # PDF, imagem, ...: página sem subpáginas (também fica em cache)
+            self._count("fetched")
+        elif cached and cached["content_hash"] == content_hash:
+            subpages = cached["subpages"]
+            self._count("unchanged")
+        else:
+            subpages = extract_subpages_from_html(page_url, BeautifulSoup(resp.text, "html.parser"))
+            self._count("fetched")
+        if self.cache:
+            self.cache.put(page_url, subpages, resp.headers.get("ETag", ""),
+                           resp.headers.get("Last-Modified", ""), content_hash)
+        return subpages, None, 200
+
+    def close(self):
+        self.session.close()
+
+
+def build_json_records(df, prober, workers=WORKERS):
+    """Gera os registos pela ordem do ficheiro de entrada, com as páginas pedidas em paralelo."""
     url_col = find_url_column(df)
     level_cols = [c for c in df.columns if c != url_col]
-    records = []
+    rows = []
     seen_urls = set()
-
     for _, row in df.iterrows():
         page_url = (row.get(url_col) or "").strip()
         if not page_url or page_url in seen_urls:
             continue
         seen_urls.add(page_url)
+        rows.append((page_url, {col: (row.get(col) or "") for col in level_cols}))
 
-        levels = {col: (row.get(col) or "") for col in level_cols}
-        rec = {"levels": levels, "url": page_url, "subpages": {}}
-
-        # fetch page and probe for subpages
-        try:
-            resp = requests.get(page_url, headers=HEADERS, timeout=TIMEOUT)
-            if resp.status_code == 200 and "text/html" in resp.headers.get("Content-Type", ""):
-                soup = BeautifulSoup(resp.text, "html.parser")
-                subpages = extract_subpages_from_html(page_url, soup)
-                rec["subpages"] = subpages
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe") as pool:
+        # map devolve pela ordem de entrada, à medida que os resultados ficam prontos
+        results = pool.map(prober.probe, [url for url, _ in rows])
+        for (page_url, levels), (subpages, error, status) in zip(rows, results):
+            rec = {"levels": levels, "url": page_url, "subpages": subpages}
+            if error:
+                rec["error"] = error
+                if status:
+                    rec["status"] = status
+                print(f"⚠️ Erro: {page_url} ({error})")
             else:
-                rec["subpages"] = {}
-        except Exception as e:
-            rec["error"] = str(e)
-
-        records.append(rec)
-        print(f"✔ Processado: {page_url} (subpáginas: {len(rec['subpages'])})")
-        time.sleep(SLEEP_BETWEEN)
-    return records
-=======
-        soup = BeautifulSoup(resposta.text, "html.parser")
-        main = soup.select_one("main") or soup
-
-        # Extrai texto de parágrafos
-        paragrafos = [p.get_text(" ", strip=True) for p in main.find_all("p")]
-        texto = limpar_texto(" ".join(paragrafos))
-
-        # Adiciona headings se o texto for curto
-        if len(texto) < 150:
-            heads = [h.get_text(" ", strip=True) for h in soup.select("h1,h2,h3")]
-            texto = limpar_texto(" ".join(heads + paragrafos))
-
-        pages.append({
-            "url": url,
-            "grupo": grupo,
-            "subgrupo": subgrupo,
-            "subsub": subsub,
-            "subsubsub": subsubsub,
-            "subsubsubsub": subsubsubsub,
-            "nivel6": nivel6,
-            "nivel7": nivel7,
-            "nivel8": nivel8,
-            "nivel9": nivel9,
-            "conteudo": texto
-        })
->>>>>>> Stashed changes
+                print(f"✔ Processado: {page_url} (subpáginas: {len(rec['subpages'])})")
+            yield rec
+
+
+def write_json_incremental(records, path):
+    """Escreve a lista JSON registo a registo (mesmo formato de json.dump(..., indent=2))."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    total = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[")
+        for rec in records:
+            body = json.dumps(rec, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+            f.write(("," if total else "") + "\n  " + body)
+            total += 1
+        f.write("\n]" if total else "]")
+    os.replace(tmp, path)
+    return total
+
 
 def main():
+    p = argparse.ArgumentParser(description="Procura subpáginas (Plano de Estudos, Horário, ...) das páginas da árvore do site")
+    p.add_argument("--workers", type=int, default=WORKERS, help="Pedidos HTTP em paralelo")
+    p.add_argument("--max-age", type=float, default=MAX_AGE,
+                   help="Segundos em que o resultado em cache é usado sem pedir a página (0 = revalidar sempre)")
+    p.add_argument("--no-cache", action="store_true", help="Ignorar e não atualizar a cache de resultados")
+    p.add_argument("--output", default=OUTPUT_JSON, help="Ficheiro JSON de saída")
+    args = p.parse_args()
+
+    t0 = time.perf_counter()
     df = load_input()
-    records = build_json_records(df)
-    os.makedirs(os.path.dirname(OUTPUT_JSON), exist_ok=True)
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
-    print(f"\n✅ JSON gravado em: {OUTPUT_JSON} — total entradas: {len(records)}")
+    cache = None if args.no_cache else ProbeCache()
+    prober = Prober(workers=args.workers, cache=cache, max_age=args.max_age)
+    try:
+        total = write_json_incremental(build_json_records(df, prober, args.workers), args.output)
+    finally:
+        prober.close()
+        if cache:
+            cache.close()
+    c = prober.counts
+    print(f"\n✅ JSON gravado em: {args.output} — total entradas: {total}")
+    print(f"⚡ cache: {c['cache']} | não modificadas (304): {c['not_modified']} | sem alterações: {c['unchanged']} "
+          f"| pedidas: {c['fetched']} | erros: {c['errors']} | {time.perf_counter() - t0:.1f} s")
+
 
-<<<<<<< Updated upstream
 if __name__ == "__main__":
     main()
-=======
-    except Exception as e:
-        print(f"❌ Erro a processar {url}: {e}")
-
-# === 4️⃣ GUARDAR EM JSON ===
-output_path = "../data/pages.json"
-with open(output_path, "w", encoding="utf-8") as f:
-    json.dump(pages, f, ensure_ascii=False, indent=2)
-
-print("\n🎉 Ficheiro pages.json criado com sucesso!")
-print(f"Total de páginas extraídas: {len(pages)}")
->>>>>>> Stashed changes
-=======
-''''''
->>>>>>> fbceb9678bc163a0ce03bf166962bf8f2b13f95e
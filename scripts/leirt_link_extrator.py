@@ -1,7 +1,7 @@
 import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
-import pandas as pd
+from row_writer import RowWriter
 
 # ==============================
 # 1️⃣ Configurações
@@ -27,8 +27,10 @@ soup = BeautifulSoup(resp.text, "html.parser")
 # ==============================
 # 3️⃣ Extração de links
 # ==============================
-links = []
+output_csv = "../data/leirt_links_full.csv"
 pdf_links = []
+out = RowWriter(output_csv, ["Texto", "URL"], dedup=["URL"])
+out.open()
 
 for a in soup.find_all("a", href=True):
     href = a["href"].strip()
@@ -46,25 +48,25 @@ for a in soup.find_all("a", href=True):
     if full_url.lower().endswith(".pdf"):
         pdf_links.append(full_url)
 
+    # mantém apenas URLs válidos
+    if not full_url.startswith("http"):
+        continue
+
     text = a.get_text(strip=True)
-    links.append({
+    out.write({
         "Texto": text if text else "(sem texto visível)",
         "URL": full_url
     })
 
 # ==============================
-# 4️⃣ Limpeza e gravação
+# 4️⃣ Gravação (deduplicada à medida que as linhas chegam)
 # ==============================
-df = pd.DataFrame(links).drop_duplicates(subset=["URL"])
-df = df[df["URL"].str.startswith("http")]  # mantém apenas URLs válidos
-
-output_csv = "../data/leirt_links_full.csv"
-df.to_csv(output_csv, index=False, encoding="utf-8-sig")
+out.close()
 
 # ==============================
 # 5️⃣ Output limpo no terminal
 # ==============================
-total_links = len(df)
+total_links = out.written
 total_pdfs = len(set(pdf_links))
 
 print(f"✅ {total_links} links internos encontrados.\n")
@@ -1,165 +1,13 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import pandas as pd
-import time
-from collections import defaultdict
+"""
+Links das páginas de cada licenciatura → ../data/licenciaturas_links_full.xlsx.
 
-# ==============================
-# 1️⃣ Configurações
-# ==============================
-BASE_URL = "https://www.isel.pt/cursos/licenciaturas"
-DOMAIN = urlparse(BASE_URL).netloc
-HEADERS = {"User-Agent": "Mozilla/5.0 (AI-ISEL academic crawler)"}
+O varrimento é feito pelo section_crawler.py (perfil "licenciaturas"); este script
+fica como atalho. Equivale a: python section_crawler.py licenciaturas
+"""
 
-print(f"🚀 A aceder à página principal: {BASE_URL}\n")
+import sys
 
-# ==============================
-# 2️⃣ Obter lista de licenciaturas
-# ==============================
-try:
-    resp = requests.get(BASE_URL, headers=HEADERS, timeout=15)
-    resp.raise_for_status()
-except Exception as e:
-    print(f"❌ Erro ao aceder à página principal: {e}")
-    exit(1)
+from section_crawler import main
 
-soup = BeautifulSoup(resp.text, "html.parser")
-
-degree_links = []
-for a in soup.find_all("a", href=True):
-    href = a["href"].strip()
-    text = a.get_text(strip=True)
-    if not href or not text:
-        continue
-
-    full_url = urljoin(BASE_URL, href)
-    if "/curso/licenciatura/" in full_url and DOMAIN in full_url:
-        degree_links.append((text, full_url))
-
-# Remover duplicados mantendo a ordem
-degree_links = list(dict.fromkeys(degree_links))
-
-print(f"🎓 Total de licenciaturas encontradas: {len(degree_links)}\n")
-
-# ==============================
-# 3️⃣ Função auxiliar – Ignorar menus globais
-# ==============================
-def is_in_navigation(a_tag, base_path):
-    # Ignorar menus globais (header/nav/footer/aside ou role="navigation")
-    if a_tag.find_parent(['header', 'nav', 'footer', 'aside']):
-        return True
-
-    role = a_tag.get('role', '')
-    if role and 'navigation' in role.lower():
-        return True
-
-    parent = a_tag.parent
-    while parent:
-        cls = " ".join(parent.get('class', []))
-        # ⚠️ Só ignorar se for um menu global — evitar remover menus internos do curso
-        if any(k in cls.lower() for k in ('menu', 'nav', 'navbar', 'header', 'footer', 'cookie', 'skip')):
-            # ✅ EXCEÇÃO: se estiver dentro de uma área de curso, não ignorar
-            if parent.find_parent(class_="banner-curso") or parent.find_parent(class_="views-field-field-menu"):
-                return False
-            return True
-        parent = parent.parent
-
-    # ⚠️ exceção: se for link interno de curso (/curso/...), não ignorar
-    href = a_tag.get('href', '')
-    if href and href.startswith("/curso/"):
-        if base_path in href:
-            return False
-
-    return False
-
-
-# ==============================
-# 4️⃣ Varredura de cada licenciatura
-# ==============================
-all_rows = []
-pdf_links = set()
-links_por_lic = defaultdict(set)
-
-for degree_name, degree_url in degree_links:
-    print(f"🔍 A processar: {degree_name}")
-
-    try:
-        resp = requests.get(degree_url, headers=HEADERS, timeout=15)
-        resp.raise_for_status()
-    except Exception as e:
-        print(f"❌ Erro ao aceder a {degree_url}: {e}")
-        continue
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    # 🔸 Apenas o conteúdo principal (ignora menus globais automaticamente)
-    main_content = (
-        soup.select_one("main")
-        or soup.select_one(".layout-content")
-        or soup.select_one(".region-content")
-        or soup
-    )
-
-    for a in main_content.find_all("a", href=True):
-        href = a["href"].strip()
-        if not href or href.startswith("#"):
-            continue
-
-        full_url = urljoin(degree_url, href)
-        parsed = urlparse(full_url)
-
-        # Ignorar links externos (exceto PDFs)
-        if parsed.netloc and parsed.netloc != DOMAIN and not full_url.lower().endswith(".pdf"):
-            continue
-
-        # Ignorar links de navegação global
-        if (not text.strip() and a.find('img')) or is_in_navigation(a, degree_url):
-            continue
-
-        # Texto visível ou de fallback
-        text = a.get_text(strip=True) or a.get('aria-label') or a.get('title') or ""
-
-        # Ignorar links vazios
-        if not text.strip() and a.find('img'):
-            continue
-
-        # Identificar PDFs
-        if full_url.lower().endswith(".pdf"):
-            pdf_links.add(full_url)
-
-        links_por_lic[degree_name].add((text or "(sem texto visível)", full_url))
-
-    print(f"   ✅ {len(links_por_lic[degree_name])} links únicos recolhidos.\n")
-    time.sleep(0.5)
-
-# ==============================
-# 5️⃣ Identificar links comuns
-# ==============================
-for lic, links in links_por_lic.items():
-    for text, url in links:
-        lic_name = lic
-        all_rows.append({
-            "Licenciatura": lic_name,
-            "Texto": text,
-            "URL": url
-        })
-        
-# ==============================
-# 6️⃣ Limpeza e gravação
-# ==============================
-df = pd.DataFrame(all_rows).drop_duplicates(subset=["Licenciatura", "URL"])
-df = df[df["URL"].str.startswith("http")]
-df.sort_values(by=["Licenciatura", "Texto"], inplace=True)
-
-output_excel = "../data/licenciaturas_links_full.xlsx"
-df.to_excel(output_excel, index=False)
-
-# ==============================
-# 7️⃣ Output final
-# ==============================
-print("🏁 Varredura concluída!\n")
-print(f"🎓 Total de licenciaturas processadas: {len(degree_links)}")
-print(f"🔗 Total de links únicos: {len(df)}")
-print(f"📄 Total de PDFs encontrados: {len(pdf_links)}")
-print(f"📁 Guardado em: {output_excel}")
+if __name__ == "__main__":
+    main(["licenciaturas"] + sys.argv[1:])
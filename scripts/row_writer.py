@@ -0,0 +1,155 @@
+"""
+Escrita incremental das tabelas de links (CSV ou Excel), com deduplicação à chegada.
+
+Em vez de juntar todas as linhas numa lista, montar um DataFrame e só no fim
+deduplicar e chamar to_excel, cada linha é escrita assim que chega:
+ - CSV com o módulo csv; Excel com o openpyxl em modo write-only (sem manter a
+   folha em memória);
+ - a deduplicação guarda apenas um hash de 8 bytes da chave de cada linha;
+ - em modo append, as linhas de uma execução anterior são copiadas (e entram no
+   conjunto de chaves) e só se acrescentam as novas; o cabeçalho do ficheiro
+   existente tem de ser igual às colunas pedidas (senão, ValueError);
+ - escreve-se sempre para um ficheiro temporário (também em append) que só
+   substitui o final no fecho, por isso uma execução interrompida não estraga o
+   ficheiro anterior.
+As linhas ficam pela ordem de chegada (não há ordenação final).
+
+Uso:
+    with RowWriter("../data/x.xlsx", ["Texto", "URL"], dedup=["URL"], append=True) as out:
+        out.write({"Texto": "...", "URL": "..."})
+"""
+
+import os
+import csv
+import hashlib
+from itertools import chain
+
+from openpyxl import Workbook, load_workbook
+
+
+def chave_hash(valores):
+    return hashlib.blake2b("\x1f".join(str(v) for v in valores).encode("utf-8"), digest_size=8).digest()
+
+
+class RowWriter:
+    """Escritor de linhas (dicts) para .csv ou .xlsx, com deduplicação por hash e modo append."""
+
+    def __init__(self, path, columns, dedup=None, append=False, sheet_title="Sheet1"):
+        self.path = path
+        self.columns = list(columns)
+        self.dedup = list(dedup or columns)
+        self.append = append
+        self.sheet_title = sheet_title
+        self.csv = path.lower().endswith(".csv")
+        self.vistos = set()
+        self.written = 0      # linhas novas escritas nesta execução
+        self.kept = 0         # linhas mantidas da execução anterior (append)
+        self.skipped = 0      # duplicados descartados
+        self._tmp = None
+        self._file = None
+        self._writer = None
+        self._wb = None
+        self._ws = None
+
+    # ---------- abertura ----------
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+    def _existentes(self):
+        """Linhas (listas pela ordem de self.columns) de uma execução anterior, lidas em streaming."""
+        if not (self.append and os.path.exists(self.path)):
+            return
+        if self.csv:
+            with open(self.path, newline="", encoding="utf-8-sig") as f:
+                linhas = csv.reader(f)
+                self._check_header(next(linhas, []))
+                for row in linhas:
+                    yield [row[i] if i < len(row) else "" for i in range(len(self.columns))]
+            return
+        wb = load_workbook(self.path, read_only=True)
+        try:
+            linhas = wb.active.iter_rows(values_only=True)
+            self._check_header([str(h) if h is not None else "" for h in next(linhas, [])])
+            for row in linhas:
+                yield ["" if i >= len(row) or row[i] is None else row[i] for i in range(len(self.columns))]
+        finally:
+            wb.close()
+
+    def _check_header(self, header):
+        header = list(header)
+        while header and not header[-1]:
+            header.pop()
+        if header and header != self.columns:
+            raise ValueError(f"{self.path}: o cabeçalho existente {header} não coincide com as colunas "
+                             f"{self.columns}; corre sem append ou com outro ficheiro de saída.")
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._tmp = self.path + ".tmp"
+        # lê o cabeçalho (e valida-o) antes de criar o temporário
+        existentes = self._existentes()
+        primeira = next(existentes, None)
+        if self.csv:
+            self._file = open(self._tmp, "w", newline="", encoding="utf-8-sig")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.columns)
+        else:
+            self._wb = Workbook(write_only=True)
+            self._ws = self._wb.create_sheet(self.sheet_title)
+            self._ws.append(self.columns)
+        # append: o ficheiro anterior é copiado linha a linha para o temporário
+        if primeira is None:
+            return
+        for row in chain([primeira], existentes):
+            chave = self._chave(dict(zip(self.columns, row)))
+            if chave in self.vistos:
+                continue
+            self.vistos.add(chave)
+            if self.csv:
+                self._writer.writerow(row)
+            else:
+                self._ws.append(row)
+            self.kept += 1
+
+    # ---------- escrita ----------
+    def _chave(self, row):
+        return chave_hash(row.get(c, "") for c in self.dedup)
+
+    def write(self, row) -> bool:
+        """Escreve a linha se a chave ainda não foi vista; devolve se foi escrita."""
+        chave = self._chave(row)
+        if chave in self.vistos:
+            self.skipped += 1
+            return False
+        self.vistos.add(chave)
+        valores = [row.get(c, "") for c in self.columns]
+        if self.csv:
+            self._writer.writerow(valores)
+        else:
+            self._ws.append(valores)
+        self.written += 1
+        return True
+
+    def write_many(self, rows) -> int:
+        return sum(self.write(r) for r in rows)
+
+    @property
+    def total(self) -> int:
+        return self.kept + self.written
+
+    # ---------- fecho ----------
+    def close(self, commit=True):
+        if self._file:
+            self._file.close()
+        elif self._wb is not None:
+            self._wb.save(self._tmp)
+        if self._tmp:
+            if commit:
+                os.replace(self._tmp, self.path)
+            elif os.path.exists(self._tmp):
+                os.remove(self._tmp)
+        self._file = self._wb = self._ws = self._writer = None
@@ -0,0 +1,399 @@
+"""
+Varrimento das secções do site do ISEL (motor único dos *_link_extractor.py).
+
+As secções vêm de sections.py (SECTIONS) e cada perfil de PERFIS diz que
+categorias percorrer, como expandir cada subcategoria e onde gravar:
+ - as páginas são pedidas em paralelo (ThreadPoolExecutor + requests.Session
+   partilhada), por fases: páginas raiz → cursos/subpáginas/ligações a seguir;
+ - cada URL é pedido uma única vez em todo o varrimento, mesmo que apareça em
+   várias categorias (as linhas continuam a ser registadas em cada contexto);
+   do HTML só ficam os links extraídos (é descartado logo após a análise) e as
+   páginas são pedidas por lotes, para a memória não crescer com o site;
+ - as subpáginas seguidas em profundidade são reclamadas por ordem de SECTIONS
+   (conjunto global), por isso o resultado não depende da ordem das respostas;
+ - as linhas são gravadas à medida que saem (row_writer.py), com deduplicação
+   por hash e a opção --append para continuar o ficheiro de uma execução anterior.
+
+Uso:
+    python section_crawler.py isel
+    python section_crawler.py ensino cursos licenciaturas --workers 16
+    python section_crawler.py isel --formato csv --append
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from row_writer import RowWriter
+from sections import SECTIONS, PERFIS
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (AI-ISEL academic crawler)"}
+OUTPUT_DIR = "../data"
+TIMEOUT = 15
+WORKERS = 8
+LOTE = 64         # páginas pedidas de cada vez no passo final de varrer
+COLUNAS = ["Categoria", "Subcategoria", "Página", "Texto", "URL"]
+
+
+# ---------------- Normalização de URL ----------------
+def normalizar_url(u: str) -> str:
+    if not u:
+        return ""
+    # remover fragmentos e espaços
+    u = u.strip()
+    if "#" in u:
+        u = u.split("#", 1)[0]
+    # remover barra final (exceto raiz)
+    if len(u) > 1 and u.endswith("/"):
+        u = u[:-1]
+    return u
+
+
+# ---------------- Links em atributos/JS ----------------
+ATTR_PATTERN = re.compile(r"(https?://[^\s'\"<>]+|/[^\s'\"<>]+)")
+def extrair_links_de_atributos(root, base_url, domain):
+    encontrados = []
+    for el in root.find_all(True):
+        for attr in ("data-href", "data-url", "data-link", "onclick"):
+            val = el.get(attr)
+            if not val:
+                continue
+            # onclick pode conter window.location='...'
+            if attr == "onclick":
+                candidatos = ATTR_PATTERN.findall(val)
+            else:
+                candidatos = [val]
+            for c in candidatos:
+                full = urljoin(base_url, c)
+                p = urlparse(full)
+                if p.netloc and p.netloc != domain and not full.lower().endswith(".pdf"):
+                    continue
+                txt = el.get_text(strip=True) or el.get("aria-label") or el.get("title") or c
+                encontrados.append((txt, normalizar_url(full)))
+    # deduplicar mantendo ordem
+    vistos_local = set()
+    res = []
+    for t, u in encontrados:
+        if u not in vistos_local:
+            vistos_local.add(u)
+            res.append((t, u))
+    return res
+
+
+# ---------------- Ignorar menus globais ----------------
+NAV_TAGS = {'header', 'nav', 'footer', 'aside'}
+NAV_CLASSES = ('menu', 'nav', 'navbar', 'header', 'footer', 'cookie', 'skip')
+NAV_EXCECOES = {"banner-curso", "views-field-field-menu", "field--name-field-menu", "menu--ensino"}
+
+
+def is_in_navigation(a_tag, base_path, categoria=""):
+    """Versão de referência (sobe do link até à raiz); ver anotar_navegacao para a de uma passagem."""
+    if a_tag.find_parent(['header', 'nav', 'footer', 'aside']):
+        return True
+    if categoria != "Cursos":
+        return False
+    role = a_tag.get('role', '')
+    if role and 'navigation' in role.lower():
+        return True
+    parent = a_tag.parent
+    while parent:
+        cls = " ".join(parent.get('class', []))
+        if any(k in cls.lower() for k in ('menu', 'nav', 'navbar', 'header', 'footer', 'cookie', 'skip')):
+            if parent.find_parent(class_="banner-curso") or \
+               parent.find_parent(class_="views-field-field-menu") or \
+               parent.find_parent(class_="field--name-field-menu") or \
+               parent.find_parent(class_="menu--ensino"):
+                return False
+            return True
+        parent = parent.parent
+    return False
+
+
+def anotar_navegacao(root):
+    """
+    Numa só passagem pela árvore, {id(<a>): (em_estrutura, em_menu)} para todos os links:
+     - em_estrutura: dentro de header/nav/footer/aside;
+     - em_menu: o antepassado mais próximo com classe de menu existe e não está
+       dentro de uma das NAV_EXCECOES (None se não há antepassado de menu).
+    Dá o mesmo resultado que is_in_navigation, mas cada consulta passa a ser O(1).
+    """
+    anotacao = {}
+    # (elemento, dentro de header/nav/..., decisão do menu mais próximo, exceção acima)
+    pilha = [(root, False, None, False)]
+    while pilha:
+        el, estrutura, menu, excecao = pilha.pop()
+        classes = el.get('class') or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        cls = " ".join(classes).lower()
+        # o estado dos filhos inclui o próprio elemento (os testes olham só para os antepassados)
+        estrutura_f = estrutura or el.name in NAV_TAGS
+        menu_f = (not excecao) if any(k in cls for k in NAV_CLASSES) else menu
+        excecao_f = excecao or any(c in NAV_EXCECOES for c in classes)
+        for filho in el.find_all(True, recursive=False):
+            if filho.name == "a":
+                anotacao[id(filho)] = (estrutura_f, menu_f)
+            pilha.append((filho, estrutura_f, menu_f, excecao_f))
+    return anotacao
+
+
+def em_navegacao(a_tag, anotacao, categoria=""):
+    """is_in_navigation com a anotação de anotar_navegacao (O(1) por link)."""
+    estrutura, menu = anotacao.get(id(a_tag), (False, None))
+    if estrutura:
+        return True
+    if categoria != "Cursos":
+        return False
+    role = a_tag.get('role', '')
+    if role and 'navigation' in role.lower():
+        return True
+    return bool(menu)
+
+
+# ---------------- Extração a partir do HTML ----------------
+def _soup(html):
+    return html if isinstance(html, BeautifulSoup) else BeautifulSoup(html, "html.parser")
+
+
+def links_da_pagina(html, url_base, categoria=""):
+    """[(texto, url)] visíveis no conteúdo principal da página (sem menus globais); aceita HTML ou soup."""
+    domain = urlparse(url_base).netloc
+    soup = _soup(html)
+    main = (
+        soup.select_one("main")
+        or soup.select_one("#block-isel-content")
+        or soup.select_one(".layout-content")
+        or soup.select_one(".region-content")
+        or soup
+    )
+    anotacao = anotar_navegacao(soup)
+    links = []
+    vistos = set()
+    # atributos extras
+    for t, u in extrair_links_de_atributos(main, url_base, domain):
+        if u not in vistos:
+            vistos.add(u)
+            links.append((t, u))
+    for a in main.find_all("a", href=True):
+        href = a["href"].strip()
+        if not href or href.startswith("#"):
+            continue
+        full_url = normalizar_url(urljoin(url_base, href))
+        parsed = urlparse(full_url)
+        if parsed.netloc and parsed.netloc != domain and not full_url.lower().endswith(".pdf"):
+            continue
+        if em_navegacao(a, anotacao, categoria):
+            continue
+        text = a.get_text(strip=True) or a.get("aria-label") or a.get("title") or ""
+        if not text and a.find("img"):
+            img = a.find("img")
+            text = img.get("alt") or img.get("title") or ""
+        if not text:
+            continue
+        if full_url not in vistos:
+            vistos.add(full_url)
+            links.append((text, full_url))
+    return links
+
+
+def listar_paginas(html, base_url, padroes):
+    """[(nome, url)] de todas as ligações da página cujo URL contém um dos `padroes` (cursos, departamentos, ...)."""
+    domain = urlparse(base_url).netloc
+    soup = _soup(html)
+    encontrados = []
+    for a in soup.find_all("a", href=True):
+        full_url = normalizar_url(urljoin(base_url, a["href"].strip()))
+        if any(p in full_url for p in padroes) and domain in full_url:
+            nome = a.get_text(strip=True) or a.get("title") or a.get("aria-label") or ""
+            if nome:
+                encontrados.append((nome, full_url))
+    return list(dict.fromkeys(encontrados))
+
+
+# ---------------- Pedidos concorrentes ----------------
+class SectionCrawler:
+    """Pedidos HTTP em paralelo com cache por URL partilhada por todos os perfis do varrimento.
+    Cada página é analisada no worker que a pediu e só os links ficam em cache (não o HTML)."""
+
+    def __init__(self, workers=WORKERS, timeout=TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl")
+        self.visitados = set()  # URLs já pedidos neste varrimento
+        self.links = {}         # (url, categoria "Cursos"?) → [(texto, url)]
+        self.ancoras = {}       # url → [(nome, url)] de todas as ligações do domínio (para listar)
+        self._lock = threading.Lock()
+        self.erros = 0
+
+    def _get(self, url):
+        try:
+            resp = self.session.get(url, timeout=self.timeout)
+            resp.raise_for_status()
+            return resp.text
+        except Exception as e:
+            print(f"❌ Erro ao aceder a {url}: {e}")
+            with self._lock:
+                self.erros += 1
+            return None
+
+    def _analisar(self, url):
+        """Pede a página e extrai os links nos dois modos de navegação e as âncoras; o HTML não sai daqui."""
+        html = self._get(url)
+        if not html:
+            return [], [], []
+        soup = BeautifulSoup(html, "html.parser")
+        return links_da_pagina(soup, url), links_da_pagina(soup, url, "Cursos"), listar_paginas(soup, url, [""])
+
+    def prefetch(self, urls):
+        """Pede e analisa em paralelo os URLs ainda não pedidos neste varrimento."""
+        novos = [u for u in dict.fromkeys(urls) if u not in self.visitados]
+        for url, (links, links_cursos, ancoras) in zip(novos, self.pool.map(self._analisar, novos)):
+            self.visitados.add(url)
+            self.links[(url, False)] = links
+            self.links[(url, True)] = links_cursos
+            self.ancoras[url] = ancoras
+
+    def extrair_links(self, url, categoria=""):
+        # só a categoria "Cursos" muda o filtro de navegação
+        self.prefetch([url])
+        return self.links[(url, categoria == "Cursos")]
+
+    def listar(self, url, padroes):
+        self.prefetch([url])
+        return [(nome, link) for nome, link in self.ancoras[url] if any(p in link for p in padroes)]
+
+    def close(self):
+        self.pool.shutdown()
+        self.session.close()
+
+
+# ---------------- Varrimento de um perfil ----------------
+def seccoes_do_perfil(perfil):
+    """[(categoria, subcategoria, url)] pela ordem de SECTIONS."""
+    categorias = perfil.get("categorias") or list(SECTIONS)
+    subcategorias = perfil.get("subcategorias")
+    out = []
+    for categoria in categorias:
+        for subcat, url in SECTIONS.get(categoria, {}).items():
+            if subcategorias and subcat not in subcategorias:
+                continue
+            out.append((categoria, subcat, normalizar_url(url)))
+    return out
+
+
+def expansao(perfil, categoria, subcat):
+    """Padrões de URL das páginas a listar numa subcategoria (cursos, departamentos, ...) ou None."""
+    regra = perfil.get("expandir", {}).get(categoria)
+    if not regra or (regra.get("subcategorias") and subcat not in regra["subcategorias"]):
+        return None
+    return regra["padroes"]
+
+
+def varrer(crawler, perfil, visitados_profundo, stats=None):
+    """Gera as linhas (Categoria, Subcategoria, Página, Texto, URL) de um perfil, página a página."""
+    stats = stats if stats is not None else {}
+    seccoes = seccoes_do_perfil(perfil)
+    seguir = perfil.get("seguir") or []
+
+    # 1) páginas raiz das subcategorias (e listagens de cursos/subpáginas)
+    crawler.prefetch(url for _, _, url in seccoes)
+
+    # 2) páginas a extrair, pela ordem de SECTIONS: (categoria, subcat, página, url)
+    paginas = []
+    stats["listadas"] = 0
+    for categoria, subcat, url in seccoes:
+        padroes = expansao(perfil, categoria, subcat)
+        if padroes is not None:
+            listadas = crawler.listar(url, padroes)
+            print(f"🎓 [{categoria}] {subcat}: {len(listadas)} páginas encontradas")
+            stats["listadas"] += len(listadas)
+            for nome, link in listadas:
+                paginas.append((categoria, subcat, nome, link))
+                visitados_profundo.add(link)
+            continue
+        paginas.append((categoria, subcat, subcat, url))
+        # seguir alguns internos relevantes (cada um só uma vez em todo o varrimento)
+        for t, sublink in crawler.extrair_links(url, categoria):
+            if any(x in sublink for x in seguir) and sublink not in visitados_profundo:
+                visitados_profundo.add(sublink)
+                paginas.append((categoria, subcat, t or sublink, sublink))
+
+    # 3) páginas pedidas em paralelo, por lotes; as linhas de cada lote saem antes do seguinte
+    for i in range(0, len(paginas), LOTE):
+        lote = paginas[i:i + LOTE]
+        crawler.prefetch(url for _, _, _, url in lote)
+        for categoria, subcat, pagina, url in lote:
+            for t, u in crawler.extrair_links(url, categoria):
+                yield {"Categoria": categoria, "Subcategoria": subcat, "Página": pagina, "Texto": t, "URL": u}
+
+
+def caminho_saida(perfil, output_dir=OUTPUT_DIR, formato=None):
+    path = os.path.join(output_dir, perfil["saida"])
+    if formato:
+        path = os.path.splitext(path)[0] + "." + formato
+    return path
+
+
+def gravar(rows, perfil, path, append=False):
+    """Escreve as linhas em streaming (CSV ou Excel, pela extensão), com as colunas e a deduplicação do perfil."""
+    colunas = perfil.get("colunas") or {c: c for c in COLUNAS}
+    dedup = perfil.get("dedup") or ["Categoria", "Subcategoria", "Página", "URL"]
+    with RowWriter(path, list(colunas.values()), dedup=dedup, append=append) as out:
+        for row in rows:
+            if row["URL"].startswith("http"):
+                out.write({novo: row[antigo] for antigo, novo in colunas.items()})
+    return out
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Varrimento concorrente das secções do site do ISEL")
+    p.add_argument("perfis", nargs="*", default=["isel"],
+                   help=f"Perfis de sections.PERFIS a gerar: {', '.join(PERFIS)} (por omissão: isel)")
+    p.add_argument("--workers", type=int, default=WORKERS, help="Pedidos HTTP em paralelo")
+    p.add_argument("--output-dir", default=OUTPUT_DIR, help="Pasta dos ficheiros gerados")
+    p.add_argument("--formato", choices=["xlsx", "csv"], default=None,
+                   help="Forçar o formato de saída (por omissão, o do perfil)")
+    p.add_argument("--append", action="store_true",
+                   help="Acrescentar a um ficheiro de uma execução anterior (só linhas novas)")
+    args = p.parse_args(argv)
+    desconhecidos = [n for n in args.perfis if n not in PERFIS]
+    if desconhecidos:
+        p.error(f"perfil desconhecido: {', '.join(desconhecidos)}")
+
+    crawler = SectionCrawler(workers=args.workers)
+    t0 = time.perf_counter()
+    try:
+        for nome in dict.fromkeys(args.perfis):
+            perfil = PERFIS[nome]
+            print(f"\n==============================")
+            print(f"📌 Perfil: {nome}")
+            print("==============================\n")
+            # o conjunto de páginas seguidas é por perfil; a cache de pedidos é de todo o varrimento
+            stats = {}
+            path = caminho_saida(perfil, args.output_dir, args.formato)
+            out = gravar(varrer(crawler, perfil, visitados_profundo=set(), stats=stats), perfil, path, args.append)
+            print(f"\n📘 Páginas listadas (cursos/subpáginas): {stats['listadas']}")
+            print(f"🔗 Total de links recolhidos: {out.total} ({out.written} novos, {out.skipped} duplicados)")
+            print(f"📁 Guardado em: {path}")
+    finally:
+        crawler.close()
+
+    print("\n🏁 Varredura concluída!\n")
+    print(f"🌐 Páginas pedidas: {len(crawler.visitados)} ({crawler.erros} com erro) "
+          f"em {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -155,4 +155,51 @@ SECTIONS = {
     
 }
 
-    
\ No newline at end of file
+# Perfis do section_crawler.py: que categorias percorrer, que subcategorias
+# expandir (páginas listadas por padrão de URL), que ligações seguir em
+# profundidade e onde/como gravar.
+EXPANDIR_CURSOS = {"Cursos": {"padroes": ["/curso/", "/ensino/cursos/outros-cursos/"]}}
+
+SEGUIR_ENSINO = ["/ensino/", "/servicos/", "/programas-", "/erasmus", "/mobilidade"]
+
+SEGUIR_ISEL = SEGUIR_ENSINO + [
+    "/comunidade/", "/investigacao",
+    "/candidatos/", "/quem-somos/", "/investigacao-e-inovacao",
+    "/ecossistema-de-inovacao", "/o-isel", "/plano-para-igualdade-de-genero",
+    "/isel-", "/a-descoberta-do-isel", "/projetos", "/estudantes/",
+    "/alem-aulas/", "/empreendedorismo", "/oportunidades/",
+]
+
+PERFIS = {
+    "isel": {
+        "categorias": None,  # todas
+        "expandir": {
+            **EXPANDIR_CURSOS,
+            "Quem Somos": {"subcategorias": ["Departamentos", "Serviços", "Órgãos"],
+                           "padroes": ["/departamento/", "/servicos/"]},
+        },
+        "seguir": SEGUIR_ISEL,
+        "saida": "isel_links_full.xlsx",
+    },
+    "ensino": {
+        "categorias": ["Cursos", "Candidatos", "Programas de Mobilidade"],
+        "expandir": EXPANDIR_CURSOS,
+        "seguir": SEGUIR_ENSINO,
+        "saida": "ensino_links_full.xlsx",
+    },
+    "cursos": {
+        "categorias": ["Cursos"],
+        "expandir": {"Cursos": {"padroes": ["/curso/"]}},
+        "saida": "isel_todos_cursos_links.xlsx",
+        "colunas": {"Subcategoria": "Tipo de Curso", "Página": "Curso", "Texto": "Texto", "URL": "URL"},
+        "dedup": ["Tipo de Curso", "Curso", "URL"],
+    },
+    "licenciaturas": {
+        "categorias": ["Cursos"],
+        "subcategorias": ["Licenciaturas"],
+        "expandir": {"Cursos": {"padroes": ["/curso/licenciatura/"]}},
+        "saida": "licenciaturas_links_full.xlsx",
+        "colunas": {"Página": "Licenciatura", "Texto": "Texto", "URL": "URL"},
+        "dedup": ["Licenciatura", "URL"],
+    },
+}